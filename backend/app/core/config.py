@@ -5,6 +5,8 @@ import os
 class Settings(BaseSettings):
     # Database
     DATABASE_URL: str = "sqlite:///./accounting.db"
+    DATABASE_QUERY_CACHE_SIZE: int = 1200  # SQLAlchemy compiled statement cache entries
+    DATABASE_INSERTMANYVALUES_PAGE_SIZE: int = 10000  # Rows per multi-VALUES INSERT batch
     
     # API Settings
     API_V1_STR: str = "/api/v1"
@@ -22,10 +24,20 @@ class Settings(BaseSettings):
     # Classification
     DEFAULT_CLASSIFICATION_MODEL: str = "gpt-3.5-turbo"
     CLASSIFICATION_CONFIDENCE_THRESHOLD: float = 0.8
+    CLASSIFICATION_BATCH_SIZE: int = 1000
+    
+    # Data cleaning
+    CLEANING_BATCH_SIZE: int = 10000
+    
+    # Export
+    EXPORT_CHUNK_SIZE: int = 10000  # Rows buffered per CSV writerows call
+    EXPORT_FOLDER: str = "exports"  # Point every worker at the same volume to share downloads
     
     # Reconciliation
     RECONCILIATION_DATE_TOLERANCE_DAYS: int = 3
     RECONCILIATION_FUZZY_MATCH_THRESHOLD: float = 0.85
+    RECONCILIATION_WORKERS: int = 0  # Matching processes for both sweeps; 0 = one per CPU
+    RECONCILIATION_PARALLEL_MIN_TRANSACTIONS: int = 20000  # Smaller runs match in-process
     
     class Config:
         env_file = ".env"
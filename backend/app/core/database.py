@@ -7,7 +7,9 @@ from app.core.config import settings
 # Create SQLAlchemy engine
 engine = create_engine(
     settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
+    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {},
+    query_cache_size=settings.DATABASE_QUERY_CACHE_SIZE,
+    insertmanyvalues_page_size=settings.DATABASE_INSERTMANYVALUES_PAGE_SIZE
 )
 
 # Create SessionLocal class
@@ -27,4 +29,12 @@ def get_db():
 def init_db():
     """Initialize database tables"""
     import app.models  # Import all models
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    Base.metadata.create_all(bind=engine)
+
+def dialect_insert(db, model):
+    """Return an INSERT for the session's dialect that supports ON CONFLICT clauses"""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(model)
@@ -2,6 +2,7 @@ from .accounts import Account, ChartOfAccounts
 from .transactions import TransactionRaw, TransactionClean
 from .classification import ClassificationRule
 from .reconciliation import Reconciliation, LedgerEntry
+from .exports import ExportRecord
 
 __all__ = [
     "Account",
@@ -10,5 +11,6 @@ __all__ = [
     "TransactionClean",
     "ClassificationRule",
     "Reconciliation",
-    "LedgerEntry"
+    "LedgerEntry",
+    "ExportRecord"
 ]
\ No newline at end of file
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text
+from app.core.database import Base
+
+class ExportRecord(Base):
+    __tablename__ = "export_records"
+    
+    file_id = Column(String(36), primary_key=True)  # UUID handed out in download URLs
+    file_path = Column(String(500), nullable=True)  # Set once the file is written
+    filename = Column(String(255), nullable=True)
+    record_count = Column(Integer, nullable=True)
+    status = Column(String(20), nullable=False, default="completed")  # queued, completed, failed
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False, index=True)  # History ordering and cleanup cutoff
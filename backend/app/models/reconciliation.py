@@ -1,4 +1,7 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey
+from sqlalchemy import (
+    Column, Integer, String, Float, DateTime, Text, ForeignKey, Index, Boolean, UniqueConstraint, false,
+    and_, or_
+)
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -15,9 +18,21 @@ class LedgerEntry(Base):
     memo = Column(Text, nullable=True)
     reference = Column(String(100), nullable=True)  # Invoice number, etc.
     source = Column(String(50), default="manual")  # manual, import, system
-    is_reconciled = Column(String(10), default="false")
+    is_reconciled = Column(Boolean, nullable=False, default=False, server_default=false())
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
+    __table_args__ = (
+        # auto_reconcile narrows unreconciled entries by date span and absolute amount range;
+        # the date index only holds unreconciled entries
+        Index(
+            "ix_ledger_entries_unreconciled_date",
+            entry_date,
+            postgresql_where=is_reconciled.is_(False),
+            sqlite_where=is_reconciled.is_(False)
+        ),
+        Index("ix_ledger_entries_abs_amount", func.abs(amount_base)),
+    )
+    
     # Relationships
     debit_account = relationship("ChartOfAccounts", foreign_keys=[debit_account_id])
     credit_account = relationship("ChartOfAccounts", foreign_keys=[credit_account_id])
@@ -40,6 +55,34 @@ class Reconciliation(Base):
     reconciled_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
+    __table_args__ = (
+        # "Does this transaction have a live reconciliation?" anti-joins read only this index
+        Index("ix_reconciliations_transaction_status", transaction_clean_id, status),
+        # auto_reconcile inserts with ON CONFLICT DO NOTHING on this pair, so re-runs are idempotent
+        UniqueConstraint(
+            transaction_clean_id, ledger_entry_id, name="uq_reconciliations_transaction_ledger_entry"
+        ),
+        # Only the rows get_reconciliation_exceptions pages through; the predicate must stay
+        # identical to its filter for the planner to pick this index
+        Index(
+            "ix_reconciliations_exceptions",
+            amount_difference,
+            date_difference_days,
+            match_type,
+            match_score,
+            postgresql_where=or_(
+                amount_difference > 1.0,
+                date_difference_days > 5,
+                and_(match_type == 'fuzzy', match_score < 0.9)
+            ),
+            sqlite_where=or_(
+                amount_difference > 1.0,
+                date_difference_days > 5,
+                and_(match_type == 'fuzzy', match_score < 0.9)
+            )
+        ),
+    )
+    
     # Relationships
     transaction_clean = relationship("TransactionClean", back_populates="reconciliations")
     ledger_entry = relationship("LedgerEntry", back_populates="reconciliations")
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -38,6 +38,28 @@ class TransactionClean(Base):
     reviewed_by = Column(String(100), nullable=True)
     processed_at = Column(DateTime(timezone=True), server_default=func.now())
     
+    __table_args__ = (
+        # Expression index so "largest transaction" ORDER BY abs(amount) LIMIT 1 avoids a sort
+        Index("ix_transactions_clean_abs_amount", func.abs(amount_base)),
+        # Covering indexes for the dashboard's date-range aggregates
+        Index("ix_transactions_clean_date_amount", transaction_date, amount_base),
+        Index("ix_transactions_clean_date_coa_amount", transaction_date, coa_id, amount_base),
+        Index(
+            "ix_transactions_clean_expenses_date",
+            transaction_date, coa_id, amount_base,
+            postgresql_where=amount_base < 0,
+            sqlite_where=amount_base < 0
+        ),
+        # Per-vendor lookups (top vendors, first-seen dates)
+        Index("ix_transactions_clean_counterparty_date", counterparty_normalized, transaction_date),
+        # Export scans: date range + reviewed flag, covering the ledger export columns on Postgres
+        Index(
+            "ix_transactions_clean_export",
+            transaction_date, is_reviewed,
+            postgresql_include=["id", "coa_id", "amount_base", "counterparty_normalized", "description_normalized"]
+        ),
+    )
+    
     # Relationships
     raw_transaction = relationship("TransactionRaw", back_populates="clean_transaction")
     coa = relationship("ChartOfAccounts")
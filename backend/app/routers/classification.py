@@ -1,7 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from enum import Enum
+import json
 
 from app.core.database import get_db
 from app.services.classification_service import ClassificationService
@@ -54,6 +56,23 @@ async def classify_transactions(
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.post("/classify/stream")
+async def classify_transactions_stream(
+    request: ClassificationRequest,
+    db: Session = Depends(get_db)
+):
+    """Classify large batches, streaming results as NDJSON one chunk at a time"""
+    classification_service = ClassificationService(db)
+    
+    async def result_lines():
+        async for chunk_results in classification_service.iter_classify_transactions(
+            transaction_ids=request.transaction_ids,
+            force_reclassify=request.force_reclassify
+        ):
+            yield "".join(json.dumps(result) + "\n" for result in chunk_results)
+    
+    return StreamingResponse(result_lines(), media_type="application/x-ndjson")
+
 @router.post("/review")
 def review_classification(
     request: ClassificationReviewRequest,
@@ -6,7 +6,7 @@ from datetime import date
 import os
 
 from app.core.database import get_db
-from app.services.export_service import ExportService
+from app.services.export_service import ExportService, run_queued_export
 from app.schemas.export import (
     ExportRequest, ExportResponse,
     QuickBooksExportRequest, XeroExportRequest
@@ -22,14 +22,20 @@ async def export_to_quickbooks(
 ):
     """Export transactions to QuickBooks format"""
     export_service = ExportService(db)
+    params = {
+        'start_date': request.start_date,
+        'end_date': request.end_date,
+        'export_type': request.export_type,
+        'include_categories': request.include_categories,
+        'reviewed_only': request.reviewed_only
+    }
     try:
-        result = await export_service.export_to_quickbooks(
-            start_date=request.start_date,
-            end_date=request.end_date,
-            export_type=request.export_type,
-            include_categories=request.include_categories,
-            reviewed_only=request.reviewed_only
-        )
+        if request.run_in_background:
+            result = export_service.queue_export()
+            background_tasks.add_task(run_queued_export, result['file_id'], 'quickbooks', params)
+            return result
+        
+        result = await export_service.export_to_quickbooks(**params)
         return result
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -42,14 +48,20 @@ async def export_to_xero(
 ):
     """Export transactions to Xero format"""
     export_service = ExportService(db)
+    params = {
+        'start_date': request.start_date,
+        'end_date': request.end_date,
+        'export_type': request.export_type,
+        'include_tax_mapping': request.include_tax_mapping,
+        'reviewed_only': request.reviewed_only
+    }
     try:
-        result = await export_service.export_to_xero(
-            start_date=request.start_date,
-            end_date=request.end_date,
-            export_type=request.export_type,
-            include_tax_mapping=request.include_tax_mapping,
-            reviewed_only=request.reviewed_only
-        )
+        if request.run_in_background:
+            result = export_service.queue_export()
+            background_tasks.add_task(run_queued_export, result['file_id'], 'xero', params)
+            return result
+        
+        result = await export_service.export_to_xero(**params)
         return result
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -60,15 +72,35 @@ async def download_export_file(file_id: str, db: Session = Depends(get_db)):
     export_service = ExportService(db)
     file_info = export_service.get_export_file_info(file_id)
     
+    if file_info and file_info['status'] != 'completed':
+        raise HTTPException(status_code=409, detail=f"Export is {file_info['status']}")
     if not file_info or not os.path.exists(file_info['file_path']):
         raise HTTPException(status_code=404, detail="Export file not found")
     
     return FileResponse(
         path=file_info['file_path'],
         filename=file_info['filename'],
-        media_type='application/octet-stream'
+        media_type='application/gzip' if file_info['filename'].endswith('.gz') else 'application/octet-stream'
     )
 
+@router.get("/status/{file_id}")
+def get_export_status(file_id: str, db: Session = Depends(get_db)):
+    """Poll the status of a queued export"""
+    export_service = ExportService(db)
+    file_info = export_service.get_export_file_info(file_id)
+    
+    if not file_info:
+        raise HTTPException(status_code=404, detail="Export not found")
+    
+    return {
+        "file_id": file_id,
+        "status": file_info['status'],
+        "filename": file_info['filename'],
+        "record_count": file_info['record_count'],
+        "error": file_info['error'],
+        "download_url": f"/api/v1/export/download/{file_id}" if file_info['status'] == 'completed' else None
+    }
+
 @router.get("/formats")
 def get_supported_formats():
     """Get supported export formats and their specifications"""
@@ -92,18 +124,25 @@ def get_supported_formats():
 @router.post("/csv-generic", response_model=ExportResponse)
 async def export_to_csv(
     request: ExportRequest,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
     """Export to generic CSV format"""
     export_service = ExportService(db)
+    params = {
+        'start_date': request.start_date,
+        'end_date': request.end_date,
+        'export_type': request.export_type,
+        'columns': request.columns,
+        'filters': request.filters
+    }
     try:
-        result = await export_service.export_to_csv(
-            start_date=request.start_date,
-            end_date=request.end_date,
-            export_type=request.export_type,
-            columns=request.columns,
-            filters=request.filters
-        )
+        if request.run_in_background:
+            result = export_service.queue_export()
+            background_tasks.add_task(run_queued_export, result['file_id'], 'csv', params)
+            return result
+        
+        result = await export_service.export_to_csv(**params)
         return result
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -21,7 +21,7 @@ async def upload_transactions(
 ):
     """Upload and process transaction file (CSV/Excel)"""
     transaction_service = TransactionService(db)
-    cleaning_service = DataCleaningService()
+    cleaning_service = DataCleaningService(db)
     
     try:
         # Process uploaded file
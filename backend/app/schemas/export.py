@@ -8,6 +8,7 @@ class ExportRequest(BaseModel):
     export_type: str = Field(..., regex="^(transactions|trial_balance|general_ledger)$")
     columns: Optional[List[str]] = None
     filters: Optional[Dict[str, Any]] = None
+    run_in_background: bool = False
 
 class QuickBooksExportRequest(BaseModel):
     start_date: Optional[date] = None
@@ -15,6 +16,7 @@ class QuickBooksExportRequest(BaseModel):
     export_type: str = Field(..., regex="^(journal_entry|expense|bill|invoice)$")
     include_categories: bool = True
     reviewed_only: bool = False
+    run_in_background: bool = False
 
 class XeroExportRequest(BaseModel):
     start_date: Optional[date] = None
@@ -22,6 +24,7 @@ class XeroExportRequest(BaseModel):
     export_type: str = Field(..., regex="^(journal_entry|invoice|bill|bank_transaction)$")
     include_tax_mapping: bool = True
     reviewed_only: bool = False
+    run_in_background: bool = False
 
 class ExportResponse(BaseModel):
     success: bool
@@ -31,6 +34,8 @@ class ExportResponse(BaseModel):
     record_count: int
     file_size: Optional[int] = None
     download_url: str
+    status: str = "completed"  # queued, completed, failed
+    status_url: Optional[str] = None
     expires_at: datetime
 
 class ExportHistoryItem(BaseModel):
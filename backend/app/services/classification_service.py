@@ -1,9 +1,10 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
-from typing import List, Optional, Dict, Any
+from sqlalchemy import func, and_, or_, update
+from typing import List, Optional, Dict, Any, Tuple, AsyncIterator
 import re
 import json
 from datetime import datetime
+from functools import lru_cache
 
 from app.models.transactions import TransactionClean
 from app.models.classification import ClassificationRule
@@ -12,6 +13,120 @@ from app.services.ai_service import AIService
 from app.services.ai import AIService as NewAIService
 from app.services.embeddings import EmbeddingService
 from app.core.config import settings
+from app.core.database import dialect_insert
+
+try:
+    import ahocorasick
+except ImportError:  # pragma: no cover - optional accelerator
+    ahocorasick = None
+
+_REGEX_METACHARS = frozenset('.^$*+?{}[]\\|()')
+
+@lru_cache(maxsize=1024)
+def _compile_rule_regex(keyword_regex: str) -> re.Pattern:
+    """Compile a rule pattern once per process; raises re.error for invalid patterns"""
+    return re.compile(keyword_regex, re.IGNORECASE)
+
+def _extract_literals(keyword_regex: str) -> Optional[Tuple[str, ...]]:
+    """Return the literals of a pure ``(LIT|LIT|...)`` alternation, else None"""
+    body = keyword_regex
+    if body.startswith('(') and body.endswith(')'):
+        body = body[1:-1]
+    alternatives = body.split('|')
+    if not all(alt and not _REGEX_METACHARS.intersection(alt) for alt in alternatives):
+        return None
+    return tuple(alt.upper() for alt in alternatives)
+
+class _RuleMatcher:
+    """Find the first rule, in priority order, whose pattern matches a text.
+
+    Rules that are plain literal alternations are matched together in a single
+    Aho-Corasick pass over the text; all other rules use compiled regexes.
+    Texts must be upper-cased by the caller.
+    """
+
+    def __init__(self, patterns: Tuple[str, ...]):
+        self.automaton = None
+        self.regex_rules = []  # (rule index, compiled pattern), ascending index
+        
+        literal_rules = []
+        for index, pattern in enumerate(patterns):
+            literals = _extract_literals(pattern) if ahocorasick is not None else None
+            if literals:
+                literal_rules.append((index, literals))
+                continue
+            try:
+                self.regex_rules.append((index, _compile_rule_regex(pattern)))
+            except re.error:
+                # Skip invalid regex patterns
+                continue
+        
+        if literal_rules:
+            automaton = ahocorasick.Automaton()
+            for index, literals in literal_rules:
+                for literal in literals:
+                    # A literal shared by several rules resolves to the highest-priority one
+                    automaton.add_word(literal, min(index, automaton.get(literal, index)))
+            automaton.make_automaton()
+            self.automaton = automaton
+
+    def match(self, text: str) -> Optional[int]:
+        """Return the index of the first matching rule, or None"""
+        best = None
+        if self.automaton is not None:
+            for _, index in self.automaton.iter(text):
+                if best is None or index < best:
+                    best = index
+        
+        for index, regex in self.regex_rules:
+            if best is not None and index > best:
+                break
+            if regex.search(text):
+                return index
+        
+        return best
+
+@lru_cache(maxsize=32)
+def _get_rule_matcher(patterns: Tuple[str, ...]) -> _RuleMatcher:
+    """Build (once per distinct rule set) the matcher for priority-ordered patterns"""
+    return _RuleMatcher(patterns)
+
+# Default classification rules, built once at import with their patterns precompiled
+_DEFAULT_RULES = tuple(
+    dict(rule_data, regex=_compile_rule_regex(rule_data['keyword_regex']))
+    for rule_data in (
+        {
+            'rule_name': 'Office Supplies',
+            'keyword_regex': r'(STAPLES|OFFICE DEPOT|AMAZON.*OFFICE|SUPPLIES)',
+            'suggested_coa_name': 'Office Expenses',
+            'confidence': 0.95
+        },
+        {
+            'rule_name': 'Gas & Fuel',
+            'keyword_regex': r'(SHELL|EXXON|CHEVRON|BP|MOBIL|FUEL|GAS STATION)',
+            'suggested_coa_name': 'Vehicle Expenses',
+            'confidence': 0.9
+        },
+        {
+            'rule_name': 'Meals & Entertainment',
+            'keyword_regex': r'(RESTAURANT|STARBUCKS|MCDONALD|BURGER|PIZZA|COFFEE)',
+            'suggested_coa_name': 'Meals & Entertainment',
+            'confidence': 0.85
+        },
+        {
+            'rule_name': 'Software & Subscriptions',
+            'keyword_regex': r'(MICROSOFT|ADOBE|GOOGLE|SAAS|SOFTWARE|SUBSCRIPTION)',
+            'suggested_coa_name': 'Software Expenses',
+            'confidence': 0.9
+        },
+        {
+            'rule_name': 'Travel',
+            'keyword_regex': r'(AIRLINE|HOTEL|UBER|LYFT|RENTAL CAR|AIRBNB)',
+            'suggested_coa_name': 'Travel Expenses',
+            'confidence': 0.9
+        }
+    )
+)
 
 class ClassificationService:
     def __init__(self, db: Session):
@@ -29,39 +144,8 @@ class ClassificationService:
             'SHELL': {'coa_code': '5100', 'confidence': 0.94}
         }
         
-        # Default classification rules
-        self.default_rules = [
-            {
-                'rule_name': 'Office Supplies',
-                'keyword_regex': r'(STAPLES|OFFICE DEPOT|AMAZON.*OFFICE|SUPPLIES)',
-                'suggested_coa_name': 'Office Expenses',
-                'confidence': 0.95
-            },
-            {
-                'rule_name': 'Gas & Fuel',
-                'keyword_regex': r'(SHELL|EXXON|CHEVRON|BP|MOBIL|FUEL|GAS STATION)',
-                'suggested_coa_name': 'Vehicle Expenses',
-                'confidence': 0.9
-            },
-            {
-                'rule_name': 'Meals & Entertainment',
-                'keyword_regex': r'(RESTAURANT|STARBUCKS|MCDONALD|BURGER|PIZZA|COFFEE)',
-                'suggested_coa_name': 'Meals & Entertainment',
-                'confidence': 0.85
-            },
-            {
-                'rule_name': 'Software & Subscriptions',
-                'keyword_regex': r'(MICROSOFT|ADOBE|GOOGLE|SAAS|SOFTWARE|SUBSCRIPTION)',
-                'suggested_coa_name': 'Software Expenses',
-                'confidence': 0.9
-            },
-            {
-                'rule_name': 'Travel',
-                'keyword_regex': r'(AIRLINE|HOTEL|UBER|LYFT|RENTAL CAR|AIRBNB)',
-                'suggested_coa_name': 'Travel Expenses',
-                'confidence': 0.9
-            }
-        ]
+        # Default classification rules (shared, precompiled at import)
+        self.default_rules = _DEFAULT_RULES
 
     async def classify_transactions_pipeline(
         self, 
@@ -135,71 +219,111 @@ class ClassificationService:
         """Classify transactions using rules + AI hybrid approach"""
         results = []
         
-        for txn_id in transaction_ids:
-            transaction = self.db.query(TransactionClean).filter(
-                TransactionClean.id == txn_id
-            ).first()
-            
-            if not transaction:
-                continue
-            
-            # Skip if already classified and not forcing reclassification
-            if transaction.coa_id and not force_reclassify:
-                results.append({
-                    'transaction_id': txn_id,
-                    'predicted_coa_id': transaction.coa_id,
-                    'predicted_coa_name': self._get_coa_name(transaction.coa_id),
-                    'confidence_score': transaction.confidence_score or 1.0,
-                    'classification_method': 'existing'
-                })
-                continue
+        async for chunk_results in self.iter_classify_transactions(transaction_ids, force_reclassify):
+            results.extend(chunk_results)
+        
+        return results
+
+    async def iter_classify_transactions(
+        self, 
+        transaction_ids: List[int], 
+        force_reclassify: bool = False,
+        chunk_size: Optional[int] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Classify transactions chunk by chunk, yielding each chunk's results.
+        
+        Transactions are loaded and their updates written once per chunk, so
+        memory stays bounded by the chunk size rather than the whole batch.
+        """
+        chunk_size = chunk_size or settings.CLASSIFICATION_BATCH_SIZE
+        
+        for start in range(0, len(transaction_ids), chunk_size):
+            chunk_ids = transaction_ids[start:start + chunk_size]
+            transactions = {
+                transaction.id: transaction
+                for transaction in self.db.query(TransactionClean).filter(
+                    TransactionClean.id.in_(chunk_ids)
+                )
+            }
             
-            # Try rule-based classification first
-            rule_result = self._classify_with_rules(transaction)
+            chunk_results = []
+            updates = []
             
-            if rule_result and rule_result['confidence'] >= settings.CLASSIFICATION_CONFIDENCE_THRESHOLD:
-                # High confidence rule match
-                result = rule_result
-                result['classification_method'] = 'rule'
-                result['source'] = 'rule'
-            else:
-                # Use AI classification
-                ai_result = await self._classify_with_ai(transaction)
+            for txn_id in chunk_ids:
+                transaction = transactions.get(txn_id)
                 
-                if ai_result:
-                    # Combine rule and AI results if both exist
-                    if rule_result:
-                        # Use weighted average of confidences
-                        combined_confidence = (rule_result['confidence'] * 0.3 + ai_result['confidence'] * 0.7)
-                        result = ai_result.copy()
-                        result['confidence'] = combined_confidence
-                        result['classification_method'] = 'hybrid'
-                        result['source'] = 'hybrid'
-                    else:
-                        result = ai_result
-                        result['classification_method'] = 'ai'
-                        result['source'] = 'ai'
-                else:
-                    # Fallback to rule result or default
-                    result = rule_result or {
-                        'predicted_coa_id': None,
-                        'predicted_coa_name': 'Uncategorized',
-                        'confidence': 0.0,
-                        'classification_method': 'fallback',
-                        'source': 'fallback'
-                    }
+                if not transaction:
+                    continue
+                
+                # Skip if already classified and not forcing reclassification
+                if transaction.coa_id and not force_reclassify:
+                    chunk_results.append({
+                        'transaction_id': txn_id,
+                        'predicted_coa_id': transaction.coa_id,
+                        'predicted_coa_name': self._get_coa_name(transaction.coa_id),
+                        'confidence_score': transaction.confidence_score or 1.0,
+                        'classification_method': 'existing'
+                    })
+                    continue
+                
+                result = await self._classify_hybrid(transaction)
+                
+                # Queue the classification update for this chunk
+                if result['predicted_coa_id']:
+                    updates.append({
+                        'id': txn_id,
+                        'coa_id': result['predicted_coa_id'],
+                        'confidence_score': result['confidence'],
+                        'category_predicted': result['predicted_coa_name']
+                    })
+                
+                result['transaction_id'] = txn_id
+                chunk_results.append(result)
             
-            # Update transaction with classification
-            if result['predicted_coa_id']:
-                transaction.coa_id = result['predicted_coa_id']
-                transaction.confidence_score = result['confidence']
-                transaction.category_predicted = result['predicted_coa_name']
+            if updates:
+                self.db.bulk_update_mappings(TransactionClean, updates)
                 self.db.commit()
             
-            result['transaction_id'] = txn_id
-            results.append(result)
+            yield chunk_results
+
+    async def _classify_hybrid(self, transaction: TransactionClean) -> Dict[str, Any]:
+        """Classify a single transaction with rules first, then AI"""
+        # Try rule-based classification first
+        rule_result = self._classify_with_rules(transaction)
+        
+        if rule_result and rule_result['confidence'] >= settings.CLASSIFICATION_CONFIDENCE_THRESHOLD:
+            # High confidence rule match
+            result = rule_result
+            result['classification_method'] = 'rule'
+            result['source'] = 'rule'
+        else:
+            # Use AI classification
+            ai_result = await self._classify_with_ai(transaction)
+            
+            if ai_result:
+                # Combine rule and AI results if both exist
+                if rule_result:
+                    # Use weighted average of confidences
+                    combined_confidence = (rule_result['confidence'] * 0.3 + ai_result['confidence'] * 0.7)
+                    result = ai_result.copy()
+                    result['confidence'] = combined_confidence
+                    result['classification_method'] = 'hybrid'
+                    result['source'] = 'hybrid'
+                else:
+                    result = ai_result
+                    result['classification_method'] = 'ai'
+                    result['source'] = 'ai'
+            else:
+                # Fallback to rule result or default
+                result = rule_result or {
+                    'predicted_coa_id': None,
+                    'predicted_coa_name': 'Uncategorized',
+                    'confidence': 0.0,
+                    'classification_method': 'fallback',
+                    'source': 'fallback'
+                }
         
-        return results
+        return result
 
     async def _classify_with_pipeline(self, transaction: TransactionClean) -> Optional[Dict[str, Any]]:
         """Run full classification pipeline: rule → embedding → ML → LLM"""
@@ -446,26 +570,25 @@ class ClassificationService:
         counterparty = transaction.counterparty_normalized or ""
         search_text = f"{description} {counterparty}".upper()
         
-        for rule in rules:
-            try:
-                if re.search(rule.keyword_regex, search_text, re.IGNORECASE):
-                    # Update rule statistics
-                    rule.match_count += 1
-                    self.db.commit()
-                    
-                    return {
-                        'predicted_coa_id': rule.suggested_coa_id,
-                        'predicted_coa_name': self._get_coa_name(rule.suggested_coa_id),
-                        'confidence_score': rule.confidence,
-                        'classification_method': 'rule',
-                        'source': 'regex_rule',
-                        'rule_id': rule.id
-                    }
-            except re.error:
-                # Skip invalid regex patterns
-                continue
+        matcher = _get_rule_matcher(tuple(rule.keyword_regex for rule in rules))
+        index = matcher.match(search_text)
+        if index is None:
+            return None
         
-        return None
+        rule = rules[index]
+        
+        # Update rule statistics
+        rule.match_count += 1
+        self.db.commit()
+        
+        return {
+            'predicted_coa_id': rule.suggested_coa_id,
+            'predicted_coa_name': self._get_coa_name(rule.suggested_coa_id),
+            'confidence_score': rule.confidence,
+            'classification_method': 'rule',
+            'source': 'regex_rule',
+            'rule_id': rule.id
+        }
 
     async def _classify_with_ai(self, transaction: TransactionClean) -> Optional[Dict[str, Any]]:
         """Classify transaction using AI"""
@@ -662,30 +785,35 @@ class ClassificationService:
         ]
         
         from app.models.accounts import Account
-        
-        for acc_data in basic_accounts:
-            # Check if account exists
-            existing_coa = self.db.query(ChartOfAccounts).filter(
-                ChartOfAccounts.code == acc_data['code']
-            ).first()
-            
-            if not existing_coa:
-                # Create account first
-                account = Account(
-                    name=acc_data['name'],
-                    account_type=acc_data['account_type']
-                )
-                self.db.add(account)
-                self.db.flush()
-                
-                # Create COA entry
-                coa = ChartOfAccounts(
-                    code=acc_data['code'],
-                    name=acc_data['name'],
-                    account_id=account.id
+
+        # Single INSERT ... ON CONFLICT DO NOTHING; concurrent workers racing
+        # on the unique code simply skip rows another worker already created
+        stmt = dialect_insert(self.db, ChartOfAccounts).values([
+            {'code': acc_data['code'], 'name': acc_data['name']}
+            for acc_data in basic_accounts
+        ]).on_conflict_do_nothing(
+            index_elements=['code']
+        ).returning(ChartOfAccounts.id, ChartOfAccounts.code)
+        inserted = self.db.execute(stmt).all()
+
+        if inserted:
+            # Only the COA rows we actually created need a backing account
+            accounts_by_code = {acc_data['code']: acc_data for acc_data in basic_accounts}
+            accounts = [
+                Account(
+                    name=accounts_by_code[code]['name'],
+                    account_type=accounts_by_code[code]['account_type']
                 )
-                self.db.add(coa)
-        
+                for _, code in inserted
+            ]
+            self.db.add_all(accounts)
+            self.db.flush()
+
+            self.db.execute(update(ChartOfAccounts), [
+                {'id': coa_id, 'account_id': account.id}
+                for (coa_id, _), account in zip(inserted, accounts)
+            ])
+
         self.db.commit()
 
     def _get_coa_name(self, coa_id: int) -> str:
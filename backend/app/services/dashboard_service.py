@@ -1,16 +1,56 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_, desc
-from typing import List, Optional, Dict, Any
+from sqlalchemy import func, and_, or_, desc, case, cast, select, Integer
+from typing import List, Optional, Dict, Any, Tuple
+from collections import namedtuple
 from datetime import datetime, date, timedelta
-import pandas as pd
+import numpy as np
 
 from app.models.transactions import TransactionClean
 from app.models.accounts import ChartOfAccounts, Account
 from app.models.reconciliation import Reconciliation
 
+try:
+    from numba import njit
+except ImportError:  # pragma: no cover - optional accelerator
+    njit = None
+
+# Income/expense/count aggregates for one period
+PeriodTotals = namedtuple('PeriodTotals', ['total_income', 'total_expenses', 'transaction_count', 'classified_count'])
+
+# Severity codes produced by the anomaly scoring kernel
+SEVERITY_NONE, SEVERITY_LOW, SEVERITY_MEDIUM, SEVERITY_HIGH = 0, 1, 2, 3
+
+def _score_anomalies_numpy(abs_amounts: np.ndarray, day_numbers: np.ndarray, upper_bound: float):
+    """Amount severity codes and weekend flags for every transaction"""
+    severity = np.where(
+        abs_amounts > upper_bound * 2, SEVERITY_HIGH,
+        np.where(abs_amounts > upper_bound, SEVERITY_MEDIUM, SEVERITY_NONE)
+    ).astype(np.int8)
+    # Day 0 of the epoch was a Thursday, so (days + 3) % 7 is the weekday (Monday = 0)
+    weekend = (day_numbers + 3) % 7 >= 5
+    return severity, weekend
+
+if njit is not None:
+    @njit(cache=True)
+    def _score_anomalies(abs_amounts, day_numbers, upper_bound):
+        """Single-pass native version of _score_anomalies_numpy"""
+        n = abs_amounts.shape[0]
+        severity = np.zeros(n, np.int8)
+        weekend = np.zeros(n, np.bool_)
+        for i in range(n):
+            if abs_amounts[i] > upper_bound * 2:
+                severity[i] = SEVERITY_HIGH
+            elif abs_amounts[i] > upper_bound:
+                severity[i] = SEVERITY_MEDIUM
+            weekend[i] = (day_numbers[i] + 3) % 7 >= 5
+        return severity, weekend
+else:
+    _score_anomalies = _score_anomalies_numpy
+
 class DashboardService:
     def __init__(self, db: Session):
         self.db = db
+        self._period_totals = {}  # (start, end) -> aggregate row, reused within a request
 
     def get_dashboard_summary(
         self,
@@ -19,22 +59,23 @@ class DashboardService:
     ) -> Dict[str, Any]:
         """Get dashboard summary with key metrics"""
         
+        today = date.today()
         if not start_date:
-            start_date = date.today().replace(day=1)  # Start of current month
+            start_date = today.replace(day=1)  # Start of current month
         if not end_date:
-            end_date = date.today()
+            end_date = today
         
-        # Get transactions in period
-        query = self.db.query(TransactionClean).filter(
-            and_(
-                TransactionClean.transaction_date >= start_date,
-                TransactionClean.transaction_date <= end_date
-            )
+        date_range = and_(
+            TransactionClean.transaction_date >= start_date,
+            TransactionClean.transaction_date <= end_date
         )
         
-        transactions = query.all()
+        # Aggregate the period server-side instead of hydrating every row
+        totals = self._get_period_totals(start_date, end_date)
         
-        if not transactions:
+        transaction_count = totals.transaction_count
+        
+        if not transaction_count:
             return {
                 'period_start': start_date,
                 'period_end': end_date,
@@ -50,28 +91,44 @@ class DashboardService:
             }
         
         # Calculate totals
-        total_income = sum(txn.amount_base for txn in transactions if txn.amount_base > 0)
-        total_expenses = sum(abs(txn.amount_base) for txn in transactions if txn.amount_base < 0)
+        total_income = totals.total_income or 0
+        total_expenses = totals.total_expenses or 0
         net_income = total_income - total_expenses
         
         # Classification metrics
-        classified_count = sum(1 for txn in transactions if txn.coa_id is not None)
-        classified_percentage = (classified_count / len(transactions)) * 100 if transactions else 0
+        classified_percentage = (totals.classified_count / transaction_count) * 100
         
-        # Reconciliation metrics
-        reconciled_count = self.db.query(func.count(Reconciliation.id)).filter(
+        # Reconciliation metrics and recent activity (last 7 days), fetched in one round trip
+        recent_date = today - timedelta(days=7)
+        reconciled_count_query = select(func.count(Reconciliation.id)).join(
+            TransactionClean, Reconciliation.transaction_clean_id == TransactionClean.id
+        ).where(
             and_(
                 Reconciliation.status == 'approved',
-                Reconciliation.transaction_clean_id.in_([txn.id for txn in transactions])
+                date_range
             )
-        ).scalar()
-        reconciled_percentage = (reconciled_count / len(transactions)) * 100 if transactions else 0
+        ).scalar_subquery()
+        recent_activity_query = select(func.count(TransactionClean.id)).where(
+            TransactionClean.transaction_date >= recent_date
+        ).scalar_subquery()
+        reconciled_count, recent_activity_count = self.db.query(
+            reconciled_count_query, recent_activity_query
+        ).one()
+        reconciled_percentage = (reconciled_count / transaction_count) * 100
         
         # Top expense category
         top_expense_category = self._get_top_expense_category(start_date, end_date)
         
         # Largest transaction
-        largest_transaction = max(transactions, key=lambda x: abs(x.amount_base)) if transactions else None
+        largest_transaction = self.db.query(
+            TransactionClean.id,
+            TransactionClean.amount_base,
+            TransactionClean.transaction_date,
+            TransactionClean.description_normalized,
+            TransactionClean.counterparty_normalized
+        ).filter(date_range).order_by(
+            func.abs(TransactionClean.amount_base).desc()
+        ).limit(1).first()
         largest_txn_info = None
         if largest_transaction:
             largest_txn_info = {
@@ -82,19 +139,13 @@ class DashboardService:
                 'counterparty': largest_transaction.counterparty_normalized
             }
         
-        # Recent activity (last 7 days)
-        recent_date = date.today() - timedelta(days=7)
-        recent_activity_count = self.db.query(func.count(TransactionClean.id)).filter(
-            TransactionClean.transaction_date >= recent_date
-        ).scalar()
-        
         return {
             'period_start': start_date,
             'period_end': end_date,
             'total_income': total_income,
             'total_expenses': total_expenses,
             'net_income': net_income,
-            'transaction_count': len(transactions),
+            'transaction_count': transaction_count,
             'classified_percentage': classified_percentage,
             'reconciled_percentage': reconciled_percentage,
             'top_expense_category': top_expense_category,
@@ -110,12 +161,23 @@ class DashboardService:
     ) -> List[Dict[str, Any]]:
         """Get top expense categories"""
         
-        query = self.db.query(
+        expense_amount = func.abs(TransactionClean.amount_base)
+        columns = [
             ChartOfAccounts.name,
             ChartOfAccounts.code,
-            func.sum(func.abs(TransactionClean.amount_base)).label('total_amount'),
+            func.sum(expense_amount).label('total_amount'),
             func.count(TransactionClean.id).label('transaction_count')
-        ).join(
+        ]
+        
+        # Split the period in half so the trend comes out of the same grouped query
+        if start_date and end_date:
+            mid_date = start_date + timedelta(days=(end_date - start_date).days // 2)
+            columns += [
+                func.sum(case((TransactionClean.transaction_date < mid_date, expense_amount), else_=0)).label('first_half'),
+                func.sum(case((TransactionClean.transaction_date >= mid_date, expense_amount), else_=0)).label('second_half')
+            ]
+        
+        query = self.db.query(*columns).join(
             TransactionClean, TransactionClean.coa_id == ChartOfAccounts.id
         ).filter(
             TransactionClean.amount_base < 0  # Only expenses
@@ -139,13 +201,18 @@ class DashboardService:
         for result in results:
             percentage = (result.total_amount / total_expenses * 100) if total_expenses > 0 else 0
             
+            if start_date and end_date:
+                trend = self._calculate_category_trend(result.first_half, result.second_half)
+            else:
+                trend = 'stable'
+            
             categories.append({
                 'category_name': result.name,
                 'category_code': result.code,
                 'total_amount': result.total_amount,
                 'transaction_count': result.transaction_count,
                 'percentage_of_total': percentage,
-                'trend': self._calculate_category_trend(result.name, start_date, end_date)
+                'trend': trend
             })
         
         return categories
@@ -158,66 +225,44 @@ class DashboardService:
     ) -> List[Dict[str, Any]]:
         """Get revenue analysis over time"""
         
+        today = date.today()
         if not start_date:
-            start_date = date.today() - timedelta(days=365)  # Last year
+            start_date = today - timedelta(days=365)  # Last year
         if not end_date:
-            end_date = date.today()
+            end_date = today
+        
+        if group_by not in ("day", "week", "month", "quarter"):
+            raise ValueError(f"Unsupported group_by value: {group_by}")
         
-        # Get revenue transactions
-        query = self.db.query(TransactionClean).filter(
+        period = self._period_start_expr(group_by)
+        revenue = func.sum(TransactionClean.amount_base)
+        
+        # Aggregate revenue per period in SQL; lag() supplies the previous period
+        rows = self.db.query(
+            period.label('period'),
+            revenue.label('revenue'),
+            func.count(TransactionClean.id).label('transaction_count'),
+            func.lag(revenue).over(order_by=period).label('previous_revenue')
+        ).filter(
             and_(
                 TransactionClean.amount_base > 0,
                 TransactionClean.transaction_date >= start_date,
                 TransactionClean.transaction_date <= end_date
             )
-        )
-        
-        transactions = query.all()
-        
-        if not transactions:
-            return []
-        
-        # Convert to DataFrame for easier analysis
-        df = pd.DataFrame([{
-            'date': txn.transaction_date,
-            'amount': txn.amount_base
-        } for txn in transactions])
-        
-        # Group by specified period
-        if group_by == "day":
-            df['period'] = df['date'].dt.date
-            period_format = lambda x: x.strftime('%Y-%m-%d')
-        elif group_by == "week":
-            df['period'] = df['date'].dt.to_period('W')
-            period_format = lambda x: f"Week of {x.start_time.strftime('%Y-%m-%d')}"
-        elif group_by == "month":
-            df['period'] = df['date'].dt.to_period('M')
-            period_format = lambda x: x.strftime('%Y-%m')
-        elif group_by == "quarter":
-            df['period'] = df['date'].dt.to_period('Q')
-            period_format = lambda x: f"Q{x.quarter} {x.year}"
-        else:
-            raise ValueError(f"Unsupported group_by value: {group_by}")
-        
-        # Aggregate by period
-        period_revenue = df.groupby('period').agg({
-            'amount': ['sum', 'count']
-        }).reset_index()
-        
-        period_revenue.columns = ['period', 'revenue', 'transaction_count']
-        period_revenue = period_revenue.sort_values('period')
-        
-        # Calculate growth rates
-        period_revenue['growth_rate'] = period_revenue['revenue'].pct_change() * 100
+        ).group_by(period).order_by(period).all()
         
         # Convert to response format
         analysis = []
-        for _, row in period_revenue.iterrows():
+        for row in rows:
+            growth_rate = None
+            if row.previous_revenue:
+                growth_rate = (row.revenue / row.previous_revenue - 1) * 100
+            
             analysis.append({
-                'period': period_format(row['period']),
-                'revenue': row['revenue'],
-                'growth_rate': row['growth_rate'] if not pd.isna(row['growth_rate']) else None,
-                'transaction_count': int(row['transaction_count'])
+                'period': self._format_period(row.period, group_by),
+                'revenue': row.revenue,
+                'growth_rate': growth_rate,
+                'transaction_count': row.transaction_count
             })
         
         return analysis
@@ -230,65 +275,37 @@ class DashboardService:
     ) -> List[Dict[str, Any]]:
         """Get cash flow analysis"""
         
+        today = date.today()
         if not start_date:
-            start_date = date.today() - timedelta(days=365)
+            start_date = today - timedelta(days=365)
         if not end_date:
-            end_date = date.today()
+            end_date = today
+        
+        if group_by not in ("week", "month", "quarter"):
+            group_by = "day"
+        
+        period = self._period_start_expr(group_by)
         
-        # Get all transactions
-        query = self.db.query(TransactionClean).filter(
+        # Separate cash in and cash out while aggregating per period
+        rows = self.db.query(
+            period.label('period'),
+            func.sum(case((TransactionClean.amount_base > 0, TransactionClean.amount_base), else_=0)).label('cash_in'),
+            func.sum(case((TransactionClean.amount_base < 0, -TransactionClean.amount_base), else_=0)).label('cash_out')
+        ).filter(
             and_(
                 TransactionClean.transaction_date >= start_date,
                 TransactionClean.transaction_date <= end_date
             )
-        )
-        
-        transactions = query.all()
-        
-        if not transactions:
-            return []
-        
-        # Convert to DataFrame
-        df = pd.DataFrame([{
-            'date': txn.transaction_date,
-            'amount': txn.amount_base
-        } for txn in transactions])
-        
-        # Group by period
-        if group_by == "month":
-            df['period'] = df['date'].dt.to_period('M')
-            period_format = lambda x: x.strftime('%Y-%m')
-        elif group_by == "quarter":
-            df['period'] = df['date'].dt.to_period('Q')  
-            period_format = lambda x: f"Q{x.quarter} {x.year}"
-        elif group_by == "week":
-            df['period'] = df['date'].dt.to_period('W')
-            period_format = lambda x: f"Week of {x.start_time.strftime('%Y-%m-%d')}"
-        else:
-            df['period'] = df['date'].dt.date
-            period_format = lambda x: x.strftime('%Y-%m-%d')
-        
-        # Separate cash in and cash out
-        df['cash_in'] = df['amount'].where(df['amount'] > 0, 0)
-        df['cash_out'] = df['amount'].where(df['amount'] < 0, 0).abs()
-        
-        # Aggregate by period
-        period_cash_flow = df.groupby('period').agg({
-            'cash_in': 'sum',
-            'cash_out': 'sum'
-        }).reset_index()
-        
-        period_cash_flow['net_cash_flow'] = period_cash_flow['cash_in'] - period_cash_flow['cash_out']
-        period_cash_flow = period_cash_flow.sort_values('period')
+        ).group_by(period).order_by(period).all()
         
         # Convert to response format
         cash_flow = []
-        for _, row in period_cash_flow.iterrows():
+        for row in rows:
             cash_flow.append({
-                'period': period_format(row['period']),
-                'cash_in': row['cash_in'],
-                'cash_out': row['cash_out'],
-                'net_cash_flow': row['net_cash_flow']
+                'period': self._format_period(row.period, group_by),
+                'cash_in': row.cash_in,
+                'cash_out': row.cash_out,
+                'net_cash_flow': row.cash_in - row.cash_out
             })
         
         return cash_flow
@@ -301,98 +318,132 @@ class DashboardService:
     ) -> List[Dict[str, Any]]:
         """Get anomalous transactions"""
         
+        today = date.today()
         if not start_date:
-            start_date = date.today() - timedelta(days=30)
+            start_date = today - timedelta(days=30)
         if not end_date:
-            end_date = date.today()
+            end_date = today
         
         anomalies = []
-        
-        # Get transactions in period
-        query = self.db.query(TransactionClean).filter(
+        # Sort keys kept in step with anomalies, ranked with np.lexsort at the end
+        severity_codes = []
+        sort_amounts = []
+        
+        # Fetch only the columns anomaly detection needs; descriptions (TEXT)
+        # are loaded afterwards for the anomalies actually returned
+        rows = self.db.query(
+            TransactionClean.id,
+            TransactionClean.amount_base,
+            TransactionClean.transaction_date,
+            TransactionClean.counterparty_normalized
+        ).filter(
             and_(
                 TransactionClean.transaction_date >= start_date,
                 TransactionClean.transaction_date <= end_date
             )
-        )
-        
-        transactions = query.all()
-        amounts = [abs(txn.amount_base) for txn in transactions]
+        ).all()
         
-        if not amounts:
+        if not rows:
             return []
         
-        # Calculate statistics for amount-based anomalies
-        import numpy as np
-        q75, q25 = np.percentile(amounts, [75, 25])
+        # Column arrays (SoA) for the vectorized checks
+        abs_amounts = np.abs(np.fromiter((row.amount_base for row in rows), dtype=np.float64, count=len(rows)))
+        day_numbers = np.array([row.transaction_date for row in rows], dtype='datetime64[D]').astype(np.int64)
+        
+        # Calculate statistics for amount-based anomalies (quantile selects via partition, no full sort)
+        q25, q75 = np.quantile(abs_amounts, [0.25, 0.75])
         iqr = q75 - q25
         upper_bound = q75 + 1.5 * iqr
         lower_bound = q25 - 1.5 * iqr
         
         requested_types = anomaly_types.split(',') if anomaly_types else ['amount', 'frequency', 'new_vendor']
         
-        for txn in transactions:
-            txn_amount = abs(txn.amount_base)
-            
-            # Amount-based anomalies
-            if 'amount' in requested_types:
-                if txn_amount > upper_bound:
-                    severity = 'high' if txn_amount > upper_bound * 2 else 'medium'
-                    anomalies.append({
-                        'transaction_id': txn.id,
-                        'anomaly_type': 'amount',
-                        'description': txn.description_normalized or '',
-                        'amount': txn.amount_base,
-                        'date': txn.transaction_date.date(),
-                        'severity': severity,
-                        'reason': f'Amount ${txn_amount:,.2f} is unusually high (above ${upper_bound:,.2f})'
-                    })
+        amount_severity, is_weekend = _score_anomalies(abs_amounts, day_numbers, float(upper_bound))
+        
+        # Amount-based anomalies
+        if 'amount' in requested_types:
+            for i in np.flatnonzero(amount_severity):
+                row = rows[i]
+                txn_amount = abs_amounts[i]
+                severity = 'high' if amount_severity[i] == SEVERITY_HIGH else 'medium'
+                anomalies.append({
+                    'transaction_id': row.id,
+                    'anomaly_type': 'amount',
+                    'description': '',
+                    'amount': row.amount_base,
+                    'date': row.transaction_date.date(),
+                    'severity': severity,
+                    'reason': f'Amount ${txn_amount:,.2f} is unusually high (above ${upper_bound:,.2f})'
+                })
+                severity_codes.append(amount_severity[i])
+                sort_amounts.append(txn_amount)
+        
+        # New vendor anomalies
+        if 'new_vendor' in requested_types:
+            # Earliest transaction per vendor, fetched once for every vendor in the period
+            counterparties = {row.counterparty_normalized for row in rows if row.counterparty_normalized}
+            first_seen = dict(self.db.query(
+                TransactionClean.counterparty_normalized,
+                func.min(TransactionClean.transaction_date)
+            ).filter(
+                TransactionClean.counterparty_normalized.in_(counterparties)
+            ).group_by(
+                TransactionClean.counterparty_normalized
+            ).all()) if counterparties else {}
             
-            # New vendor anomalies
-            if 'new_vendor' in requested_types and txn.counterparty_normalized:
-                # Check if this vendor appeared in the last 90 days
-                vendor_history = self.db.query(TransactionClean).filter(
-                    and_(
-                        TransactionClean.counterparty_normalized == txn.counterparty_normalized,
-                        TransactionClean.transaction_date < txn.transaction_date - timedelta(days=90),
-                        TransactionClean.id != txn.id
-                    )
-                ).first()
+            for row in rows:
+                if not row.counterparty_normalized:
+                    continue
                 
-                if not vendor_history:
+                # New unless the vendor already has history older than 90 days
+                if first_seen[row.counterparty_normalized] >= row.transaction_date - timedelta(days=90):
                     anomalies.append({
-                        'transaction_id': txn.id,
+                        'transaction_id': row.id,
                         'anomaly_type': 'new_vendor',
-                        'description': txn.description_normalized or '',
-                        'amount': txn.amount_base,
-                        'date': txn.transaction_date.date(),
+                        'description': '',
+                        'amount': row.amount_base,
+                        'date': row.transaction_date.date(),
                         'severity': 'low',
-                        'reason': f'First transaction with vendor: {txn.counterparty_normalized}'
+                        'reason': f'First transaction with vendor: {row.counterparty_normalized}'
                     })
+                    severity_codes.append(SEVERITY_LOW)
+                    sort_amounts.append(abs(row.amount_base))
         
         # Frequency-based anomalies (transactions on unusual days/times)
         if 'frequency' in requested_types:
-            weekend_transactions = [
-                txn for txn in transactions 
-                if txn.transaction_date.weekday() >= 5  # Saturday = 5, Sunday = 6
-            ]
-            
-            for txn in weekend_transactions:
+            for i in np.flatnonzero(is_weekend):
+                row = rows[i]
                 anomalies.append({
-                    'transaction_id': txn.id,
+                    'transaction_id': row.id,
                     'anomaly_type': 'frequency',
-                    'description': txn.description_normalized or '',
-                    'amount': txn.amount_base,
-                    'date': txn.transaction_date.date(),
+                    'description': '',
+                    'amount': row.amount_base,
+                    'date': row.transaction_date.date(),
                     'severity': 'low',
                     'reason': 'Transaction occurred on weekend'
                 })
+                severity_codes.append(SEVERITY_LOW)
+                sort_amounts.append(abs_amounts[i])
         
-        # Sort by severity and amount
-        severity_order = {'high': 3, 'medium': 2, 'low': 1}
-        anomalies.sort(key=lambda x: (severity_order[x['severity']], abs(x['amount'])), reverse=True)
+        # Sort by severity and amount (descending; lexsort treats the last key as primary)
+        order = np.lexsort((
+            -np.array(sort_amounts, dtype=np.float64),
+            -np.array(severity_codes, dtype=np.int64)
+        ))
         
-        return anomalies[:50]  # Return top 50 anomalies
+        anomalies = [anomalies[i] for i in order[:50]]  # Return top 50 anomalies
+        
+        if anomalies:
+            descriptions = dict(self.db.query(
+                TransactionClean.id,
+                TransactionClean.description_normalized
+            ).filter(
+                TransactionClean.id.in_({anomaly['transaction_id'] for anomaly in anomalies})
+            ).all())
+            for anomaly in anomalies:
+                anomaly['description'] = descriptions.get(anomaly['transaction_id']) or ''
+        
+        return anomalies
 
     def get_top_vendors(
         self,
@@ -402,8 +453,8 @@ class DashboardService:
     ) -> List[Dict[str, Any]]:
         """Get top vendors by spending"""
         
-        query = self.db.query(
-            TransactionClean.counterparty_normalized,
+        vendor_query = self.db.query(
+            TransactionClean.counterparty_normalized.label('vendor_name'),
             func.sum(func.abs(TransactionClean.amount_base)).label('total_spent'),
             func.count(TransactionClean.id).label('transaction_count'),
             func.avg(func.abs(TransactionClean.amount_base)).label('average_amount'),
@@ -416,38 +467,57 @@ class DashboardService:
         )
         
         if start_date:
-            query = query.filter(TransactionClean.transaction_date >= start_date)
+            vendor_query = vendor_query.filter(TransactionClean.transaction_date >= start_date)
         if end_date:
-            query = query.filter(TransactionClean.transaction_date <= end_date)
+            vendor_query = vendor_query.filter(TransactionClean.transaction_date <= end_date)
         
-        results = query.group_by(
+        top_vendors = vendor_query.group_by(
             TransactionClean.counterparty_normalized
         ).order_by(
             desc('total_spent')
-        ).limit(limit).all()
+        ).limit(limit).subquery()
+        
+        # Most common category per vendor, ranked with a window over the grouped counts
+        category_ranks = self.db.query(
+            TransactionClean.counterparty_normalized.label('vendor_name'),
+            ChartOfAccounts.name.label('category'),
+            func.row_number().over(
+                partition_by=TransactionClean.counterparty_normalized,
+                order_by=desc(func.count(TransactionClean.id))
+            ).label('rank')
+        ).join(
+            ChartOfAccounts, TransactionClean.coa_id == ChartOfAccounts.id
+        ).filter(
+            TransactionClean.counterparty_normalized.in_(
+                self.db.query(top_vendors.c.vendor_name)
+            )
+        ).group_by(
+            TransactionClean.counterparty_normalized,
+            ChartOfAccounts.name
+        ).subquery()
+        
+        results = self.db.query(
+            top_vendors,
+            category_ranks.c.category
+        ).outerjoin(
+            category_ranks,
+            and_(
+                category_ranks.c.vendor_name == top_vendors.c.vendor_name,
+                category_ranks.c.rank == 1
+            )
+        ).order_by(
+            desc(top_vendors.c.total_spent)
+        ).all()
         
         vendors = []
         for result in results:
-            # Get most common category for this vendor
-            category_query = self.db.query(
-                ChartOfAccounts.name
-            ).join(
-                TransactionClean, TransactionClean.coa_id == ChartOfAccounts.id
-            ).filter(
-                TransactionClean.counterparty_normalized == result.counterparty_normalized
-            ).group_by(
-                ChartOfAccounts.name
-            ).order_by(
-                desc(func.count(TransactionClean.id))
-            ).first()
-            
             vendors.append({
-                'vendor_name': result.counterparty_normalized,
+                'vendor_name': result.vendor_name,
                 'total_spent': result.total_spent,
                 'transaction_count': result.transaction_count,
                 'average_amount': result.average_amount,
                 'last_transaction_date': result.last_transaction_date.date(),
-                'category': category_query.name if category_query else None
+                'category': result.category
             })
         
         return vendors
@@ -460,13 +530,21 @@ class DashboardService:
     ) -> List[Dict[str, Any]]:
         """Get spending trends analysis"""
         
+        today = date.today()
         if not start_date:
-            start_date = date.today() - timedelta(days=180)  # Last 6 months
+            start_date = today - timedelta(days=180)  # Last 6 months
         if not end_date:
-            end_date = date.today()
+            end_date = today
         
-        # Build query
-        query = self.db.query(TransactionClean).filter(
+        # Build query over just the columns the trend needs, resolving category
+        # names in the same join
+        query = self.db.query(
+            TransactionClean.transaction_date,
+            func.abs(TransactionClean.amount_base),
+            func.coalesce(ChartOfAccounts.name, 'Uncategorized')
+        ).outerjoin(
+            ChartOfAccounts, TransactionClean.coa_id == ChartOfAccounts.id
+        ).filter(
             and_(
                 TransactionClean.amount_base < 0,  # Only expenses
                 TransactionClean.transaction_date >= start_date,
@@ -475,60 +553,66 @@ class DashboardService:
         )
         
         if category:
-            query = query.join(ChartOfAccounts).filter(
-                ChartOfAccounts.name.ilike(f'%{category}%')
-            )
-        
-        transactions = query.all()
-        
-        if not transactions:
+            query = query.filter(ChartOfAccounts.name.ilike(f'%{category}%'))
+        
+        # Stream rows in batches straight into columns; categories become
+        # integer codes in order of first appearance
+        category_codes = {}
+        dates, amounts, codes = [], [], []
+        for txn_date, amount, category_name in query.yield_per(10000):
+            dates.append(txn_date)
+            amounts.append(amount)
+            codes.append(category_codes.setdefault(category_name, len(category_codes)))
+        
+        if not dates:
             return []
         
-        # Convert to DataFrame
-        df = pd.DataFrame([{
-            'date': txn.transaction_date,
-            'amount': abs(txn.amount_base),
-            'category': self._get_transaction_category(txn)
-        } for txn in transactions])
-        
-        # Group by month and category
-        df['month'] = df['date'].dt.to_period('M')
+        # Bucket by month as int64 months since the epoch
+        months = np.array(dates, dtype='datetime64[M]').view(np.int64)
+        amounts = np.array(amounts, dtype=np.float64)
+        trends = []
         
         if category:
             # Single category trend
-            monthly_spending = df.groupby('month')['amount'].sum().reset_index()
-            trends = []
+            month_keys, inverse = np.unique(months, return_inverse=True)
+            monthly_spending = np.bincount(inverse, weights=amounts)
             
-            for i, row in monthly_spending.iterrows():
-                if i > 0:
-                    prev_amount = monthly_spending.iloc[i-1]['amount']
-                    change_pct = ((row['amount'] - prev_amount) / prev_amount) * 100
-                    
-                    if change_pct > 10:
-                        trend_direction = 'increasing'
-                    elif change_pct < -10:
-                        trend_direction = 'decreasing'
-                    else:
-                        trend_direction = 'stable'
-                    
-                    trends.append({
-                        'category': category,
-                        'period': row['month'].strftime('%Y-%m'),
-                        'amount': row['amount'],
-                        'trend_direction': trend_direction,
-                        'trend_strength': abs(change_pct)
-                    })
+            for i in range(1, len(month_keys)):
+                prev_amount = monthly_spending[i - 1]
+                change_pct = ((monthly_spending[i] - prev_amount) / prev_amount) * 100
+                
+                if change_pct > 10:
+                    trend_direction = 'increasing'
+                elif change_pct < -10:
+                    trend_direction = 'decreasing'
+                else:
+                    trend_direction = 'stable'
+                
+                trends.append({
+                    'category': category,
+                    'period': self._format_month(month_keys[i]),
+                    'amount': monthly_spending[i],
+                    'trend_direction': trend_direction,
+                    'trend_strength': abs(change_pct)
+                })
         else:
-            # Multi-category trends
-            category_trends = df.groupby(['month', 'category'])['amount'].sum().reset_index()
-            trends = []
+            # Multi-category trends: one (category, month) key per bucket, sorted
+            # by category code and then month
+            month_span = int(months.max() - months.min()) + 1
+            keys, inverse = np.unique(
+                np.array(codes, dtype=np.int64) * month_span + (months - months.min()),
+                return_inverse=True
+            )
+            key_amounts = np.bincount(inverse, weights=amounts)
+            key_codes = keys // month_span
+            key_months = keys % month_span + months.min()
             
-            for cat in df['category'].unique():
-                cat_data = category_trends[category_trends['category'] == cat].sort_values('month')
+            for cat, code in category_codes.items():
+                start, end = np.searchsorted(key_codes, [code, code + 1])
                 
-                if len(cat_data) > 1:
-                    latest_amount = cat_data.iloc[-1]['amount']
-                    prev_amount = cat_data.iloc[-2]['amount']
+                if end - start > 1:
+                    latest_amount = key_amounts[end - 1]
+                    prev_amount = key_amounts[end - 2]
                     change_pct = ((latest_amount - prev_amount) / prev_amount) * 100
                     
                     if change_pct > 15:
@@ -543,7 +627,7 @@ class DashboardService:
                     
                     trends.append({
                         'category': cat,
-                        'period': cat_data.iloc[-1]['month'].strftime('%Y-%m'),
+                        'period': self._format_month(key_months[end - 1]),
                         'amount': latest_amount,
                         'trend_direction': trend_direction,
                         'trend_strength': trend_strength
@@ -559,54 +643,49 @@ class DashboardService:
     ) -> List[Dict[str, Any]]:
         """Get key performance indicators"""
         
+        today = date.today()
         if not start_date:
-            start_date = date.today().replace(day=1)  # Start of current month
+            start_date = today.replace(day=1)  # Start of current month
         if not end_date:
-            end_date = date.today()
+            end_date = today
         
         period_days = (end_date - start_date).days + 1
+        prev_start = start_date - timedelta(days=period_days)
+        prev_end = start_date - timedelta(days=1)
         
-        # Get current period transactions
-        current_txns = self.db.query(TransactionClean).filter(
-            and_(
-                TransactionClean.transaction_date >= start_date,
-                TransactionClean.transaction_date <= end_date
-            )
-        ).all()
+        # Current and previous period come back from a single grouped query
+        periods = [(start_date, end_date)]
+        if compare_previous_period:
+            periods.append((prev_start, prev_end))
+        self._load_period_totals(periods)
+        
+        current = self._get_period_totals(start_date, end_date)
         
         kpis = []
         
         # Revenue KPI
-        current_revenue = sum(txn.amount_base for txn in current_txns if txn.amount_base > 0)
+        current_revenue = current.total_income or 0
         
         # Expenses KPI
-        current_expenses = sum(abs(txn.amount_base) for txn in current_txns if txn.amount_base < 0)
+        current_expenses = current.total_expenses or 0
         
         # Net Income KPI
         current_net_income = current_revenue - current_expenses
         
         # Transaction Volume KPI
-        current_txn_count = len(current_txns)
+        current_txn_count = current.transaction_count
         
         # Average Transaction Size KPI
         current_avg_txn = (current_revenue + current_expenses) / current_txn_count if current_txn_count > 0 else 0
         
         if compare_previous_period:
             # Get previous period data
-            prev_start = start_date - timedelta(days=period_days)
-            prev_end = start_date - timedelta(days=1)
-            
-            prev_txns = self.db.query(TransactionClean).filter(
-                and_(
-                    TransactionClean.transaction_date >= prev_start,
-                    TransactionClean.transaction_date <= prev_end
-                )
-            ).all()
+            previous = self._get_period_totals(prev_start, prev_end)
             
-            prev_revenue = sum(txn.amount_base for txn in prev_txns if txn.amount_base > 0)
-            prev_expenses = sum(abs(txn.amount_base) for txn in prev_txns if txn.amount_base < 0)
+            prev_revenue = previous.total_income or 0
+            prev_expenses = previous.total_expenses or 0
             prev_net_income = prev_revenue - prev_expenses
-            prev_txn_count = len(prev_txns)
+            prev_txn_count = previous.transaction_count
             prev_avg_txn = (prev_revenue + prev_expenses) / prev_txn_count if prev_txn_count > 0 else 0
             
             # Calculate changes
@@ -667,6 +746,38 @@ class DashboardService:
         return kpis
 
     # Helper methods
+    def _period_start_expr(self, group_by: str):
+        """SQL expression for the first day of the day/week/month/quarter containing a transaction"""
+        column = TransactionClean.transaction_date
+        
+        if self.db.get_bind().dialect.name == "postgresql":
+            return func.date_trunc(group_by, column)
+        
+        # SQLite: weeks start on Monday, quarters on their first month
+        if group_by == "week":
+            return func.date(column, 'weekday 0', '-6 days')
+        if group_by == "month":
+            return func.strftime('%Y-%m-01', column)
+        if group_by == "quarter":
+            quarter_month = (cast(func.strftime('%m', column), Integer) - 1) // 3 * 3 + 1
+            return func.printf('%s-%02d-01', func.strftime('%Y', column), quarter_month)
+        return func.date(column)
+
+    def _format_period(self, period_start: Any, group_by: str) -> str:
+        """Format a period start returned by _period_start_expr as a display label"""
+        if isinstance(period_start, str):
+            period_start = date.fromisoformat(period_start)
+        elif isinstance(period_start, datetime):
+            period_start = period_start.date()
+        
+        if group_by == "week":
+            return f"Week of {period_start.strftime('%Y-%m-%d')}"
+        if group_by == "month":
+            return period_start.strftime('%Y-%m')
+        if group_by == "quarter":
+            return f"Q{(period_start.month - 1) // 3 + 1} {period_start.year}"
+        return period_start.strftime('%Y-%m-%d')
+
     def _get_top_expense_category(self, start_date: date, end_date: date) -> Optional[str]:
         """Get the top expense category for the period"""
         result = self.db.query(
@@ -684,37 +795,13 @@ class DashboardService:
         
         return result.name if result else None
 
-    def _calculate_category_trend(self, category_name: str, start_date: Optional[date], end_date: Optional[date]) -> str:
-        """Calculate trend for a category (simplified)"""
-        if not start_date or not end_date:
-            return 'stable'
-        
-        # Compare first half vs second half of period
-        period_days = (end_date - start_date).days
-        mid_date = start_date + timedelta(days=period_days // 2)
-        
-        first_half = self.db.query(func.sum(func.abs(TransactionClean.amount_base))).join(
-            ChartOfAccounts
-        ).filter(
-            and_(
-                ChartOfAccounts.name == category_name,
-                TransactionClean.transaction_date >= start_date,
-                TransactionClean.transaction_date < mid_date,
-                TransactionClean.amount_base < 0
-            )
-        ).scalar() or 0
-        
-        second_half = self.db.query(func.sum(func.abs(TransactionClean.amount_base))).join(
-            ChartOfAccounts
-        ).filter(
-            and_(
-                ChartOfAccounts.name == category_name,
-                TransactionClean.transaction_date >= mid_date,
-                TransactionClean.transaction_date <= end_date,
-                TransactionClean.amount_base < 0
-            )
-        ).scalar() or 0
-        
+    def _format_month(self, month_number: int) -> str:
+        """Format a month counted from 1970-01 as YYYY-MM"""
+        year, month = divmod(int(month_number), 12)
+        return f"{1970 + year:04d}-{month + 1:02d}"
+
+    def _calculate_category_trend(self, first_half: float, second_half: float) -> str:
+        """Calculate trend for a category from its first-half vs second-half spend (simplified)"""
         if first_half > 0:
             change_pct = ((second_half - first_half) / first_half) * 100
             if change_pct > 10:
@@ -724,9 +811,36 @@ class DashboardService:
         
         return 'stable'
 
-    def _get_transaction_category(self, transaction: TransactionClean) -> str:
-        """Get category name for transaction"""
-        if transaction.coa_id:
-            coa = self.db.query(ChartOfAccounts).filter(ChartOfAccounts.id == transaction.coa_id).first()
-            return coa.name if coa else 'Uncategorized'
-        return 'Uncategorized'
\ No newline at end of file
+    def _get_period_totals(self, start_date: date, end_date: date) -> PeriodTotals:
+        """Get income/expense/count aggregates for a period, cached per service instance"""
+        key = (start_date, end_date)
+        if key not in self._period_totals:
+            self._load_period_totals([key])
+        return self._period_totals[key]
+
+    def _load_period_totals(self, periods: List[Tuple[date, date]]) -> None:
+        """Aggregate several non-overlapping periods in one grouped query and cache them"""
+        periods = [period for period in periods if period not in self._period_totals]
+        if not periods:
+            return
+        
+        period_filters = [
+            and_(
+                TransactionClean.transaction_date >= start_date,
+                TransactionClean.transaction_date <= end_date
+            )
+            for start_date, end_date in periods
+        ]
+        bucket = case(*[(period_filter, index) for index, period_filter in enumerate(period_filters)])
+        
+        rows = self.db.query(
+            bucket.label('bucket'),
+            func.sum(case((TransactionClean.amount_base > 0, TransactionClean.amount_base), else_=0)).label('total_income'),
+            func.sum(case((TransactionClean.amount_base < 0, -TransactionClean.amount_base), else_=0)).label('total_expenses'),
+            func.count(TransactionClean.id).label('transaction_count'),
+            func.count(TransactionClean.coa_id).label('classified_count')
+        ).filter(or_(*period_filters)).group_by(bucket).all()
+        
+        totals_by_bucket = {row.bucket: PeriodTotals(*row[1:]) for row in rows}
+        for index, period in enumerate(periods):
+            self._period_totals[period] = totals_by_bucket.get(index, PeriodTotals(None, None, 0, 0))
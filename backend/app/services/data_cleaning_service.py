@@ -1,61 +1,256 @@
-from sqlalchemy.orm import Session
-from typing import List, Dict, Any, Optional
+from sqlalchemy.orm import Session, Query
+from sqlalchemy import exists
+from typing import List, Dict, Any, Optional, Tuple
 import pandas as pd
 import numpy as np
 import re
 from datetime import datetime, date
+from functools import lru_cache
 
+from app.core.config import settings
 from app.models.transactions import TransactionRaw, TransactionClean
 
+try:
+    from numba import njit, prange
+except ImportError:  # pragma: no cover - optional accelerator
+    njit = None
+
+# Currency symbols and the ISO codes they stand for
+_CURRENCY_SYMBOLS = {
+    '$': 'USD', '€': 'EUR', '£': 'GBP', '¥': 'JPY',
+    '₹': 'INR', 'C$': 'CAD', 'A$': 'AUD'
+}
+
+# Common description cleaning patterns, compiled once at import
+_CLEANING_PATTERNS = (
+    (re.compile(r'\s+'), ' '),  # Multiple spaces to single space
+    (re.compile(r'^(DEBIT|CREDIT|ACH|WIRE|CHECK|CARD)\s*'), ''),  # Remove transaction type prefixes
+    (re.compile(r'\s*\d{2}/\d{2}(/\d{4})?\s*'), ' '),  # Remove dates from descriptions
+    (re.compile(r'\s*#\d+\s*'), ' '),  # Remove reference numbers
+    (re.compile(r'\s*\*+\d+\s*'), ' '),  # Remove masked card numbers
+)
+
+# Well-known brand prefixes and their canonical names, matched as one alternation
+_BRANDS = {
+    'WALMART': 'WALMART',
+    'AMAZON': 'AMAZON',
+    'STARBUCKS': 'STARBUCKS',
+    'SHELL': 'SHELL',
+    'EXXON': 'EXXON MOBIL',
+    'TARGET': 'TARGET',
+    'HOME DEPOT': 'HOME DEPOT',
+    'LOWES': 'LOWES'
+}
+_BRAND_REGEX = re.compile(r'^(WALMART|AMAZON|STARBUCKS|SHELL|EXXON|TARGET|HOME DEPOT|LOWES)')
+
+# Company suffixes stripped from the end of descriptions and counterparties
+_DESCRIPTION_SUFFIXES = ('LLC', 'INC', 'CORP', 'LTD')
+_COUNTERPARTY_SUFFIXES = ('LLC', 'INC', 'CORP', 'LTD', 'CO')
+
+_COUNTERPARTY_PREFIX_REGEX = re.compile(r'^(THE\s+)')
+
+# Accepted string date formats, tried in order
+_DATE_FORMATS = ('%Y-%m-%d', '%m/%d/%Y', '%d/%m/%Y', '%Y-%m-%d %H:%M:%S')
+
+# Placeholder conversion rates to the USD base currency
+_CONVERSION_RATES = {
+    'EUR': 1.1, 'GBP': 1.25, 'CAD': 0.8, 'AUD': 0.7
+}
+
+# Same rates as a lookup table for the batch path; code 0 (rate 1.0) is USD and unknown currencies
+_CURRENCY_CODES = {currency: code for code, currency in enumerate(_CONVERSION_RATES, start=1)}
+_FX_RATES = np.array([1.0, *_CONVERSION_RATES.values()], dtype=np.float64)
+
+def _strip_company_suffix(text: str, suffixes: Tuple[str, ...], require_space: bool) -> str:
+    r"""
+    Drop a trailing company suffix, an optional '.' after it and the whitespace around it.
+    
+    Same result as re.sub(r'\s*(SUFFIX|...)\.?\s*$', '', text) (r'\s+...' when require_space)
+    without running the regex engine over every row.
+    """
+    body = text.rstrip()
+    if body.endswith('.'):
+        body = body[:-1]
+    if not body.endswith(suffixes):
+        return text
+    
+    prefix = next(body[:-len(suffix)] for suffix in suffixes if body.endswith(suffix))
+    if require_space and not prefix[-1:].isspace():
+        return text
+    return prefix.rstrip()
+
+@lru_cache(maxsize=200_000)
+def _normalize_description_text(description: str) -> str:
+    """Clean and normalize one description; recurring descriptions are served from the cache"""
+    if not description:
+        return ""
+    
+    desc = description.upper().strip()
+    
+    # Apply cleaning patterns
+    for pattern, replacement in _CLEANING_PATTERNS:
+        desc = pattern.sub(replacement, desc)
+    
+    # Standardize company suffixes
+    desc = _strip_company_suffix(desc, _DESCRIPTION_SUFFIXES, require_space=True)
+    
+    # Remove extra whitespace
+    return ' '.join(desc.split())
+
+@lru_cache(maxsize=200_000)
+def _normalize_counterparty_text(counterparty: Optional[str]) -> Optional[str]:
+    """Clean and normalize one counterparty name; recurring names are served from the cache"""
+    if not counterparty:
+        return None
+    
+    party = counterparty.upper().strip()
+    
+    # Common normalizations
+    brand = _BRAND_REGEX.match(party)
+    if brand:
+        return _BRANDS[brand.group(1)]
+    
+    # Remove common suffixes/prefixes
+    party = _strip_company_suffix(party, _COUNTERPARTY_SUFFIXES, require_space=False)
+    party = _COUNTERPARTY_PREFIX_REGEX.sub('', party)
+    
+    return party.strip()
+
+def _normalize_description_column(desc: pd.Series) -> pd.Series:
+    """Column version of _normalize_description_text for non-missing descriptions"""
+    desc = desc.str.upper().str.strip()
+    for pattern, replacement in _CLEANING_PATTERNS:
+        desc = desc.str.replace(pattern, replacement, regex=True)
+    desc = desc.map(lambda text: _strip_company_suffix(text, _DESCRIPTION_SUFFIXES, require_space=True))
+    return desc.str.split().str.join(' ')
+
+def _normalize_counterparty_column(party: pd.Series) -> pd.Series:
+    """Column version of _normalize_counterparty_text for non-missing names (empty names are not masked)"""
+    party = party.str.upper().str.strip()
+    brand = party.str.extract(_BRAND_REGEX, expand=False).map(_BRANDS)
+    party = party.map(lambda text: _strip_company_suffix(text, _COUNTERPARTY_SUFFIXES, require_space=False))
+    party = party.str.replace(_COUNTERPARTY_PREFIX_REGEX, '', regex=True).str.strip()
+    return brand.fillna(party)
+
+def _normalize_distinct(values: pd.Series, normalize) -> pd.Series:
+    """Run a column normalizer over each distinct value once and broadcast the results back"""
+    codes, uniques = pd.factorize(values)
+    normalized = normalize(pd.Series(uniques, dtype=object)).to_numpy(dtype=object)
+    # factorize codes missing values as -1, which picks the trailing None
+    return pd.Series(np.append(normalized, None)[codes], index=values.index, dtype=object)
+
+def _convert_amounts_numpy(amounts: np.ndarray, currency_codes: np.ndarray, rates: np.ndarray) -> np.ndarray:
+    """Multiply each amount by the rate of its currency code"""
+    return amounts * rates[currency_codes]
+
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def _convert_amounts(amounts, currency_codes, rates):
+        """Parallel native version of _convert_amounts_numpy"""
+        converted = np.empty_like(amounts)
+        for i in prange(amounts.shape[0]):
+            converted[i] = amounts[i] * rates[currency_codes[i]]
+        return converted
+else:
+    _convert_amounts = _convert_amounts_numpy
+
 class DataCleaningService:
-    def __init__(self):
-        self.currency_symbols = {
-            '$': 'USD', '€': 'EUR', '£': 'GBP', '¥': 'JPY',
-            '₹': 'INR', 'C$': 'CAD', 'A$': 'AUD'
-        }
-        
-        # Common description cleaning patterns
-        self.cleaning_patterns = [
-            (r'\s+', ' '),  # Multiple spaces to single space
-            (r'^(DEBIT|CREDIT|ACH|WIRE|CHECK|CARD)\s*', ''),  # Remove transaction type prefixes
-            (r'\s*\d{2}/\d{2}(/\d{4})?\s*', ' '),  # Remove dates from descriptions
-            (r'\s*#\d+\s*', ' '),  # Remove reference numbers
-            (r'\s*\*+\d+\s*', ' '),  # Remove masked card numbers
-            (r'\s+(LLC|INC|CORP|LTD)\.?\s*$', ''),  # Standardize company suffixes
-        ]
+    def __init__(self, db: Session):
+        self.db = db
 
     async def clean_transactions(self, raw_transactions: List[TransactionRaw]) -> int:
         """Clean and normalize raw transactions"""
-        cleaned_count = 0
+        # Raw ids that already have a clean record, fetched in one query
+        raw_ids = [raw_txn.id for raw_txn in raw_transactions]
+        existing = {
+            raw_id for (raw_id,) in self.db.query(TransactionClean.raw_id).filter(
+                TransactionClean.raw_id.in_(raw_ids)
+            ).all()
+        } if raw_ids else set()
         
-        for raw_txn in raw_transactions:
-            # Skip if already cleaned
-            existing_clean = self.db.query(TransactionClean).filter(
-                TransactionClean.raw_id == raw_txn.id
-            ).first()
-            if existing_clean:
-                continue
-            
-            # Clean and normalize data
-            cleaned_data = self._clean_transaction_data(raw_txn)
-            
-            # Create clean transaction record
-            clean_txn = TransactionClean(
-                raw_id=raw_txn.id,
-                transaction_date=cleaned_data['transaction_date'],
-                amount_base=cleaned_data['amount_base'],
-                currency_base=cleaned_data['currency_base'],
-                description_normalized=cleaned_data['description_normalized'],
-                counterparty_normalized=cleaned_data['counterparty_normalized'],
-                processed_at=datetime.utcnow()
-            )
-            
-            self.db.add(clean_txn)
-            cleaned_count += 1
+        new_transactions = [raw_txn for raw_txn in raw_transactions if raw_txn.id not in existing]
+        cleaned_count = self._insert_clean_batch(new_transactions)
         
         self.db.commit()
         return cleaned_count
 
+    async def clean_transactions_query(
+        self,
+        query: Optional[Query] = None,
+        batch_size: Optional[int] = None
+    ) -> int:
+        """Clean raw transactions from a query, streaming and inserting them batch by batch.
+        
+        Memory stays bounded by the batch size instead of the whole backlog. Rows that
+        already have a clean record are filtered out by the database.
+        """
+        batch_size = batch_size or settings.CLEANING_BATCH_SIZE
+        if query is None:
+            query = self.db.query(TransactionRaw)
+        
+        query = query.filter(
+            ~exists().where(TransactionClean.raw_id == TransactionRaw.id)
+        ).yield_per(batch_size)
+        
+        cleaned_count = 0
+        batch = []
+        for raw_txn in query:
+            batch.append(raw_txn)
+            if len(batch) == batch_size:
+                cleaned_count += self._insert_clean_batch(batch)
+                batch = []
+        cleaned_count += self._insert_clean_batch(batch)
+        
+        # Each batch is inserted as it goes; committing mid-stream would close a server-side cursor
+        self.db.commit()
+        return cleaned_count
+
+    def _insert_clean_batch(self, raw_transactions: List[TransactionRaw]) -> int:
+        """Clean a batch of raw transactions and insert the results, without committing"""
+        if not raw_transactions:
+            return 0
+        
+        # Clean and normalize the batch column-wise
+        clean_rows = self._clean_batch(raw_transactions)
+        
+        processed_at = datetime.utcnow()
+        for clean_row in clean_rows:
+            clean_row['processed_at'] = processed_at
+        
+        # Insert the batch as multi-row INSERTs instead of one ORM object per row
+        self.db.bulk_insert_mappings(TransactionClean, clean_rows)
+        return len(clean_rows)
+
+    def _clean_batch(self, raw_transactions: List[TransactionRaw]) -> List[Dict[str, Any]]:
+        """Clean a batch of transactions with pandas string methods, column by column"""
+        df = pd.DataFrame({
+            'date': pd.Series([t.transaction_date for t in raw_transactions], dtype=object),
+            'amount': [t.amount for t in raw_transactions],
+            'currency': pd.Series([t.currency for t in raw_transactions], dtype=object),
+            'description': pd.Series([t.description for t in raw_transactions], dtype=object),
+            'counterparty': pd.Series([t.counterparty for t in raw_transactions], dtype=object)
+        })
+        
+        # Descriptions and counterparties repeat heavily (subscriptions, payroll, utilities),
+        # so each string pipeline runs once per distinct value
+        desc = _normalize_distinct(df['description'].fillna(''), _normalize_description_column)
+        party = _normalize_distinct(df['counterparty'], _normalize_counterparty_column)
+        party = party.where(df['counterparty'].astype(bool), None)
+        
+        # Amounts: one gather-and-multiply over the batch; USD and unknown currencies use rate 1.0
+        currency_codes = df['currency'].map(_CURRENCY_CODES).fillna(0).to_numpy(dtype=np.int8)
+        amount_base = _convert_amounts(df['amount'].to_numpy(dtype=np.float64), currency_codes, _FX_RATES)
+        
+        cleaned = pd.DataFrame({
+            'raw_id': [t.id for t in raw_transactions],
+            'transaction_date': self._normalize_dates(df['date']),
+            'amount_base': amount_base,
+            'currency_base': [self._get_base_currency(c) for c in df['currency']],
+            'description_normalized': desc,
+            'counterparty_normalized': party
+        })
+        return cleaned.to_dict(orient='records')
+
     def _clean_transaction_data(self, raw_txn: TransactionRaw) -> Dict[str, Any]:
         """Clean individual transaction data"""
         return {
@@ -70,8 +265,7 @@ class DataCleaningService:
         """Normalize date to standard format"""
         if isinstance(date_value, str):
             # Try multiple date formats
-            formats = ['%Y-%m-%d', '%m/%d/%Y', '%d/%m/%Y', '%Y-%m-%d %H:%M:%S']
-            for fmt in formats:
+            for fmt in _DATE_FORMATS:
                 try:
                     return datetime.strptime(date_value, fmt)
                 except ValueError:
@@ -79,6 +273,26 @@ class DataCleaningService:
             raise ValueError(f"Unable to parse date: {date_value}")
         return date_value
 
+    def _normalize_dates(self, date_values: pd.Series) -> pd.Series:
+        """Normalize a column of dates, parsing string dates one format at a time"""
+        dates = date_values.copy()
+        remaining = date_values[date_values.map(lambda value: isinstance(value, str))]
+        
+        # Each format is parsed in one vectorized (and cached) pass over the strings still unparsed
+        for fmt in _DATE_FORMATS:
+            if remaining.empty:
+                break
+            parsed = pd.to_datetime(remaining, format=fmt, errors='coerce', cache=True)
+            matched = parsed.notna()
+            dates[parsed.index[matched]] = [timestamp.to_pydatetime() for timestamp in parsed[matched]]
+            remaining = remaining[~matched]
+        
+        # Anything pandas could not parse goes through the row-wise path, which raises on bad input
+        for index, value in remaining.items():
+            dates[index] = self._normalize_date(value)
+        
+        return dates
+
     def _normalize_amount(self, amount: float, currency: str) -> float:
         """Normalize amount to base currency"""
         # For now, assume USD as base currency
@@ -87,11 +301,7 @@ class DataCleaningService:
             return amount
         
         # Placeholder for currency conversion
-        conversion_rates = {
-            'EUR': 1.1, 'GBP': 1.25, 'CAD': 0.8, 'AUD': 0.7
-        }
-        
-        rate = conversion_rates.get(currency, 1.0)
+        rate = _CONVERSION_RATES.get(currency, 1.0)
         return amount * rate
 
     def _get_base_currency(self, currency: str) -> str:
@@ -100,69 +310,32 @@ class DataCleaningService:
 
     def _normalize_description(self, description: str) -> str:
         """Clean and normalize transaction description"""
-        if not description:
-            return ""
-        
-        desc = description.upper().strip()
-        
-        # Apply cleaning patterns
-        for pattern, replacement in self.cleaning_patterns:
-            desc = re.sub(pattern, replacement, desc)
-        
-        # Remove extra whitespace
-        desc = ' '.join(desc.split())
-        
-        return desc
+        return _normalize_description_text(description)
 
     def _normalize_counterparty(self, counterparty: Optional[str]) -> Optional[str]:
         """Clean and normalize counterparty name"""
-        if not counterparty:
-            return None
-        
-        party = counterparty.upper().strip()
-        
-        # Common normalizations
-        normalizations = {
-            r'WALMART.*': 'WALMART',
-            r'AMAZON.*': 'AMAZON', 
-            r'STARBUCKS.*': 'STARBUCKS',
-            r'SHELL.*': 'SHELL',
-            r'EXXON.*': 'EXXON MOBIL',
-            r'TARGET.*': 'TARGET',
-            r'HOME DEPOT.*': 'HOME DEPOT',
-            r'LOWES.*': 'LOWES'
-        }
-        
-        for pattern, replacement in normalizations.items():
-            if re.match(pattern, party):
-                return replacement
-        
-        # Remove common suffixes/prefixes
-        party = re.sub(r'\s*(LLC|INC|CORP|LTD|CO)\.?\s*$', '', party)
-        party = re.sub(r'^(THE\s+)', '', party)
-        
-        return party.strip()
+        return _normalize_counterparty_text(counterparty)
 
     def detect_duplicates(self, transactions: List[TransactionRaw]) -> List[Dict[str, Any]]:
         """Detect potential duplicate transactions"""
         duplicates = []
         
-        # Create DataFrame for easier analysis
-        df = pd.DataFrame([{
-            'id': t.id,
-            'date': t.transaction_date,
-            'amount': t.amount,
-            'description': t.description,
-            'counterparty': t.counterparty
-        } for t in transactions])
-        
-        # Group by similar transactions
-        duplicate_groups = df.groupby([
-            'date', 'amount', 
-            df['description'].str[:20]  # First 20 characters
-        ]).filter(lambda x: len(x) > 1)
-        
-        for group_key, group in duplicate_groups.groupby(['date', 'amount']):
+        # Create DataFrame for easier analysis, column by column rather than from per-row dicts
+        df = pd.DataFrame({
+            'id': [t.id for t in transactions],
+            'date': [t.transaction_date for t in transactions],
+            'amount': [t.amount for t in transactions],
+            'description': [t.description for t in transactions]
+        })
+        
+        # Flag rows sharing date, amount and the first 20 description characters. duplicated()
+        # factorizes each key column and combines the codes into one exact int64 group key,
+        # with no Python callback per group
+        df['desc20'] = df['description'].str[:20]
+        key_columns = ['date', 'amount', 'desc20']
+        duplicate_mask = df.duplicated(subset=key_columns, keep=False) & df[key_columns].notna().all(axis=1)
+        
+        for group_key, group in df.loc[duplicate_mask].groupby(['date', 'amount']):
             if len(group) > 1:
                 duplicates.append({
                     'transaction_ids': group['id'].tolist(),
@@ -181,27 +354,34 @@ class DataCleaningService:
         
         total_count = len(transactions)
         
-        # Check for missing data
-        missing_descriptions = sum(1 for t in transactions if not t.description)
-        missing_counterparties = sum(1 for t in transactions if not t.counterparty)
-        missing_amounts = sum(1 for t in transactions if not t.amount or t.amount == 0)
+        # Check for missing data, counting both text columns in one pass
+        missing_descriptions = 0
+        missing_counterparties = 0
+        for t in transactions:
+            missing_descriptions += not t.description
+            missing_counterparties += not t.counterparty
+        
+        # Missing amounts are stored as zero so one array serves both checks
+        all_amounts = np.fromiter((t.amount or 0.0 for t in transactions), dtype=np.float64, count=total_count)
+        missing_amounts = int(np.count_nonzero(all_amounts == 0))
         
         # Check for outliers
-        amounts = [t.amount for t in transactions if t.amount]
-        if amounts:
-            q75, q25 = np.percentile(amounts, [75, 25])
+        amounts = all_amounts[all_amounts != 0]
+        if amounts.size:
+            q25, q75 = np.quantile(amounts, [0.25, 0.75])
             iqr = q75 - q25
             outlier_threshold = q75 + 1.5 * iqr
-            outliers = sum(1 for amount in amounts if amount > outlier_threshold)
+            outliers = int(np.count_nonzero(amounts > outlier_threshold))
         else:
             outliers = 0
         
         # Date range analysis
         dates = [t.transaction_date for t in transactions]
+        earliest, latest = min(dates), max(dates)
         date_range = {
-            'earliest': min(dates),
-            'latest': max(dates),
-            'span_days': (max(dates) - min(dates)).days
+            'earliest': earliest,
+            'latest': latest,
+            'span_days': (latest - earliest).days
         }
         
         return {
@@ -7,16 +7,41 @@ import numpy as np
 from typing import List, Optional, Dict, Any, Tuple
 import hashlib
 import json
-from datetime import datetime, timedelta
+from collections import OrderedDict
+from functools import lru_cache
 import logging
+import time
 from sqlalchemy.orm import Session
 
+from app.models.transactions import TransactionClean
+from app.models.accounts import ChartOfAccounts
+
 # TODO: Replace with actual sentence-transformers when ready
 # from sentence_transformers import SentenceTransformer
 # import faiss
 
 logger = logging.getLogger(__name__)
 
+EMBEDDING_DIM = 384
+CACHE_TTL_SECONDS = 3600  # Cached embeddings expire after 1 hour
+
+@lru_cache(maxsize=100_000)
+def _dummy_embedding(text: str) -> np.ndarray:
+    """
+    Deterministic unit-norm float32 vector for text, computed once per distinct text.
+    
+    The array is shared between callers, so it is marked read-only.
+    """
+    # Seed a private generator from the text hash instead of reseeding the global np.random state
+    seed = int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), 'little')
+    embedding = np.random.default_rng(seed).standard_normal(EMBEDDING_DIM, dtype=np.float32)
+    
+    # Normalize to unit vector
+    embedding /= np.linalg.norm(embedding)
+    embedding.flags.writeable = False
+    
+    return embedding
+
 class EmbeddingService:
     """Service for generating and comparing transaction embeddings."""
     
@@ -24,9 +49,16 @@ class EmbeddingService:
         self.db = db
         self.model = None
         self.index = None
-        self.embeddings_cache = {}
         self.similarity_threshold = 0.85
         
+        # Cached embeddings live in one contiguous float32 matrix, one unit-normed row per transaction
+        self._emb_matrix = np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+        self._row_ids = np.empty(0, dtype=np.int64)  # matrix row -> transaction_id, -1 for free rows
+        # transaction_id -> (matrix row, time.monotonic() when cached), oldest first
+        self._id_to_row = OrderedDict()
+        self._free_rows = []  # Rows released by expired entries, reused before growing
+        self._rows_used = 0
+        
         # TODO: Uncomment when sentence-transformers is available
         # self._initialize_model()
         
@@ -73,20 +105,9 @@ class EmbeddingService:
             text: Input text
             
         Returns:
-            384-dimensional dummy embedding
+            384-dimensional float32 dummy embedding
         """
-        # Create deterministic embedding based on text hash
-        hash_obj = hashlib.md5(text.encode())
-        hash_int = int(hash_obj.hexdigest(), 16)
-        
-        # Generate pseudo-random but deterministic 384-dim vector
-        np.random.seed(hash_int % (2**32))
-        embedding = np.random.normal(0, 1, 384)
-        
-        # Normalize to unit vector
-        embedding = embedding / np.linalg.norm(embedding)
-        
-        return embedding
+        return _dummy_embedding(text)
     
     def compute_similarity(self, embedding1: np.ndarray, embedding2: np.ndarray) -> float:
         """
@@ -135,9 +156,85 @@ class EmbeddingService:
         if query_embedding is None:
             return []
         
-        # TODO: Implement FAISS index search when available
-        # For now, return placeholder results
-        return self._find_similar_placeholder(transaction_text, top_k)
+        self._evict_expired()
+        if not self._id_to_row:
+            # TODO: Implement FAISS index search when available
+            # For now, return placeholder results
+            return self._find_similar_placeholder(transaction_text, top_k)
+        
+        k = min(top_k, len(self._id_to_row))
+        if k <= 0:
+            return []
+        
+        # Linear scan over the cached matrix; top-k by partition, then sort just those k
+        similarities = self.batch_cos(query_embedding)
+        top_rows = np.argpartition(similarities, -k)[-k:]
+        top_rows = top_rows[np.argsort(-similarities[top_rows])]
+        
+        return self._describe_matches(top_rows, similarities)
+    
+    def batch_cos(self, query: np.ndarray) -> np.ndarray:
+        """
+        Compute cosine similarity of a query against every cached embedding at once.
+        
+        Args:
+            query: Query embedding vector
+            
+        Returns:
+            Cosine similarities in [-1, 1], one per matrix row in use (-inf for free rows)
+        """
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return np.full(self._rows_used, -np.inf, dtype=np.float32)
+        
+        # Rows are unit-normed on insert, so one matrix-vector product gives every cosine
+        similarities = self._emb_matrix[:self._rows_used] @ (query / norm).astype(np.float32)
+        similarities[self._row_ids[:self._rows_used] < 0] = -np.inf
+        return similarities
+    
+    def _describe_matches(self, rows: np.ndarray, similarities: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        Load the classified transactions behind matched matrix rows.
+        
+        Args:
+            rows: Matrix rows, best match first
+            similarities: Cosine similarity per matrix row
+            
+        Returns:
+            Similar transactions with similarity scores, best match first
+        """
+        transaction_ids = [int(self._row_ids[row]) for row in rows]
+        transactions = {
+            txn.id: txn for txn in self.db.query(
+                TransactionClean.id,
+                TransactionClean.description_normalized,
+                ChartOfAccounts.code,
+                ChartOfAccounts.name
+            ).join(
+                ChartOfAccounts, TransactionClean.coa_id == ChartOfAccounts.id
+            ).filter(
+                TransactionClean.id.in_(transaction_ids)
+            ).all()
+        }
+        
+        matches = []
+        for row, transaction_id in zip(rows, transaction_ids):
+            txn = transactions.get(transaction_id)
+            if txn is None:
+                continue  # Unclassified transactions cannot suggest a category
+            
+            # Same [0, 1] scale as compute_similarity
+            similarity_score = float((similarities[row] + 1) / 2)
+            matches.append({
+                'transaction_id': transaction_id,
+                'description': txn.description_normalized,
+                'coa_code': txn.code,
+                'coa_name': txn.name,
+                'similarity_score': similarity_score,
+                'confidence': similarity_score
+            })
+        
+        return matches
     
     def _find_similar_placeholder(self, transaction_text: str, top_k: int) -> List[Dict[str, Any]]:
         """
@@ -231,17 +328,47 @@ class EmbeddingService:
             transaction_id: ID of the transaction
             embedding: Embedding vector to cache
         """
-        self.embeddings_cache[transaction_id] = {
-            'embedding': embedding,
-            'timestamp': datetime.now()
-        }
+        cache_entry = self._id_to_row.get(transaction_id)
+        row = cache_entry[0] if cache_entry else self._allocate_row()
         
-        # Clean old cache entries (older than 1 hour)
-        cutoff_time = datetime.now() - timedelta(hours=1)
-        self.embeddings_cache = {
-            k: v for k, v in self.embeddings_cache.items()
-            if v['timestamp'] > cutoff_time
-        }
+        # Store unit-normed so batch_cos is a plain dot product
+        norm = np.linalg.norm(embedding)
+        self._emb_matrix[row] = embedding / norm if norm else embedding
+        self._row_ids[row] = transaction_id
+        self._id_to_row[transaction_id] = (row, time.monotonic())
+        self._id_to_row.move_to_end(transaction_id)
+        
+        self._evict_expired()
+    
+    def _evict_expired(self):
+        """Clean old cache entries (older than 1 hour), oldest first."""
+        # Entries are kept in insertion-time order, so only the expired head is visited
+        cutoff_time = time.monotonic() - CACHE_TTL_SECONDS
+        while self._id_to_row:
+            transaction_id, (_, cached_at) = next(iter(self._id_to_row.items()))
+            if cached_at > cutoff_time:
+                break
+            self._release_row(transaction_id)
+    
+    def _release_row(self, transaction_id: int):
+        """Drop a transaction from the cache and mark its matrix row free."""
+        row, _ = self._id_to_row.pop(transaction_id)
+        self._row_ids[row] = -1
+        self._free_rows.append(row)
+    
+    def _allocate_row(self) -> int:
+        """Get a free row in the embeddings matrix, doubling its capacity when full."""
+        if self._free_rows:
+            return self._free_rows.pop()
+        
+        if self._rows_used == len(self._emb_matrix):
+            grown = np.empty((max(64, 2 * len(self._emb_matrix)), EMBEDDING_DIM), dtype=np.float32)
+            grown[:self._rows_used] = self._emb_matrix[:self._rows_used]
+            self._emb_matrix = grown
+            self._row_ids = np.concatenate([self._row_ids, np.full(len(grown) - len(self._row_ids), -1, dtype=np.int64)])
+        
+        self._rows_used += 1
+        return self._rows_used - 1
     
     def get_cached_embedding(self, transaction_id: int) -> Optional[np.ndarray]:
         """
@@ -253,15 +380,16 @@ class EmbeddingService:
         Returns:
             Cached embedding or None if not found/expired
         """
-        if transaction_id in self.embeddings_cache:
-            cache_entry = self.embeddings_cache[transaction_id]
+        if transaction_id in self._id_to_row:
+            row, cached_at = self._id_to_row[transaction_id]
             
             # Check if cache entry is still valid (1 hour TTL)
-            if datetime.now() - cache_entry['timestamp'] < timedelta(hours=1):
-                return cache_entry['embedding']
+            if time.monotonic() - cached_at < CACHE_TTL_SECONDS:
+                # Copy so a later reuse of the row cannot change the caller's vector
+                return self._emb_matrix[row].copy()
             else:
                 # Remove expired entry
-                del self.embeddings_cache[transaction_id]
+                self._release_row(transaction_id)
         
         return None
 
@@ -1,22 +1,67 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-from typing import List, Optional, Dict, Any
-from datetime import datetime, date
+from sqlalchemy import and_, or_, func, case, select, false, Column, ColumnElement, DateTime
+from sqlalchemy.engine import Row
+from typing import List, Optional, Dict, Any, Iterable, Iterator, Callable
+from datetime import datetime, date, timedelta
 import pandas as pd
+import asyncio
 import csv
+import gzip
 import os
 import uuid
+from itertools import chain, islice
 from io import StringIO
 
 from app.models.transactions import TransactionClean
 from app.models.accounts import ChartOfAccounts
+from app.models.exports import ExportRecord
 from app.core.config import settings
+from app.core.database import SessionLocal
+
+# Columns the ledger-style exports read; ix_transactions_clean_export covers them on Postgres
+_LEDGER_COLUMNS = (
+    TransactionClean.id,
+    TransactionClean.transaction_date,
+    TransactionClean.amount_base,
+    TransactionClean.description_normalized,
+    TransactionClean.counterparty_normalized,
+    TransactionClean.coa_id
+)
+
+# Large write buffer so CSV chunks reach the file in few write() syscalls
+_WRITE_BUFFER_SIZE = 1 << 20
+# Below this many rows csv.DictWriter beats building a DataFrame for to_csv
+_PANDAS_MIN_ROWS = 1000
+
+def _truncate(values: pd.Series, length: int) -> pd.Series:
+    """Column-wise `value[:length] if value else ''`"""
+    return values.fillna('').str.slice(0, length)
+
+def _format_csv_value(value: Any) -> Any:
+    """Render dates and timestamps as text for the generic transaction export"""
+    # isoformat is a C fast path, ~3x quicker than strftime for these layouts
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.replace(tzinfo=None)  # strftime layout had no UTC offset
+        return value.isoformat(' ', 'seconds')
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+def _format_us_date(value: date) -> str:
+    """strftime('%m/%d/%Y') without re-parsing the format on every call"""
+    return f"{value.month:02d}/{value.day:02d}/{value.year}"
+
+def _abs_where(amounts: pd.Series, mask: pd.Series) -> pd.Series:
+    """abs(amount) where mask holds, '' elsewhere (debit/credit columns)"""
+    return amounts.abs().astype(object).where(mask, '')
 
 class ExportService:
     def __init__(self, db: Session):
         self.db = db
-        self.export_folder = "exports"
+        self.export_folder = settings.EXPORT_FOLDER
         os.makedirs(self.export_folder, exist_ok=True)
+        self._coa_frame: Optional[pd.DataFrame] = None
 
     async def export_to_quickbooks(
         self,
@@ -24,50 +69,56 @@ class ExportService:
         end_date: Optional[date] = None,
         export_type: str = "journal_entry",
         include_categories: bool = True,
-        reviewed_only: bool = False
+        reviewed_only: bool = False,
+        file_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """Export transactions to QuickBooks format"""
         
         # Get transactions
+        if not self._has_transactions_for_export(start_date, end_date, reviewed_only):
+            raise ValueError("No transactions found for export")
         transactions = self._get_transactions_for_export(
-            start_date, end_date, reviewed_only
+            start_date, end_date, reviewed_only, columns=_LEDGER_COLUMNS
         )
         
-        if not transactions:
-            raise ValueError("No transactions found for export")
-        
         # Generate export data based on type
         if export_type == "journal_entry":
             export_data = self._generate_qb_journal_entries(transactions)
-            filename = f"QB_JournalEntries_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+            filename = f"QB_JournalEntries_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv.gz"
         elif export_type == "expense":
-            export_data = self._generate_qb_expenses(transactions)
-            filename = f"QB_Expenses_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+            # Only export expenses (negative amounts); the database drops the rest
+            expenses = self._get_transactions_for_export(
+                start_date, end_date, reviewed_only,
+                extra_filters=[TransactionClean.amount_base < 0], columns=_LEDGER_COLUMNS
+            )
+            export_data = self._generate_qb_expenses(expenses)
+            filename = f"QB_Expenses_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv.gz"
         elif export_type == "bill":
-            export_data = self._generate_qb_bills(transactions)
-            filename = f"QB_Bills_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+            export_data = self._generate_qb_bills(start_date, end_date, reviewed_only)
+            filename = f"QB_Bills_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv.gz"
         else:
             raise ValueError(f"Unsupported QuickBooks export type: {export_type}")
         
         # Save to file
         file_path = os.path.join(self.export_folder, filename)
-        self._save_csv_file(export_data, file_path)
+        record_count = await asyncio.to_thread(self._save_csv_file, export_data, file_path)
         
         # Generate response
-        file_id = str(uuid.uuid4())
+        file_id = file_id or str(uuid.uuid4())  # Queued exports arrive with their id
         download_url = f"/api/v1/export/download/{file_id}"
         
-        # Store file mapping (in production, use database)
-        self._store_export_record(file_id, file_path, filename, len(transactions))
+        # Store file mapping
+        self._store_export_record(file_id, file_path, filename, record_count)
         
         return {
             'success': True,
-            'message': f'Successfully exported {len(transactions)} transactions to QuickBooks format',
+            'message': f'Successfully exported {record_count} records to QuickBooks format',
             'file_id': file_id,
             'filename': filename,
-            'record_count': len(transactions),
+            'record_count': record_count,
             'file_size': os.path.getsize(file_path),
             'download_url': download_url,
+            'status': 'completed',
             'expires_at': datetime.now().replace(hour=23, minute=59, second=59)  # End of day
         }
 
@@ -77,44 +128,45 @@ class ExportService:
         end_date: Optional[date] = None,
         export_type: str = "journal_entry",
         include_tax_mapping: bool = True,
-        reviewed_only: bool = False
+        reviewed_only: bool = False,
+        file_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """Export transactions to Xero format"""
         
+        if not self._has_transactions_for_export(start_date, end_date, reviewed_only):
+            raise ValueError("No transactions found for export")
         transactions = self._get_transactions_for_export(
-            start_date, end_date, reviewed_only
+            start_date, end_date, reviewed_only, columns=_LEDGER_COLUMNS
         )
         
-        if not transactions:
-            raise ValueError("No transactions found for export")
-        
         # Generate export data based on type
         if export_type == "journal_entry":
             export_data = self._generate_xero_journal_entries(transactions, include_tax_mapping)
-            filename = f"Xero_JournalEntries_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+            filename = f"Xero_JournalEntries_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv.gz"
         elif export_type == "bank_transaction":
             export_data = self._generate_xero_bank_transactions(transactions)
-            filename = f"Xero_BankTransactions_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+            filename = f"Xero_BankTransactions_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv.gz"
         else:
             raise ValueError(f"Unsupported Xero export type: {export_type}")
         
         # Save to file
         file_path = os.path.join(self.export_folder, filename)
-        self._save_csv_file(export_data, file_path)
+        record_count = await asyncio.to_thread(self._save_csv_file, export_data, file_path)
         
-        file_id = str(uuid.uuid4())
+        file_id = file_id or str(uuid.uuid4())  # Queued exports arrive with their id
         download_url = f"/api/v1/export/download/{file_id}"
         
-        self._store_export_record(file_id, file_path, filename, len(transactions))
+        self._store_export_record(file_id, file_path, filename, record_count)
         
         return {
             'success': True,
-            'message': f'Successfully exported {len(transactions)} transactions to Xero format',
+            'message': f'Successfully exported {record_count} records to Xero format',
             'file_id': file_id,
             'filename': filename,
-            'record_count': len(transactions),
+            'record_count': record_count,
             'file_size': os.path.getsize(file_path),
             'download_url': download_url,
+            'status': 'completed',
             'expires_at': datetime.now().replace(hour=23, minute=59, second=59)
         }
 
@@ -124,7 +176,8 @@ class ExportService:
         end_date: Optional[date] = None,
         export_type: str = "transactions",
         columns: Optional[List[str]] = None,
-        filters: Optional[Dict[str, Any]] = None
+        filters: Optional[Dict[str, Any]] = None,
+        file_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """Export to generic CSV format"""
         
@@ -140,166 +193,204 @@ class ExportService:
         else:
             raise ValueError(f"Unsupported CSV export type: {export_type}")
         
-        filename = f"{filename_prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        filename = f"{filename_prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv.gz"
         file_path = os.path.join(self.export_folder, filename)
         
-        self._save_csv_file(data, file_path)
+        record_count = await asyncio.to_thread(self._save_csv_file, data, file_path)
         
-        file_id = str(uuid.uuid4())
+        file_id = file_id or str(uuid.uuid4())  # Queued exports arrive with their id
         download_url = f"/api/v1/export/download/{file_id}"
         
-        self._store_export_record(file_id, file_path, filename, len(data))
+        self._store_export_record(file_id, file_path, filename, record_count)
         
         return {
             'success': True,
-            'message': f'Successfully exported {len(data)} records to CSV',
+            'message': f'Successfully exported {record_count} records to CSV',
             'file_id': file_id,
             'filename': filename,
-            'record_count': len(data),
+            'record_count': record_count,
             'file_size': os.path.getsize(file_path),
             'download_url': download_url,
+            'status': 'completed',
             'expires_at': datetime.now().replace(hour=23, minute=59, second=59)
         }
 
-    def _get_transactions_for_export(
+    def _export_filters(
         self,
         start_date: Optional[date] = None,
         end_date: Optional[date] = None,
         reviewed_only: bool = False
-    ) -> List[TransactionClean]:
-        """Get transactions for export with filters"""
-        query = self.db.query(TransactionClean).join(
-            ChartOfAccounts, TransactionClean.coa_id == ChartOfAccounts.id, isouter=True
-        )
-        
+    ) -> List[ColumnElement[bool]]:
+        """WHERE clauses shared by the export queries"""
+        filters = []
         if start_date:
-            query = query.filter(TransactionClean.transaction_date >= start_date)
+            filters.append(TransactionClean.transaction_date >= start_date)
         if end_date:
-            query = query.filter(TransactionClean.transaction_date <= end_date)
+            filters.append(TransactionClean.transaction_date <= end_date)
         if reviewed_only:
-            query = query.filter(TransactionClean.is_reviewed == "true")
-        
-        return query.all()
+            filters.append(TransactionClean.is_reviewed == "true")
+        return filters
 
-    def _generate_qb_journal_entries(self, transactions: List[TransactionClean]) -> List[Dict[str, Any]]:
+    def _has_transactions_for_export(
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        reviewed_only: bool = False
+    ) -> bool:
+        """Check for matching transactions without fetching any rows"""
+        filters = self._export_filters(start_date, end_date, reviewed_only)
+        return self.db.query(select(TransactionClean.id).where(*filters).exists()).scalar()
+
+    def _get_transactions_for_export(
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        reviewed_only: bool = False,
+        extra_filters: Optional[List[ColumnElement[bool]]] = None,
+        columns: Optional[Iterable[Column]] = None
+    ) -> Iterator[Row]:
+        """Stream transaction rows for export with filters"""
+        # Plain column rows skip ORM hydration; accounts come from _get_coa_frame.
+        # As a generator, the query only runs once a writer starts consuming rows.
+        query = select(*(columns or TransactionClean.__table__.columns)).where(
+            *self._export_filters(start_date, end_date, reviewed_only),
+            *(extra_filters or [])
+        )
+        yield from self.db.execute(query.execution_options(yield_per=settings.EXPORT_CHUNK_SIZE))
+
+    def _get_coa_frame(self) -> pd.DataFrame:
+        """Account code and name indexed by account id, loaded once per export service"""
+        if self._coa_frame is None:
+            accounts = self.db.execute(
+                select(ChartOfAccounts.id, ChartOfAccounts.code, ChartOfAccounts.name)
+            ).all()
+            self._coa_frame = pd.DataFrame.from_records(
+                accounts, columns=['id', 'code', 'name'], index='id'
+            )
+        return self._coa_frame
+
+    def _transaction_frames(self, transactions: Iterable[Row]) -> Iterator[pd.DataFrame]:
+        """Group streamed transaction rows into DataFrames of EXPORT_CHUNK_SIZE rows"""
+        rows = iter(transactions)
+        batch = list(islice(rows, settings.EXPORT_CHUNK_SIZE))
+        while batch:
+            yield pd.DataFrame.from_records(batch, columns=list(batch[0]._fields))
+            batch = list(islice(rows, settings.EXPORT_CHUNK_SIZE))
+
+    def _generate_qb_journal_entries(self, transactions: Iterable[Row]) -> Iterator[pd.DataFrame]:
         """Generate QuickBooks journal entry format"""
-        entries = []
+        coa_names = self._get_coa_frame()['name']
         
-        for txn in transactions:
-            coa = self.db.query(ChartOfAccounts).filter(ChartOfAccounts.id == txn.coa_id).first()
+        for df in self._transaction_frames(transactions):
+            dates, amounts = df['transaction_date'].dt.strftime('%m/%d/%Y'), df['amount_base']
+            memo = _truncate(df['description_normalized'], 100)
+            entity = _truncate(df['counterparty_normalized'], 50)
             
             # Debit entry (expense account)
-            entries.append({
-                'Date': txn.transaction_date.strftime('%m/%d/%Y'),
-                'Account': coa.name if coa else 'Uncategorized Expense',
-                'Debits': abs(txn.amount_base) if txn.amount_base < 0 else '',
-                'Credits': abs(txn.amount_base) if txn.amount_base > 0 else '',
-                'Memo': txn.description_normalized[:100] if txn.description_normalized else '',
-                'Entity': txn.counterparty_normalized[:50] if txn.counterparty_normalized else ''
+            debits = pd.DataFrame({
+                'Date': dates,
+                'Account': df['coa_id'].map(coa_names).fillna('Uncategorized Expense'),
+                'Debits': _abs_where(amounts, amounts < 0),
+                'Credits': _abs_where(amounts, amounts > 0),
+                'Memo': memo,
+                'Entity': entity
             })
             
             # Credit entry (bank/cash account)
-            entries.append({
-                'Date': txn.transaction_date.strftime('%m/%d/%Y'),
+            credits = pd.DataFrame({
+                'Date': dates,
                 'Account': 'Checking Account',  # Default bank account
-                'Debits': abs(txn.amount_base) if txn.amount_base > 0 else '',
-                'Credits': abs(txn.amount_base) if txn.amount_base < 0 else '',
-                'Memo': txn.description_normalized[:100] if txn.description_normalized else '',
-                'Entity': txn.counterparty_normalized[:50] if txn.counterparty_normalized else ''
+                'Debits': _abs_where(amounts, amounts > 0),
+                'Credits': _abs_where(amounts, amounts < 0),
+                'Memo': memo,
+                'Entity': entity
             })
-        
-        return entries
-
-    def _generate_qb_expenses(self, transactions: List[TransactionClean]) -> List[Dict[str, Any]]:
-        """Generate QuickBooks expense format"""
-        expenses = []
-        
-        for txn in transactions:
-            if txn.amount_base >= 0:  # Only export expenses (negative amounts)
-                continue
-                
-            coa = self.db.query(ChartOfAccounts).filter(ChartOfAccounts.id == txn.coa_id).first()
             
-            expenses.append({
-                'Date': txn.transaction_date.strftime('%m/%d/%Y'),
-                'Payee': txn.counterparty_normalized[:50] if txn.counterparty_normalized else 'Unknown',
-                'Account': coa.name if coa else 'Uncategorized Expense',
-                'Amount': abs(txn.amount_base),
-                'Memo': txn.description_normalized[:200] if txn.description_normalized else '',
+            # Interleave so each transaction's debit line precedes its credit line
+            yield pd.concat([debits, credits]).sort_index(kind='stable')
+
+    def _generate_qb_expenses(self, transactions: Iterable[Row]) -> Iterator[pd.DataFrame]:
+        """Generate QuickBooks expense format from expense (negative amount) rows"""
+        coa_names = self._get_coa_frame()['name']
+        
+        for df in self._transaction_frames(transactions):
+            payee = _truncate(df['counterparty_normalized'], 50)
+            yield pd.DataFrame({
+                'Date': df['transaction_date'].dt.strftime('%m/%d/%Y'),
+                'Payee': payee.where(payee != '', 'Unknown'),
+                'Account': df['coa_id'].map(coa_names).fillna('Uncategorized Expense'),
+                'Amount': df['amount_base'].abs(),
+                'Memo': _truncate(df['description_normalized'], 200),
                 'Payment method': 'Check'  # Default payment method
             })
-        
-        return expenses
 
-    def _generate_qb_bills(self, transactions: List[TransactionClean]) -> List[Dict[str, Any]]:
+    def _generate_qb_bills(
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        reviewed_only: bool = False
+    ) -> Iterator[Dict[str, Any]]:
         """Generate QuickBooks bill format"""
-        bills = []
         
-        # Group transactions by vendor
-        vendor_transactions = {}
-        for txn in transactions:
-            if txn.amount_base >= 0:  # Only expenses
-                continue
-                
-            vendor = txn.counterparty_normalized or 'Unknown Vendor'
-            if vendor not in vendor_transactions:
-                vendor_transactions[vendor] = []
-            vendor_transactions[vendor].append(txn)
+        # Group expenses by vendor in the database; Python only sees one row per vendor
+        vendor = func.coalesce(
+            func.nullif(TransactionClean.counterparty_normalized, ''), 'Unknown Vendor'
+        ).label('vendor')
+        vendor_bills = self.db.execute(
+            select(
+                vendor,
+                func.sum(func.abs(TransactionClean.amount_base)).label('total_amount'),
+                func.max(TransactionClean.transaction_date).label('latest_date'),
+                func.count().label('transaction_count')
+            ).where(
+                TransactionClean.amount_base < 0,  # Only expenses
+                *self._export_filters(start_date, end_date, reviewed_only)
+            ).group_by(vendor).order_by(vendor)
+        )
         
         # Create bills for each vendor
-        for vendor, txns in vendor_transactions.items():
-            total_amount = sum(abs(txn.amount_base) for txn in txns)
-            latest_date = max(txn.transaction_date for txn in txns)
-            
-            bills.append({
-                'Date': latest_date.strftime('%m/%d/%Y'),
-                'Vendor': vendor[:50],
-                'Amount': total_amount,
-                'Memo': f"Combined bill for {len(txns)} transactions",
+        for bill in vendor_bills:
+            yield {
+                'Date': _format_us_date(bill.latest_date),
+                'Vendor': bill.vendor[:50],
+                'Amount': bill.total_amount,
+                'Memo': f"Combined bill for {bill.transaction_count} transactions",
                 'Terms': 'Net 30',
-                'Due Date': (latest_date.replace(day=28) if latest_date.day > 28 else latest_date.replace(day=latest_date.day + 30)).strftime('%m/%d/%Y')
-            })
-        
-        return bills
+                'Due Date': _format_us_date(bill.latest_date + timedelta(days=30))
+            }
 
-    def _generate_xero_journal_entries(self, transactions: List[TransactionClean], include_tax: bool = True) -> List[Dict[str, Any]]:
+    def _generate_xero_journal_entries(self, transactions: Iterable[Row], include_tax: bool = True) -> Iterator[pd.DataFrame]:
         """Generate Xero journal entry format"""
-        entries = []
+        coa_codes = self._get_coa_frame()['code']
         
-        for txn in transactions:
-            coa = self.db.query(ChartOfAccounts).filter(ChartOfAccounts.id == txn.coa_id).first()
+        for df in self._transaction_frames(transactions):
+            amounts = df['amount_base']
             
             # Journal line item
-            entries.append({
-                'Date': txn.transaction_date.strftime('%d/%m/%Y'),  # Xero uses dd/mm/yyyy
-                'Account': coa.code if coa else '6000',  # Default expense code
-                'Description': txn.description_normalized[:200] if txn.description_normalized else '',
-                'Reference': f"TXN-{txn.id}",
-                'Debit': abs(txn.amount_base) if txn.amount_base < 0 else '',
-                'Credit': abs(txn.amount_base) if txn.amount_base > 0 else '',
+            yield pd.DataFrame({
+                'Date': df['transaction_date'].dt.strftime('%d/%m/%Y'),  # Xero uses dd/mm/yyyy
+                'Account': df['coa_id'].map(coa_codes).fillna('6000'),  # Default expense code
+                'Description': _truncate(df['description_normalized'], 200),
+                'Reference': 'TXN-' + df['id'].astype(str),
+                'Debit': _abs_where(amounts, amounts < 0),
+                'Credit': _abs_where(amounts, amounts > 0),
                 'TaxType': 'GST' if include_tax else 'NONE',
-                'Contact': txn.counterparty_normalized[:50] if txn.counterparty_normalized else ''
+                'Contact': _truncate(df['counterparty_normalized'], 50)
             })
-        
-        return entries
 
-    def _generate_xero_bank_transactions(self, transactions: List[TransactionClean]) -> List[Dict[str, Any]]:
+    def _generate_xero_bank_transactions(self, transactions: Iterable[Row]) -> Iterator[pd.DataFrame]:
         """Generate Xero bank transaction format"""
-        bank_txns = []
-        
-        for txn in transactions:
-            coa = self.db.query(ChartOfAccounts).filter(ChartOfAccounts.id == txn.coa_id).first()
-            
-            bank_txns.append({
-                'Date': txn.transaction_date.strftime('%d/%m/%Y'),
-                'Amount': txn.amount_base,
-                'Payee': txn.counterparty_normalized[:50] if txn.counterparty_normalized else '',
-                'Description': txn.description_normalized[:200] if txn.description_normalized else '',
-                'Reference': f"TXN-{txn.id}",
-                'Account': coa.code if coa else '6000'
+        coa_codes = self._get_coa_frame()['code']
+        
+        for df in self._transaction_frames(transactions):
+            yield pd.DataFrame({
+                'Date': df['transaction_date'].dt.strftime('%d/%m/%Y'),
+                'Amount': df['amount_base'],
+                'Payee': _truncate(df['counterparty_normalized'], 50),
+                'Description': _truncate(df['description_normalized'], 200),
+                'Reference': 'TXN-' + df['id'].astype(str),
+                'Account': df['coa_id'].map(coa_codes).fillna('6000')
             })
-        
-        return bank_txns
 
     def _export_transactions_csv(
         self,
@@ -307,11 +398,9 @@ class ExportService:
         end_date: Optional[date],
         columns: Optional[List[str]],
         filters: Optional[Dict[str, Any]]
-    ) -> List[Dict[str, Any]]:
+    ) -> Iterator[Dict[str, Any]]:
         """Export transactions to generic CSV format"""
         
-        transactions = self._get_transactions_for_export(start_date, end_date)
-        
         # Default columns if not specified
         if not columns:
             columns = [
@@ -319,171 +408,251 @@ class ExportService:
                 'counterparty_normalized', 'category_predicted', 'confidence_score'
             ]
         
-        csv_data = []
-        for txn in transactions:
-            row = {}
-            for col in columns:
-                if hasattr(txn, col):
-                    value = getattr(txn, col)
-                    if isinstance(value, datetime):
-                        value = value.strftime('%Y-%m-%d %H:%M:%S')
-                    elif isinstance(value, date):
-                        value = value.strftime('%Y-%m-%d')
-                    row[col] = value
-                else:
-                    row[col] = ''
-            
-            # Apply additional filters if specified
-            if filters:
-                include_row = True
-                for filter_key, filter_value in filters.items():
-                    if filter_key in row and row[filter_key] != filter_value:
-                        include_row = False
-                        break
-                
-                if include_row:
-                    csv_data.append(row)
+        # Filters apply to exported columns only. Push what we can into the WHERE
+        # clause; timestamps are matched against their formatted text per row.
+        table_columns = TransactionClean.__table__.columns
+        sql_filters, row_filters = [], {}
+        for filter_key, filter_value in (filters or {}).items():
+            if filter_key not in columns:
+                continue
+            column = table_columns.get(filter_key)
+            if column is None:
+                if filter_value != '':  # Unknown columns export as ''
+                    sql_filters.append(false())
+            elif isinstance(column.type, DateTime):
+                row_filters[filter_key] = filter_value
             else:
-                csv_data.append(row)
+                sql_filters.append(column.is_(None) if filter_value is None else column == filter_value)
+        
+        transactions = self._get_transactions_for_export(start_date, end_date, extra_filters=sql_filters)
+        
+        # Resolve each output column to its row position and type once, not per cell
+        positions = {name: i for i, name in enumerate(table_columns.keys())}
+        plain_columns = [
+            (col, positions[col]) for col in columns
+            if col in positions and not isinstance(table_columns[col].type, DateTime)
+        ]
+        date_columns = [
+            (col, positions[col]) for col in columns
+            if col in positions and isinstance(table_columns[col].type, DateTime)
+        ]
+        positional_filters = [(positions[key], value) for key, value in row_filters.items()]
+        blank_row = dict.fromkeys(columns, '')  # Unknown columns export as ''
         
-        return csv_data
+        for txn in transactions:
+            if positional_filters and any(_format_csv_value(txn[i]) != value for i, value in positional_filters):
+                continue
+            
+            row = blank_row.copy()
+            for col, i in plain_columns:
+                row[col] = txn[i]
+            for col, i in date_columns:
+                row[col] = _format_csv_value(txn[i])
+            yield row
 
     def _export_trial_balance_csv(
         self,
         start_date: Optional[date],
         end_date: Optional[date]
-    ) -> List[Dict[str, Any]]:
+    ) -> Iterator[Dict[str, Any]]:
         """Export trial balance to CSV"""
         
-        # Get account balances
-        from sqlalchemy import func
-        
+        # Get account balances, split into debit/credit columns by the database
+        balance = func.sum(TransactionClean.amount_base)
         query = self.db.query(
-            ChartOfAccounts.code,
-            ChartOfAccounts.name,
-            func.sum(TransactionClean.amount_base).label('balance')
+            ChartOfAccounts.code.label('Account Code'),
+            ChartOfAccounts.name.label('Account Name'),
+            case((balance < 0, -balance), else_=0).label('Debit'),
+            case((balance > 0, balance), else_=0).label('Credit'),
+            balance.label('Balance')
         ).join(
             TransactionClean, TransactionClean.coa_id == ChartOfAccounts.id
-        )
-        
-        if start_date:
-            query = query.filter(TransactionClean.transaction_date >= start_date)
-        if end_date:
-            query = query.filter(TransactionClean.transaction_date <= end_date)
-        
-        balances = query.group_by(ChartOfAccounts.id).all()
-        
-        trial_balance = []
-        for balance in balances:
-            debit = abs(balance.balance) if balance.balance < 0 else 0
-            credit = balance.balance if balance.balance > 0 else 0
-            
-            trial_balance.append({
-                'Account Code': balance.code,
-                'Account Name': balance.name,
-                'Debit': debit,
-                'Credit': credit,
-                'Balance': balance.balance
-            })
+        ).filter(*self._export_filters(start_date, end_date))
         
-        return trial_balance
+        for row in query.group_by(ChartOfAccounts.id):
+            yield dict(row._mapping)
 
     def _export_general_ledger_csv(
         self,
         start_date: Optional[date],
         end_date: Optional[date],
         filters: Optional[Dict[str, Any]]
-    ) -> List[Dict[str, Any]]:
+    ) -> Iterator[pd.DataFrame]:
         """Export general ledger to CSV"""
         
-        transactions = self._get_transactions_for_export(start_date, end_date)
-        
-        ledger_entries = []
-        for txn in transactions:
-            coa = self.db.query(ChartOfAccounts).filter(ChartOfAccounts.id == txn.coa_id).first()
-            
-            ledger_entries.append({
-                'Date': txn.transaction_date.strftime('%Y-%m-%d'),
-                'Account Code': coa.code if coa else '',
-                'Account Name': coa.name if coa else 'Uncategorized',
-                'Description': txn.description_normalized or '',
-                'Reference': f"TXN-{txn.id}",
-                'Debit': abs(txn.amount_base) if txn.amount_base < 0 else '',
-                'Credit': abs(txn.amount_base) if txn.amount_base > 0 else '',
-                'Balance': txn.amount_base
+        transactions = self._get_transactions_for_export(start_date, end_date, columns=_LEDGER_COLUMNS)
+        coa = self._get_coa_frame()
+        
+        for df in self._transaction_frames(transactions):
+            amounts = df['amount_base']
+            yield pd.DataFrame({
+                'Date': df['transaction_date'].dt.strftime('%Y-%m-%d'),
+                'Account Code': df['coa_id'].map(coa['code']).fillna(''),
+                'Account Name': df['coa_id'].map(coa['name']).fillna('Uncategorized'),
+                'Description': df['description_normalized'].fillna(''),
+                'Reference': 'TXN-' + df['id'].astype(str),
+                'Debit': _abs_where(amounts, amounts < 0),
+                'Credit': _abs_where(amounts, amounts > 0),
+                'Balance': amounts
             })
-        
-        return ledger_entries
 
-    def _save_csv_file(self, data: List[Dict[str, Any]], file_path: str):
-        """Save data to CSV file"""
-        if not data:
+    def _save_csv_file(
+        self,
+        data: Iterable[Any],
+        file_path: str,
+        chunk_size: Optional[int] = None
+    ) -> int:
+        """Stream rows (dicts) or DataFrame chunks to a CSV file (gzipped for .gz paths) and return the rows written"""
+        chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+        rows = iter(data)
+        first = next(rows, None)
+        if first is None:
             raise ValueError("No data to export")
         
-        with open(file_path, 'w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = data[0].keys()
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(data)
+        if file_path.endswith('.gz'):
+            # Fastest compression level keeps most of the size win on highly redundant CSV text
+            csvfile = gzip.open(file_path, 'wt', compresslevel=1, encoding='utf-8', newline='')
+        else:
+            csvfile = open(file_path, 'w', newline='', encoding='utf-8', buffering=_WRITE_BUFFER_SIZE)
+        
+        with csvfile:
+            if isinstance(first, pd.DataFrame):
+                frames = chain((first,), rows)
+            else:
+                chunk = [first, *islice(rows, chunk_size - 1)]
+                if len(chunk) < min(chunk_size, _PANDAS_MIN_ROWS):
+                    # Whole export fits in one small chunk; DataFrame setup isn't worth it
+                    writer = csv.DictWriter(csvfile, fieldnames=first.keys())
+                    writer.writeheader()
+                    writer.writerows(chunk)
+                    return len(chunk)
+                frames = self._record_frames(chain(chunk, rows), list(first.keys()), chunk_size)
+            
+            record_count = 0
+            for frame in frames:
+                frame.to_csv(csvfile, header=record_count == 0, index=False, lineterminator='\r\n')
+                record_count += len(frame)
+        
+        return record_count
 
-    def _store_export_record(self, file_id: str, file_path: str, filename: str, record_count: int):
-        """Store export record (in production, use database)"""
-        # For now, store in a simple dict (in production, use database)
-        if not hasattr(self, '_export_records'):
-            self._export_records = {}
+    def _record_frames(
+        self,
+        rows: Iterator[Dict[str, Any]],
+        fieldnames: List[str],
+        chunk_size: int
+    ) -> Iterator[pd.DataFrame]:
+        """Group dict rows into DataFrames of chunk_size rows"""
+        chunk = list(islice(rows, chunk_size))
+        while chunk:
+            # Object dtype keeps values as-is (no int -> float upcast around None)
+            yield pd.DataFrame(chunk, columns=fieldnames, dtype=object)
+            chunk = list(islice(rows, chunk_size))
+
+    def queue_export(self) -> Dict[str, Any]:
+        """Reserve a file id for an export that will run as a background task"""
+        file_id = str(uuid.uuid4())
+        self.db.add(ExportRecord(file_id=file_id, status='queued', created_at=datetime.now()))
+        self.db.commit()
         
-        self._export_records[file_id] = {
-            'file_path': file_path,
-            'filename': filename,
-            'record_count': record_count,
-            'created_at': datetime.now()
+        return {
+            'success': True,
+            'message': 'Export queued; poll the status URL until it completes',
+            'file_id': file_id,
+            'filename': '',
+            'record_count': 0,
+            'download_url': f"/api/v1/export/download/{file_id}",
+            'status_url': f"/api/v1/export/status/{file_id}",
+            'status': 'queued',
+            'expires_at': datetime.now().replace(hour=23, minute=59, second=59)
         }
 
+    def _store_export_record(self, file_id: str, file_path: str, filename: str, record_count: int):
+        """Persist the export record so any worker can serve the download"""
+        record = self.db.get(ExportRecord, file_id)
+        if record is None:
+            record = ExportRecord(file_id=file_id, created_at=datetime.now())
+            self.db.add(record)
+        record.file_path = file_path
+        record.filename = filename
+        record.record_count = record_count
+        record.status = 'completed'
+        self.db.commit()
+
+    def _mark_export_failed(self, file_id: str, error: str):
+        """Record why a queued export did not produce a file"""
+        record = self.db.get(ExportRecord, file_id)
+        if record is not None:
+            record.status = 'failed'
+            record.error = error
+            self.db.commit()
+
     def get_export_file_info(self, file_id: str) -> Optional[Dict[str, Any]]:
         """Get export file information"""
-        if hasattr(self, '_export_records') and file_id in self._export_records:
-            return self._export_records[file_id]
-        return None
+        record = self.db.get(ExportRecord, file_id)
+        if record is None:
+            return None
+        return {
+            'file_path': record.file_path,
+            'filename': record.filename,
+            'record_count': record.record_count,
+            'status': record.status,
+            'error': record.error,
+            'created_at': record.created_at
+        }
 
     def get_export_history(self, skip: int = 0, limit: int = 50) -> List[Dict[str, Any]]:
         """Get export history"""
-        if not hasattr(self, '_export_records'):
-            return []
-        
-        history = []
-        for file_id, record in self._export_records.items():
-            history.append({
-                'id': file_id,
-                'filename': record['filename'],
-                'record_count': record['record_count'],
-                'created_at': record['created_at'],
-                'status': 'completed'
-            })
-        
-        # Sort by creation date descending
-        history.sort(key=lambda x: x['created_at'], reverse=True)
-        
-        return history[skip:skip+limit]
+        # Newest first, paged by the database using the created_at index
+        records = self.db.query(ExportRecord).order_by(
+            ExportRecord.created_at.desc()
+        ).offset(skip).limit(limit)
+        
+        return [
+            {
+                'id': record.file_id,
+                'filename': record.filename,
+                'record_count': record.record_count,
+                'created_at': record.created_at,
+                'status': record.status
+            }
+            for record in records
+        ]
 
     def cleanup_old_exports(self, days_old: int = 30) -> int:
         """Cleanup old export files"""
-        if not hasattr(self, '_export_records'):
-            return 0
-        
         cutoff_date = datetime.now() - timedelta(days=days_old)
-        cleaned_count = 0
-        
-        files_to_remove = []
-        for file_id, record in self._export_records.items():
-            if record['created_at'] < cutoff_date:
-                # Remove file
-                if os.path.exists(record['file_path']):
-                    os.remove(record['file_path'])
-                files_to_remove.append(file_id)
-                cleaned_count += 1
-        
-        # Remove from records
-        for file_id in files_to_remove:
-            del self._export_records[file_id]
-        
-        return cleaned_count
\ No newline at end of file
+        expired = self.db.query(ExportRecord).filter(ExportRecord.created_at < cutoff_date).all()
+        
+        for record in expired:
+            # Remove file (queued and failed exports have none)
+            if record.file_path and os.path.exists(record.file_path):
+                os.remove(record.file_path)
+            self.db.delete(record)
+        
+        self.db.commit()
+        return len(expired)
+
+
+async def run_queued_export(
+    file_id: str,
+    format_type: str,
+    params: Dict[str, Any],
+    session_factory: Callable[[], Session] = SessionLocal
+) -> None:
+    """Background task body: run a queued export in its own session and record the outcome"""
+    # The request's session is closed once the response is sent
+    db = session_factory()
+    try:
+        export_service = ExportService(db)
+        exporter = {
+            'quickbooks': export_service.export_to_quickbooks,
+            'xero': export_service.export_to_xero,
+            'csv': export_service.export_to_csv
+        }[format_type]
+        try:
+            await exporter(file_id=file_id, **params)
+        except Exception as e:
+            db.rollback()
+            export_service._mark_export_failed(file_id, str(e))
+    finally:
+        db.close()
@@ -1,20 +1,162 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
-from typing import List, Optional, Dict, Any
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import func, and_, or_, exists, case
+from sqlalchemy.engine import Row
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime, date, timedelta
-from rapidfuzz import fuzz
+from concurrent.futures import ProcessPoolExecutor
+from rapidfuzz import fuzz, process
+from rapidfuzz.utils import default_process
+import numpy as np
 import pandas as pd
+import asyncio
+import functools
 import itertools
-from collections import defaultdict
+import multiprocessing
+import os
+from collections import defaultdict, namedtuple
 import re
 
 from app.models.transactions import TransactionClean
 from app.models.reconciliation import Reconciliation, LedgerEntry
 from app.core.config import settings
+from app.core.database import dialect_insert
+
+try:
+    from numba import njit
+except ImportError:  # pragma: no cover - optional accelerator
+    njit = None
+
+def _fuzzy_scores_numpy(
+    similarities: np.ndarray,
+    t_amt: float,
+    amounts: np.ndarray,
+    date_diffs: np.ndarray,
+    date_window: int
+) -> np.ndarray:
+    """Composite fuzzy-match score of one transaction against each candidate"""
+    max_amounts = np.maximum(amounts, t_amt)
+    # Two zero amounts are an exact amount match rather than a division by zero
+    amount_scores = 1.0 - np.abs(amounts - t_amt) / np.where(max_amounts > 0, max_amounts, 1.0)
+    date_scores = np.maximum(0, 1.0 - date_diffs / date_window)
+    return (similarities * 0.5) + (amount_scores * 0.3) + (date_scores * 0.2)
+
+if njit is not None:
+    @njit(cache=True)
+    def _fuzzy_scores(similarities, t_amt, amounts, date_diffs, date_window):
+        """Native version of _fuzzy_scores_numpy; candidate rows are short, so it stays serial"""
+        scores = np.empty_like(similarities)
+        for i in range(similarities.shape[0]):
+            max_amount = max(amounts[i], t_amt)
+            amount_score = 1.0 - abs(amounts[i] - t_amt) / max_amount if max_amount > 0 else 1.0
+            date_score = max(0.0, 1.0 - date_diffs[i] / date_window)
+            scores[i] = (similarities[i] * 0.5) + (amount_score * 0.3) + (date_score * 0.2)
+        return scores
+else:
+    _fuzzy_scores = _fuzzy_scores_numpy
+
+# Words dropped from descriptions before fuzzy matching: filler words and standalone
+# legal-entity suffixes, which carry no information about the merchant
+_DESCRIPTION_STOPWORDS = frozenset({
+    'a', 'an', 'and', 'at', 'by', 'for', 'from', 'in', 'of', 'on', 'the', 'to', 'with',
+    'co', 'corp', 'inc', 'llc', 'ltd', 'plc',
+    '的', '和', '及', '公司', '有限公司',
+})
+# Legal-entity suffixes written onto the merchant name without a space, longest first
+_MERCHANT_SUFFIXES = ('股份有限公司', '有限责任公司', '有限公司', '公司')
+
+# Timestamps, long numeric IDs and punctuation carry nothing the two sides have in common
+_CLEAN_RE = re.compile(r'\d{4}-\d{2}-\d{2}|\b\d{6,}\b|[^\w\s]')
+
+@functools.lru_cache(maxsize=131072)
+def _clean_description(desc: str) -> str:
+    """Clean description for fuzzy matching; bank feeds repeat the same text, so results are cached"""
+    if not desc:
+        return ""
+    cleaned = _CLEAN_RE.sub(' ', desc.lower())
+    # Drop filler words and legal-entity suffixes that differ between a bank feed and the books
+    tokens = []
+    for token in cleaned.split():
+        if token in _DESCRIPTION_STOPWORDS:
+            continue
+        for suffix in _MERCHANT_SUFFIXES:
+            if token.endswith(suffix) and len(token) > len(suffix):
+                token = token[:-len(suffix)]
+                break
+        tokens.append(token)
+    return ' '.join(tokens)
+
+def _candidate_date_window() -> int:
+    """Widest date difference, in days, that any auto_reconcile strategy accepts"""
+    return max(1, settings.RECONCILIATION_DATE_TOLERANCE_DAYS * 2)
+
+# Scoring service and ledger arrays of a matching worker process, set once by its initializer
+_worker_ledger = None
+
+def _init_match_worker(amounts, dates, memos, date_tolerance_days, fuzzy_threshold):
+    """Process pool initializer: keep the ledger arrays and the parent's tolerances per worker"""
+    global _worker_ledger
+    settings.RECONCILIATION_DATE_TOLERANCE_DAYS = date_tolerance_days
+    settings.RECONCILIATION_FUZZY_MATCH_THRESHOLD = fuzzy_threshold
+    _worker_ledger = (ReconciliationService(None), amounts, dates, memos)
+
+def _rank_transaction_chunk(chunk, min_confidence):
+    """Confident matches of each transaction against every ledger entry, best first"""
+    service, amounts, dates, memos = _worker_ledger
+    return [
+        [
+            match for match in service._rank_matches(
+                t_amt, t_date, t_desc, service._prefilter_candidates(t_amt, t_date, amounts, dates),
+                amounts, dates, memos, limit=None
+            )
+            if match['score'] >= min_confidence
+        ]
+        for t_amt, t_date, t_desc in chunk
+    ]
+
+# Plain stand-ins for the ORM rows run_reconcile reads, so they can be sent to worker processes
+LedgerValues = namedtuple('LedgerValues', ['id', 'amount_base', 'entry_date', 'memo'])
+TransactionValues = namedtuple(
+    'TransactionValues', ['id', 'amount_base', 'transaction_date', 'description_normalized']
+)
+
+# Ledger entries indexed once for run_reconcile; see ReconciliationService._index_ledger
+IndexedLedger = namedtuple(
+    'IndexedLedger', ['entries', 'amounts', 'dates', 'by_amount', 'sorted_amounts', 'descs', 'has_desc']
+)
+
+# Scoring service, indexed ledger and run_reconcile parameters of a worker process
+_worker_unified = None
+
+def _init_unified_worker(ledger_values, params):
+    """Process pool initializer: index the ledger once per worker and keep run_reconcile's parameters"""
+    global _worker_unified
+    service = ReconciliationService(None)
+    _worker_unified = (service, service._index_ledger(ledger_values), params)
+
+def _rank_unified_chunk(chunk):
+    """Run_reconcile candidates of each transaction against every ledger entry, best first"""
+    service, ledger, (amount_tolerance, date_window_days, fuzzy_threshold, partial_max_txns, weights) = _worker_unified
+    ranked = []
+    for txn in chunk:
+        nearby, fuzzy_candidates = service._nearby_candidates(txn, ledger, None, amount_tolerance, fuzzy_threshold)
+        ranked.append([
+            # Weaker candidates can never be accepted, whichever entries are still available
+            candidate for candidate in service._rank_unified_matches(
+                txn, [ledger.entries[i] for i in nearby], amount_tolerance,
+                date_window_days, fuzzy_threshold, partial_max_txns, weights,
+                ledger_amounts=ledger.amounts[nearby],
+                ledger_dates=ledger.dates[nearby],
+                fuzzy_candidates=fuzzy_candidates
+            )
+            if candidate['score'] >= 0.5
+        ])
+    return ranked
 
 class ReconciliationService:
     def __init__(self, db: Session):
         self.db = db
+        # Description similarity by transaction description, then memo; lives as long as the service
+        self._similarity_cache: Dict[str, Dict[str, float]] = {}
 
     async def auto_reconcile(
         self,
@@ -24,26 +166,42 @@ class ReconciliationService:
         min_confidence: float = 0.8
     ) -> List[Dict[str, Any]]:
         """Perform automatic reconciliation with multiple matching strategies"""
+        # The sweep is blocking queries and CPU work; keep it off the event loop
+        return await asyncio.to_thread(
+            self._auto_reconcile, start_date, end_date, account_ids, min_confidence
+        )
+
+    def _auto_reconcile(
+        self,
+        start_date: Optional[date],
+        end_date: Optional[date],
+        account_ids: Optional[List[int]],
+        min_confidence: float
+    ) -> List[Dict[str, Any]]:
+        """Blocking body of auto_reconcile, run on a worker thread"""
         
         # Get unreconciled transactions
-        transactions_query = self.db.query(TransactionClean).filter(
-            ~TransactionClean.id.in_(
-                self.db.query(Reconciliation.transaction_clean_id).filter(
-                    Reconciliation.status != 'rejected'
-                )
-            )
-        )
+        transactions_query = self.db.query(TransactionClean).filter(self._unreconciled_filter())
         
         if start_date:
             transactions_query = transactions_query.filter(TransactionClean.transaction_date >= start_date)
         if end_date:
             transactions_query = transactions_query.filter(TransactionClean.transaction_date <= end_date)
         
-        transactions = transactions_query.all()
+        # Count, date span and absolute amount range of those transactions, computed by the database
+        transaction_count, first_date, last_date, smallest, largest = transactions_query.with_entities(
+            func.count(TransactionClean.id),
+            func.min(TransactionClean.transaction_date),
+            func.max(TransactionClean.transaction_date),
+            func.min(func.abs(TransactionClean.amount_base)),
+            func.max(func.abs(TransactionClean.amount_base))
+        ).one()
+        if first_date is None:
+            return []
         
         # Get unreconciled ledger entries
         ledger_query = self.db.query(LedgerEntry).filter(
-            LedgerEntry.is_reconciled == "false"
+            LedgerEntry.is_reconciled.is_(False)
         )
         
         if start_date:
@@ -51,149 +209,322 @@ class ReconciliationService:
         if end_date:
             ledger_query = ledger_query.filter(LedgerEntry.entry_date <= end_date)
         
-        ledger_entries = ledger_query.all()
-        
-        reconciliations = []
-        
-        for transaction in transactions:
-            best_matches = self._find_best_matches(transaction, ledger_entries)
-            
-            for match in best_matches:
-                if match['score'] >= min_confidence:
-                    reconciliation = self._create_reconciliation(transaction, match)
-                    reconciliations.append(reconciliation)
-                    
-                    # Remove matched ledger entry from available entries
-                    if match['ledger_entry']:
-                        ledger_entries = [le for le in ledger_entries if le.id != match['ledger_entry'].id]
-                    break  # Only match each transaction once
+        # Entries outside every transaction's date window or amount tolerance can't match,
+        # so the database leaves them out. Bounds are a cent loose to absorb float rounding.
+        window = timedelta(days=_candidate_date_window())
+        ledger_query = ledger_query.filter(
+            LedgerEntry.entry_date >= datetime.combine(first_date.date() - window, datetime.min.time()),
+            LedgerEntry.entry_date < datetime.combine(last_date.date() + window + timedelta(days=1), datetime.min.time()),
+            func.abs(LedgerEntry.amount_base).between(smallest * 0.9 - 0.01, largest / 0.9 + 0.01)
+        )
         
-        return reconciliations
-
-    def _find_best_matches(self, transaction: TransactionClean, ledger_entries: List[LedgerEntry]) -> List[Dict[str, Any]]:
-        """Find best matches for a transaction using multiple strategies"""
-        matches = []
+        # Only the columns matching reads, as plain rows rather than tracked ORM objects.
+        # Id order keeps tie-breaking between equal scores independent of the index used.
+        ledger_entries = ledger_query.with_entities(
+            LedgerEntry.id, LedgerEntry.amount_base, LedgerEntry.entry_date, LedgerEntry.memo
+        ).order_by(LedgerEntry.id).all()
+        
+        # Ledger amounts and dates as arrays, built once; matched entries are masked out
+        amounts = np.abs(np.array([le.amount_base for le in ledger_entries], dtype=np.float64))
+        dates = np.array([le.entry_date.toordinal() for le in ledger_entries], dtype=np.int32)
+        available = np.ones(len(ledger_entries), dtype=bool)
+        # Lowercased, punctuation-free memos, processed once rather than per comparison
+        memos = [default_process(le.memo or "") for le in ledger_entries]
+        
+        # Pairs that already have a reconciliation can't be proposed again. Pending and approved
+        # transactions are filtered out above, so these are rejected matches; the transaction falls
+        # back to its next-best entry and the entry stays free for everyone else.
+        positions = {le.id: i for i, le in enumerate(ledger_entries)}
+        existing_pairs = defaultdict(list)
+        for transaction_id, ledger_entry_id in self.db.query(
+            Reconciliation.transaction_clean_id, Reconciliation.ledger_entry_id
+        ).filter(
+            Reconciliation.transaction_clean_id.in_(transactions_query.with_entities(TransactionClean.id)),
+            Reconciliation.ledger_entry_id.isnot(None)
+        ):
+            if ledger_entry_id in positions:
+                existing_pairs[transaction_id].append(positions[ledger_entry_id])
+        
+        matched = []
+        
+        # Stream transactions in batches as plain rows; only matched ones stay referenced
+        transactions = transactions_query.with_entities(
+            TransactionClean.id,
+            TransactionClean.transaction_date,
+            TransactionClean.amount_base,
+            TransactionClean.description_normalized,
+            TransactionClean.counterparty_normalized
+        ).execution_options(stream_results=True).yield_per(1000)
+        
+        workers = settings.RECONCILIATION_WORKERS or os.cpu_count() or 1
+        ranked = None
+        if workers > 1 and transaction_count >= settings.RECONCILIATION_PARALLEL_MIN_TRANSACTIONS:
+            transactions = transactions.all()
+            ranked = self._rank_in_worker_processes(
+                [self._transaction_values(transaction) for transaction in transactions],
+                amounts, dates, memos, min_confidence, workers
+            )
         
-        for ledger_entry in ledger_entries:
-            # Strategy 1: Exact match (amount and date within tolerance)
-            exact_match = self._check_exact_match(transaction, ledger_entry)
-            if exact_match:
-                matches.append(exact_match)
-                continue
+        for position, transaction in enumerate(transactions):
+            if ranked is None:
+                t_amt, t_date, t_desc = self._transaction_values(transaction)
+                candidates = self._prefilter_candidates(t_amt, t_date, amounts, dates)
+                candidates = candidates[available[candidates]]
+                if transaction.id in existing_pairs:
+                    candidates = candidates[~np.isin(candidates, existing_pairs[transaction.id])]
+                best = self._rank_matches(t_amt, t_date, t_desc, candidates, amounts, dates, memos)
+                match = best[0] if best else None
+            else:
+                # Ranked against every entry in a worker; skip entries claimed by earlier transactions
+                # and pairs that already exist. The ranking is a stable sort, so this picks what the
+                # in-process path would.
+                excluded = existing_pairs.get(transaction.id, ())
+                match = next((
+                    match for match in ranked[position]
+                    if available[match['ledger_entry']] and match['ledger_entry'] not in excluded
+                ), None)
             
-            # Strategy 2: Windowed match (amount exact, date within window)
-            windowed_match = self._check_windowed_match(transaction, ledger_entry)
-            if windowed_match:
-                matches.append(windowed_match)
+            # Only the best match counts, and only if it is confident enough
+            if match is None or match['score'] < min_confidence:
                 continue
             
-            # Strategy 3: Fuzzy match (amount close, description similar)
-            fuzzy_match = self._check_fuzzy_match(transaction, ledger_entry)
-            if fuzzy_match:
-                matches.append(fuzzy_match)
-        
-        # Sort by score descending
-        matches.sort(key=lambda x: x['score'], reverse=True)
-        return matches[:3]  # Return top 3 matches
-
-    def _check_exact_match(self, transaction: TransactionClean, ledger_entry: LedgerEntry) -> Optional[Dict[str, Any]]:
-        """Check for exact amount and date match"""
-        amount_match = abs(abs(transaction.amount_base) - abs(ledger_entry.amount_base)) < 0.01
-        date_diff = abs((transaction.transaction_date.date() - ledger_entry.entry_date.date()).days)
-        date_match = date_diff <= 1  # Allow 1 day tolerance
-        
-        if amount_match and date_match:
-            return {
-                'ledger_entry': ledger_entry,
-                'match_type': 'exact',
-                'score': 1.0,
-                'amount_difference': abs(transaction.amount_base) - abs(ledger_entry.amount_base),
-                'date_difference_days': date_diff,
-                'description_similarity': None
-            }
-        
-        return None
-
-    def _check_windowed_match(self, transaction: TransactionClean, ledger_entry: LedgerEntry) -> Optional[Dict[str, Any]]:
-        """Check for windowed match (exact amount, wider date tolerance)"""
-        amount_match = abs(abs(transaction.amount_base) - abs(ledger_entry.amount_base)) < 0.01
-        date_diff = abs((transaction.transaction_date.date() - ledger_entry.entry_date.date()).days)
-        date_window = date_diff <= settings.RECONCILIATION_DATE_TOLERANCE_DAYS
-        
-        if amount_match and date_window:
-            score = 0.9 - (date_diff * 0.1)  # Decrease score based on date difference
-            return {
-                'ledger_entry': ledger_entry,
-                'match_type': 'windowed',
-                'score': max(0.7, score),
-                'amount_difference': abs(transaction.amount_base) - abs(ledger_entry.amount_base),
-                'date_difference_days': date_diff,
-                'description_similarity': None
+            # Remove matched ledger entry from available entries
+            available[match['ledger_entry']] = False
+            match['ledger_entry'] = ledger_entries[match['ledger_entry']]
+            matched.append((transaction, match))
+        
+        # Insert every match with one INSERT ... ON CONFLICT DO NOTHING and commit once. Existing
+        # pairs were excluded above; the conflict clause only guards against a concurrent sweep.
+        inserted = {}
+        if matched:
+            stmt = dialect_insert(self.db, Reconciliation).on_conflict_do_nothing(
+                index_elements=['transaction_clean_id', 'ledger_entry_id']
+            ).returning(Reconciliation.transaction_clean_id, Reconciliation.id, Reconciliation.created_at)
+            inserted = {
+                row.transaction_clean_id: row
+                for row in self.db.execute(
+                    stmt,
+                    [self._build_reconciliation_row(transaction, match) for transaction, match in matched],
+                    # Send NULL similarities as values so rows with and without one share a batch
+                    execution_options={'render_nulls': True}
+                )
             }
+        reconciliations = [
+            self._reconciliation_result(transaction, match, inserted[transaction.id])
+            for transaction, match in matched
+            if transaction.id in inserted
+        ]
+        self.db.commit()
         
-        return None
+        return reconciliations
 
-    def _check_fuzzy_match(self, transaction: TransactionClean, ledger_entry: LedgerEntry) -> Optional[Dict[str, Any]]:
-        """Check for fuzzy match based on description similarity"""
-        # Amount should be reasonably close (within 10%)
-        amount_diff = abs(abs(transaction.amount_base) - abs(ledger_entry.amount_base))
-        amount_tolerance = max(abs(transaction.amount_base), abs(ledger_entry.amount_base)) * 0.1
-        
-        if amount_diff > amount_tolerance:
-            return None
-        
-        # Date should be within reasonable window
-        date_diff = abs((transaction.transaction_date.date() - ledger_entry.entry_date.date()).days)
-        if date_diff > settings.RECONCILIATION_DATE_TOLERANCE_DAYS * 2:
-            return None
-        
-        # Calculate description similarity
-        txn_desc = (transaction.description_normalized or "").strip()
-        ledger_desc = (ledger_entry.memo or "").strip()
-        
-        if not txn_desc or not ledger_desc:
-            return None
-        
-        similarity = fuzz.ratio(txn_desc, ledger_desc) / 100.0
-        
-        if similarity >= settings.RECONCILIATION_FUZZY_MATCH_THRESHOLD:
-            # Calculate composite score
-            amount_score = 1.0 - (amount_diff / max(abs(transaction.amount_base), abs(ledger_entry.amount_base)))
-            date_score = max(0, 1.0 - (date_diff / (settings.RECONCILIATION_DATE_TOLERANCE_DAYS * 2)))
-            
-            composite_score = (similarity * 0.5) + (amount_score * 0.3) + (date_score * 0.2)
-            
-            return {
-                'ledger_entry': ledger_entry,
-                'match_type': 'fuzzy',
-                'score': composite_score,
-                'amount_difference': abs(transaction.amount_base) - abs(ledger_entry.amount_base),
-                'date_difference_days': date_diff,
-                'description_similarity': similarity
-            }
-        
-        return None
-
-    def _create_reconciliation(self, transaction: TransactionClean, match: Dict[str, Any]) -> Dict[str, Any]:
-        """Create reconciliation record"""
-        reconciliation = Reconciliation(
-            transaction_clean_id=transaction.id,
-            ledger_entry_id=match['ledger_entry'].id if match['ledger_entry'] else None,
-            match_type=match['match_type'],
-            match_score=match['score'],
-            amount_difference=match['amount_difference'],
-            date_difference_days=match['date_difference_days'],
-            description_similarity=match.get('description_similarity'),
-            status='pending'
+    def _transaction_values(self, transaction: Row) -> Tuple[float, int, str]:
+        """Absolute amount, date ordinal and processed description, computed once per transaction"""
+        return (
+            abs(transaction.amount_base),
+            transaction.transaction_date.toordinal(),
+            default_process(transaction.description_normalized or "")
+        )
+
+    def _rank_matches(
+        self,
+        t_amt: float,
+        t_date: int,
+        t_desc: str,
+        candidates: np.ndarray,
+        amounts: np.ndarray,
+        dates: np.ndarray,
+        memos: List[str],
+        limit: Optional[int] = 1
+    ) -> List[Dict[str, Any]]:
+        """Best matches of one transaction among candidate ledger indices; 'ledger_entry' holds the index"""
+        candidate_amounts = amounts[candidates]
+        candidate_dates = dates[candidates]
+        similarities = self._description_similarities(t_desc, [memos[i] for i in candidates])
+        fuzzy_scores = _fuzzy_scores(
+            similarities,
+            t_amt,
+            candidate_amounts,
+            np.abs(candidate_dates - t_date),
+            settings.RECONCILIATION_DATE_TOLERANCE_DAYS * 2
+        )
+        return self._find_best_matches(
+            t_amt, t_date, candidates.tolist(),
+            candidate_amounts, candidate_dates, similarities, fuzzy_scores, limit
+        )
+
+    def _rank_in_worker_processes(
+        self,
+        values: List[Tuple[float, int, str]],
+        amounts: np.ndarray,
+        dates: np.ndarray,
+        memos: List[str],
+        min_confidence: float,
+        workers: int
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Rank each transaction's confident matches across worker processes.
+        
+        Workers see every ledger entry and no claims; auto_reconcile resolves claims in order.
+        The ledger arrays are sent once per worker through the pool initializer.
+        """
+        chunk_size = -(-len(values) // (workers * 4))
+        chunks = [values[i:i + chunk_size] for i in range(0, len(values), chunk_size)]
+        # Spawned rather than forked workers don't inherit the server's threads and connections
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_match_worker,
+            initargs=(
+                amounts, dates, memos,
+                settings.RECONCILIATION_DATE_TOLERANCE_DAYS, settings.RECONCILIATION_FUZZY_MATCH_THRESHOLD
+            )
+        ) as executor:
+            return list(itertools.chain.from_iterable(
+                executor.map(_rank_transaction_chunk, chunks, itertools.repeat(min_confidence))
+            ))
+
+    def _unreconciled_filter(self):
+        """Transactions without a pending or approved reconciliation, as a NOT EXISTS anti-join"""
+        return ~exists().where(
+            Reconciliation.transaction_clean_id == TransactionClean.id,
+            Reconciliation.status != 'rejected'
+        )
+
+    def _prefilter_candidates(
+        self,
+        t_amt: float,
+        t_date: int,
+        amounts: np.ndarray,
+        dates: np.ndarray
+    ) -> np.ndarray:
+        """Indices of ledger entries close enough in amount and date for any matching strategy"""
+        amount_diff = np.abs(amounts - t_amt)
+        date_diff = np.abs(dates - t_date)
+        
+        # Exact/windowed need the amount within a cent, fuzzy within 10% of the larger amount
+        amount_close = (amount_diff < 0.01) | (amount_diff <= np.maximum(amounts, t_amt) * 0.1)
+        date_close = date_diff <= _candidate_date_window()
+        
+        return np.flatnonzero(amount_close & date_close)
+
+    def _description_similarities(self, txn_desc: str, memos: List[str]) -> np.ndarray:
+        """
+        fuzz.token_set_ratio of a description against each memo as a 0-1 score.
+        
+        Both sides are expected to be preprocessed with rapidfuzz's default_process already.
+        Pairs below the fuzzy threshold score 0; pairs missing a description are NaN,
+        which fails every threshold comparison.
+        """
+        if not txn_desc or not memos:
+            return np.full(len(memos), np.nan)
+        
+        # Bank feeds repeat the same merchant text, so score each distinct pair once per service
+        cached = self._similarity_cache.setdefault(txn_desc, {})
+        missing = [memo for memo in dict.fromkeys(memos) if memo not in cached]
+        if missing:
+            # One C++ call per transaction; the cutoff lets rapidfuzz abandon hopeless pairs early.
+            # Candidate lists are short, so a single worker beats spinning up a thread pool per row.
+            # Token sets ignore repeated and reordered words, so a memo that merely repeats the
+            # merchant name still scores as the same description.
+            scores = process.cdist(
+                [txn_desc], missing,
+                scorer=fuzz.token_set_ratio,
+                score_cutoff=settings.RECONCILIATION_FUZZY_MATCH_THRESHOLD * 100,
+                dtype=np.float64
+            )[0] / 100.0
+            scores[np.fromiter(map(len, missing), dtype=np.int64, count=len(missing)) == 0] = np.nan
+            cached.update(zip(missing, scores.tolist()))
+        return np.fromiter(map(cached.__getitem__, memos), dtype=np.float64, count=len(memos))
+
+    def _find_best_matches(
+        self,
+        t_amt: float,
+        t_date: int,
+        ledger_entries: List[Any],
+        amounts: np.ndarray,
+        dates: np.ndarray,
+        similarities: np.ndarray,
+        fuzzy_scores: np.ndarray,
+        limit: Optional[int] = 1
+    ) -> List[Dict[str, Any]]:
+        """
+        Find best matches for a transaction using multiple strategies.
+        
+        The transaction is given by its absolute amount and date ordinal; amounts, dates
+        and scores are parallel arrays over the candidate ledger entries, and each match's
+        'ledger_entry' is the matching item of ledger_entries. By default only the best match
+        is returned; limit=None keeps every match.
+        """
+        amount_diffs = t_amt - amounts
+        abs_amount_diffs = np.abs(amount_diffs)
+        date_diffs = np.abs(dates - t_date)
+        
+        # Every strategy is evaluated over all candidates at once; the first that applies wins.
+        # Strategy 1: Exact match (amount within a cent, date within 1 day)
+        amount_match = abs_amount_diffs < 0.01
+        is_exact = amount_match & (date_diffs <= 1)
+        # Strategy 2: Windowed match (amount exact, date within the configured tolerance)
+        is_windowed = amount_match & (date_diffs <= settings.RECONCILIATION_DATE_TOLERANCE_DAYS) & ~is_exact
+        # Strategy 3: Fuzzy match (amount within 10%, date within twice the tolerance, description
+        # similar). A missing description leaves the similarity NaN, which fails this check.
+        is_fuzzy = (
+            ~(is_exact | is_windowed)
+            & (abs_amount_diffs <= np.maximum(amounts, t_amt) * 0.1)
+            & (date_diffs <= settings.RECONCILIATION_DATE_TOLERANCE_DAYS * 2)
+            & (similarities >= settings.RECONCILIATION_FUZZY_MATCH_THRESHOLD)
         )
         
-        self.db.add(reconciliation)
-        self.db.commit()
+        # Windowed scores drop 0.1 per day apart, down to 0.7
+        scores = np.where(
+            is_exact, 1.0, np.where(is_windowed, np.maximum(0.7, 0.9 - date_diffs * 0.1), fuzzy_scores)
+        )
         
+        # Score descending; equal scores keep candidate order
+        found = np.flatnonzero(is_exact | is_windowed | is_fuzzy)
+        if limit == 1:
+            # A single pass: argmax returns the first of equal maxima, as the stable sort would
+            best = [int(found[np.argmax(scores[found])])] if found.size else []
+        else:
+            best = found[np.argsort(-scores[found], kind='stable')][:limit].tolist()
+        
+        # Result dicts only for the matches returned
+        return [
+            {
+                'match_type': 'exact' if is_exact[i] else 'windowed' if is_windowed[i] else 'fuzzy',
+                'score': float(scores[i]),
+                'amount_difference': float(amount_diffs[i]),
+                'date_difference_days': int(date_diffs[i]),
+                'description_similarity': float(similarities[i]) if is_fuzzy[i] else None,
+                'ledger_entry': ledger_entries[i]
+            }
+            for i in best
+        ]
+
+    def _build_reconciliation_row(self, transaction: Row, match: Dict[str, Any]) -> Dict[str, Any]:
+        """Column values of the reconciliation record to insert for a match"""
+        return {
+            'transaction_clean_id': transaction.id,
+            'ledger_entry_id': match['ledger_entry'].id if match['ledger_entry'] else None,
+            'match_type': match['match_type'],
+            'match_score': match['score'],
+            'amount_difference': match['amount_difference'],
+            'date_difference_days': match['date_difference_days'],
+            'description_similarity': match.get('description_similarity'),
+            'status': 'pending'
+        }
+
+    def _reconciliation_result(
+        self,
+        transaction: Row,
+        match: Dict[str, Any],
+        inserted: Row
+    ) -> Dict[str, Any]:
+        """Describe an inserted reconciliation record (its returned id and created_at) and both sides"""
         return {
-            'id': reconciliation.id,
+            'id': inserted.id,
             'transaction_clean_id': transaction.id,
-            'ledger_entry_id': reconciliation.ledger_entry_id,
+            'ledger_entry_id': match['ledger_entry'].id if match['ledger_entry'] else None,
             'match_type': match['match_type'],
             'match_score': match['score'],
             'amount_difference': match['amount_difference'],
@@ -211,7 +542,7 @@ class ReconciliationService:
                 'amount': match['ledger_entry'].amount_base,
                 'memo': match['ledger_entry'].memo
             } if match['ledger_entry'] else None,
-            'created_at': reconciliation.created_at
+            'created_at': inserted.created_at
         }
 
     def review_reconciliation(
@@ -240,7 +571,7 @@ class ReconciliationService:
                 LedgerEntry.id == reconciliation.ledger_entry_id
             ).first()
             if ledger_entry:
-                ledger_entry.is_reconciled = "true"
+                ledger_entry.is_reconciled = True
         
         self.db.commit()
         
@@ -280,11 +611,7 @@ class ReconciliationService:
         if transaction_type == "bank":
             # Get bank transactions not in reconciliations
             unmatched = self.db.query(TransactionClean).filter(
-                ~TransactionClean.id.in_(
-                    self.db.query(Reconciliation.transaction_clean_id).filter(
-                        Reconciliation.status != 'rejected'
-                    )
-                )
+                self._unreconciled_filter()
             ).offset(skip).limit(limit).all()
             
             return [{
@@ -299,8 +626,8 @@ class ReconciliationService:
         else:  # ledger
             # Get ledger entries not reconciled
             unmatched = self.db.query(LedgerEntry).filter(
-                LedgerEntry.is_reconciled == "false"
-            ).offset(skip).limit(limit).all()
+                LedgerEntry.is_reconciled.is_(False)
+            ).order_by(LedgerEntry.id).offset(skip).limit(limit).all()
             
             return [{
                 'id': le.id,
@@ -323,6 +650,24 @@ class ReconciliationService:
         weights: Optional[Dict[str, float]] = None
     ) -> Dict[str, Any]:
         """Enhanced reconciliation engine with exact/windowed/fuzzy/partial matching"""
+        # Same as auto_reconcile: the blocking work runs on a worker thread
+        return await asyncio.to_thread(
+            self._run_reconcile, start_date, end_date, account_ids, amount_tolerance,
+            date_window_days, fuzzy_threshold, partial_max_txns, weights
+        )
+
+    def _run_reconcile(
+        self,
+        start_date: Optional[date],
+        end_date: Optional[date],
+        account_ids: Optional[List[int]],
+        amount_tolerance: float,
+        date_window_days: int,
+        fuzzy_threshold: float,
+        partial_max_txns: int,
+        weights: Optional[Dict[str, float]]
+    ) -> Dict[str, Any]:
+        """Blocking body of run_reconcile, run on a worker thread"""
         
         if weights is None:
             weights = {'exact': 0.5, 'windowed': 0.2, 'fuzzy': 0.2, 'partial': 0.1}
@@ -331,8 +676,11 @@ class ReconciliationService:
         transactions = self._get_unreconciled_transactions(start_date, end_date, account_ids)
         ledger_entries = self._get_unreconciled_ledger_entries(start_date, end_date)
         
+        ledger = self._index_ledger(ledger_entries)
+        available = np.ones(len(ledger_entries), dtype=bool)
+        ledger_index = {le.id: i for i, le in enumerate(ledger_entries)}
+        
         matches = []
-        matched_ledger_ids = set()
         matched_txn_ids = set()
         
         # Track matching statistics
@@ -340,17 +688,38 @@ class ReconciliationService:
             'exact': 0, 'windowed': 0, 'fuzzy': 0, 'partial': 0
         }
         
-        for txn in transactions:
+        workers = settings.RECONCILIATION_WORKERS or os.cpu_count() or 1
+        ranked = None
+        if workers > 1 and len(transactions) >= settings.RECONCILIATION_PARALLEL_MIN_TRANSACTIONS:
+            ranked = self._rank_unified_in_worker_processes(
+                transactions, ledger_entries, workers,
+                (amount_tolerance, date_window_days, fuzzy_threshold, partial_max_txns, weights)
+            )
+        
+        for position, txn in enumerate(transactions):
             if txn.id in matched_txn_ids:
                 continue
-                
-            available_ledgers = [le for le in ledger_entries if le.id not in matched_ledger_ids]
             
-            # Try all matching strategies
-            best_match = self._find_best_unified_match(
-                txn, available_ledgers, amount_tolerance, 
-                date_window_days, fuzzy_threshold, partial_max_txns, weights
-            )
+            if ranked is None:
+                nearby, fuzzy_candidates = self._nearby_candidates(
+                    txn, ledger, available, amount_tolerance, fuzzy_threshold
+                )
+                
+                # Try all matching strategies
+                best_match = self._find_best_unified_match(
+                    txn, [ledger_entries[i] for i in nearby], amount_tolerance, 
+                    date_window_days, fuzzy_threshold, partial_max_txns, weights,
+                    ledger_amounts=ledger.amounts[nearby],
+                    ledger_dates=ledger.dates[nearby],
+                    fuzzy_candidates=fuzzy_candidates
+                )
+            else:
+                # Ranked against every entry in a worker; the first candidate whose entries are all
+                # still available is what the in-process path would pick
+                best_match = next((
+                    candidate for candidate in ranked[position]
+                    if all(available[ledger_index[ledger_id]] for ledger_id in candidate['ledger_ids'])
+                ), None)
             
             if best_match and best_match['score'] >= 0.5:  # Minimum threshold
                 matches.append({
@@ -363,8 +732,8 @@ class ReconciliationService:
                 
                 # Mark as matched
                 matched_txn_ids.add(txn.id)
-                if best_match.get('ledger_ids'):
-                    matched_ledger_ids.update(best_match['ledger_ids'])
+                for ledger_id in best_match.get('ledger_ids', []):
+                    available[ledger_index[ledger_id]] = False
                     
                 match_stats[best_match['match_type']] += 1
         
@@ -382,15 +751,81 @@ class ReconciliationService:
             'total_processed': total_txns
         }
     
+    def _index_ledger(self, ledger_entries) -> IndexedLedger:
+        """
+        Ledger entries with absolute amounts, date ordinals and cleaned memos, computed once.
+        
+        by_amount orders entry indices by absolute amount, so the exact, windowed and partial
+        strategies only look at entries within reach of each transaction's amount.
+        """
+        amounts = np.array([abs(float(le.amount_base)) for le in ledger_entries], dtype=np.float64)
+        by_amount = np.argsort(amounts, kind='stable')
+        descs = [_clean_description(le.memo or "") for le in ledger_entries]
+        return IndexedLedger(
+            entries=ledger_entries,
+            amounts=amounts,
+            dates=np.array([le.entry_date.toordinal() for le in ledger_entries], dtype=np.int32),
+            by_amount=by_amount,
+            sorted_amounts=amounts[by_amount],
+            descs=descs,
+            has_desc=np.array([bool(desc) for desc in descs], dtype=bool)
+        )
+    
+    def _nearby_candidates(self, txn, ledger: IndexedLedger, available, amount_tolerance, fuzzy_threshold):
+        """
+        Indices of the entries within reach of txn's amount, and (entry, description similarity)
+        pairs of the entries whose memo clears the fuzzy threshold. available masks out claimed
+        entries; None keeps every entry.
+        """
+        nearby = self._amount_block(abs(float(txn.amount_base)), amount_tolerance, ledger.by_amount, ledger.sorted_amounts)
+        fuzzy_mask = ledger.has_desc
+        if available is not None:
+            nearby = nearby[available[nearby]]
+            fuzzy_mask = fuzzy_mask & available
+        
+        # Fuzzy matching has no amount or date bound, so it scores every memo in one call
+        fuzzy_candidates = []
+        txn_desc = _clean_description(txn.description_normalized or "")
+        if txn_desc and ledger.descs:
+            similarities = process.cdist(
+                [txn_desc], ledger.descs,
+                scorer=fuzz.token_set_ratio,
+                score_cutoff=fuzzy_threshold * 100,
+                dtype=np.float64
+            )[0] / 100.0
+            fuzzy_candidates = [
+                (ledger.entries[i], float(similarities[i]))
+                for i in np.flatnonzero((similarities >= fuzzy_threshold) & fuzzy_mask).tolist()
+            ]
+        return nearby, fuzzy_candidates
+    
+    def _rank_unified_in_worker_processes(self, transactions, ledger_entries, workers, params):
+        """
+        Rank each transaction's run_reconcile candidates across worker processes.
+        
+        Workers see every ledger entry and no claims; run_reconcile resolves claims in order.
+        Rows travel as plain tuples, and the ledger is sent once per worker.
+        """
+        values = [
+            TransactionValues(txn.id, txn.amount_base, txn.transaction_date, txn.description_normalized)
+            for txn in transactions
+        ]
+        chunk_size = -(-len(values) // (workers * 4))
+        chunks = [values[i:i + chunk_size] for i in range(0, len(values), chunk_size)]
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_unified_worker,
+            initargs=(
+                [LedgerValues(le.id, le.amount_base, le.entry_date, le.memo) for le in ledger_entries],
+                params
+            )
+        ) as executor:
+            return list(itertools.chain.from_iterable(executor.map(_rank_unified_chunk, chunks)))
+    
     def _get_unreconciled_transactions(self, start_date, end_date, account_ids):
         """Get unreconciled transactions"""
-        query = self.db.query(TransactionClean).filter(
-            ~TransactionClean.id.in_(
-                self.db.query(Reconciliation.transaction_clean_id).filter(
-                    Reconciliation.status != 'rejected'
-                )
-            )
-        )
+        query = self.db.query(TransactionClean).filter(self._unreconciled_filter())
         
         if start_date:
             query = query.filter(TransactionClean.transaction_date >= start_date)
@@ -403,7 +838,7 @@ class ReconciliationService:
     
     def _get_unreconciled_ledger_entries(self, start_date, end_date):
         """Get unreconciled ledger entries"""
-        query = self.db.query(LedgerEntry).filter(LedgerEntry.is_reconciled == "false")
+        query = self.db.query(LedgerEntry).filter(LedgerEntry.is_reconciled.is_(False))
         
         if start_date:
             query = query.filter(LedgerEntry.entry_date >= start_date)
@@ -412,27 +847,64 @@ class ReconciliationService:
             
         return query.all()
     
+    def _amount_block(self, t_amt, amount_tolerance, by_amount, sorted_amounts):
+        """
+        Ledger indices, in ledger order, whose absolute amount is within the amount tolerance
+        or 10% of t_amt; by_amount orders ledger indices by the absolute amounts in sorted_amounts.
+        """
+        low = min(t_amt - amount_tolerance, t_amt * 0.9)
+        high = max(t_amt + amount_tolerance, t_amt / 0.9)
+        # A cent of slack absorbs float rounding; the strategies recheck every pair
+        start = np.searchsorted(sorted_amounts, low - 0.01, side='left')
+        end = np.searchsorted(sorted_amounts, high + 0.01, side='right')
+        return np.sort(by_amount[start:end])
+    
     def _find_best_unified_match(self, txn, ledgers, amount_tolerance, date_window_days, 
-                                fuzzy_threshold, partial_max_txns, weights):
+                                fuzzy_threshold, partial_max_txns, weights, ledger_amounts=None,
+                                ledger_dates=None, fuzzy_candidates=None):
         """Find best match using unified scoring across all strategies"""
+        ranked = self._rank_unified_matches(
+            txn, ledgers, amount_tolerance, date_window_days, fuzzy_threshold, partial_max_txns,
+            weights, ledger_amounts, ledger_dates, fuzzy_candidates
+        )
+        return ranked[0] if ranked else None
+    
+    def _rank_unified_matches(self, txn, ledgers, amount_tolerance, date_window_days, 
+                              fuzzy_threshold, partial_max_txns, weights, ledger_amounts=None,
+                              ledger_dates=None, fuzzy_candidates=None):
+        """
+        Candidates across all strategies with a positive unified score, best first.
+        
+        Equal scores keep strategy order, so the first candidate is what a scan for the
+        strictly highest score would pick.
+        
+        ledger_amounts and ledger_dates are the absolute amounts and date ordinals of ledgers.
+        fuzzy_candidates, when given, are precomputed (ledger, description similarity) pairs
+        that replace the fuzzy scan of ledgers, so ledgers can be just an _amount_block.
+        """
+        if ledger_amounts is None:
+            ledger_amounts = np.array([abs(float(le.amount_base)) for le in ledgers], dtype=np.float64)
+            ledger_dates = np.array([le.entry_date.toordinal() for le in ledgers], dtype=np.int32)
+        
+        # Amount and date tests for every ledger at once; match dicts only for survivors
+        amount_close = np.abs(ledger_amounts - abs(float(txn.amount_base))) <= amount_tolerance
+        date_diffs = np.abs(ledger_dates - txn.transaction_date.toordinal())
         
         candidates = []
         
         # 1. Exact matches
-        for ledger in ledgers:
-            exact_result = self._match_exact(txn, ledger, amount_tolerance)
-            if exact_result:
-                candidates.append(exact_result)
+        for i in np.flatnonzero(amount_close & (date_diffs <= 1)):
+            candidates.append(self._match_exact(txn, ledgers[i], amount_tolerance))
         
         # 2. Windowed matches  
-        for ledger in ledgers:
-            windowed_result = self._match_windowed(txn, ledger, amount_tolerance, date_window_days)
-            if windowed_result:
-                candidates.append(windowed_result)
+        for i in np.flatnonzero(amount_close & (date_diffs <= date_window_days)):
+            candidates.append(self._match_windowed(txn, ledgers[i], amount_tolerance, date_window_days))
         
         # 3. Fuzzy matches
-        for ledger in ledgers:
-            fuzzy_result = self._match_fuzzy(txn, ledger, fuzzy_threshold)
+        if fuzzy_candidates is None:
+            fuzzy_candidates = [(ledger, None) for ledger in ledgers]
+        for ledger, similarity in fuzzy_candidates:
+            fuzzy_result = self._match_fuzzy(txn, ledger, fuzzy_threshold, similarity)
             if fuzzy_result:
                 candidates.append(fuzzy_result)
         
@@ -440,18 +912,14 @@ class ReconciliationService:
         partial_results = self._match_partial(txn, ledgers, amount_tolerance, partial_max_txns)
         candidates.extend(partial_results)
         
-        # Calculate unified scores and return best
-        best_candidate = None
-        best_score = 0
-        
+        # Calculate unified scores; the sort is stable
         for candidate in candidates:
-            unified_score = self._calculate_unified_score(candidate, weights)
-            if unified_score > best_score:
-                best_score = unified_score
-                best_candidate = candidate
-                best_candidate['score'] = unified_score
-        
-        return best_candidate
+            candidate['score'] = self._calculate_unified_score(candidate, weights)
+        return sorted(
+            (candidate for candidate in candidates if candidate['score'] > 0),
+            key=lambda candidate: candidate['score'],
+            reverse=True
+        )
     
     def _match_exact(self, txn, ledger, amount_tolerance):
         """Exact matching: amount equal & date diff ≤ 1 day"""
@@ -459,7 +927,7 @@ class ReconciliationService:
         if amount_diff > amount_tolerance:
             return None
             
-        date_diff = abs((txn.transaction_date.date() - ledger.entry_date.date()).days)
+        date_diff = abs(txn.transaction_date.toordinal() - ledger.entry_date.toordinal())
         if date_diff > 1:
             return None
             
@@ -479,7 +947,7 @@ class ReconciliationService:
         if amount_diff > amount_tolerance:
             return None
             
-        date_diff = abs((txn.transaction_date.date() - ledger.entry_date.date()).days)
+        date_diff = abs(txn.transaction_date.toordinal() - ledger.entry_date.toordinal())
         if date_diff > date_window_days:
             return None
             
@@ -496,15 +964,19 @@ class ReconciliationService:
             'explain': f'Windowed match: amount diff {amount_diff:.2f}, date diff {date_diff} days'
         }
     
-    def _match_fuzzy(self, txn, ledger, fuzzy_threshold):
-        """Fuzzy matching: description similarity ≥ threshold"""
-        txn_desc = self._clean_description(txn.description_normalized or "")
-        ledger_desc = self._clean_description(ledger.memo or "")
-        
-        if not txn_desc or not ledger_desc:
-            return None
+    def _match_fuzzy(self, txn, ledger, fuzzy_threshold, similarity=None):
+        """Fuzzy matching: description similarity ≥ threshold, unless a precomputed similarity is given"""
+        if similarity is None:
+            txn_desc = _clean_description(txn.description_normalized or "")
+            ledger_desc = _clean_description(ledger.memo or "")
             
-        similarity = fuzz.ratio(txn_desc, ledger_desc) / 100.0
+            if not txn_desc or not ledger_desc:
+                return None
+            
+            # Scores below the cutoff come back as 0 without finishing the edit distance
+            similarity = fuzz.token_set_ratio(
+                txn_desc, ledger_desc, processor=None, score_cutoff=fuzzy_threshold * 100
+            ) / 100.0
         if similarity < fuzzy_threshold:
             return None
             
@@ -512,7 +984,7 @@ class ReconciliationService:
         amount_diff_pct = abs(abs(txn.amount_base) - abs(ledger.amount_base)) / max(abs(txn.amount_base), abs(ledger.amount_base))
         amount_score = max(0, 1.0 - amount_diff_pct)
         
-        date_diff = abs((txn.transaction_date.date() - ledger.entry_date.date()).days)
+        date_diff = abs(txn.transaction_date.toordinal() - ledger.entry_date.toordinal())
         date_score = max(0, 1.0 - date_diff / 30.0)  # 30 day window
         
         fuzzy_score = similarity * 0.6 + amount_score * 0.3 + date_score * 0.1
@@ -539,9 +1011,18 @@ class ReconciliationService:
                 amount_groups[round(ledger_amount, 2)].append(ledger)
         
         results = []
-        for group_ledgers in amount_groups.values():
+        # Amount order, so which entries are still available doesn't change tie-breaking
+        for _, group_ledgers in sorted(amount_groups.items()):
+            # Any r entries sum to between the r smallest and the r largest amounts of the group,
+            # so sizes whose whole range misses the target are skipped without enumerating them
+            group_amounts = sorted(abs(le.amount_base) for le in group_ledgers)
+            slack = amount_tolerance + 1e-6  # Summation order differs from the combination sums
+            
             # Try combinations up to max_txns
             for r in range(1, min(max_txns + 1, len(group_ledgers) + 1)):
+                if (sum(group_amounts[:r]) - target_amount > slack
+                        or target_amount - sum(group_amounts[-r:]) > slack):
+                    continue
                 for combo in itertools.combinations(group_ledgers, r):
                     combo_sum = sum(abs(le.amount_base) for le in combo)
                     if abs(combo_sum - target_amount) <= amount_tolerance:
@@ -558,14 +1039,6 @@ class ReconciliationService:
         
         return results
     
-    def _clean_description(self, desc):
-        """Clean description for fuzzy matching"""
-        if not desc:
-            return ""
-        # Remove timestamps, IDs, special chars
-        cleaned = re.sub(r'\d{4}-\d{2}-\d{2}|\b\d{6,}\b|[^\w\s]', ' ', desc.lower())
-        return ' '.join(cleaned.split())
-    
     def _calculate_unified_score(self, candidate, weights):
         """Calculate unified score using weights"""
         return (
@@ -598,27 +1071,30 @@ class ReconciliationService:
             ledger_query = ledger_query.filter(LedgerEntry.entry_date <= end_date)
             recon_query = recon_query.filter(Reconciliation.created_at <= datetime.combine(end_date, datetime.max.time()))
         
-        # Get counts
-        total_transactions = txn_query.count()
-        total_ledger_entries = ledger_query.count()
+        # Get counts; both tables in one round trip
+        total_transactions, total_ledger_entries = self.db.query(
+            txn_query.with_entities(func.count(TransactionClean.id)).scalar_subquery(),
+            ledger_query.with_entities(func.count(LedgerEntry.id)).scalar_subquery()
+        ).one()
+        
+        # Reconciliation counts by status and match type in one grouped scan
+        status_counts = recon_query.with_entities(
+            Reconciliation.status,
+            Reconciliation.match_type,
+            func.count(Reconciliation.id)
+        ).group_by(Reconciliation.status, Reconciliation.match_type).all()
         
-        # Get reconciliation counts
-        matched_count = recon_query.filter(Reconciliation.status == 'approved').count()
-        pending_count = recon_query.filter(Reconciliation.status == 'pending').count()
+        matched_count = sum(count for status, _, count in status_counts if status == 'approved')
+        pending_count = sum(count for status, _, count in status_counts if status == 'pending')
         
         # Calculate unmatched
         unmatched_transactions = total_transactions - matched_count
         unmatched_ledger_entries = total_ledger_entries - matched_count
         
         # Match type breakdown
-        match_types = self.db.query(
-            Reconciliation.match_type,
-            func.count(Reconciliation.id)
-        ).filter(
-            Reconciliation.status == 'approved'
-        ).group_by(Reconciliation.match_type).all()
-        
-        match_type_breakdown = {mt[0]: mt[1] for mt in match_types}
+        match_type_breakdown = {
+            match_type: count for status, match_type, count in status_counts if status == 'approved'
+        }
         
         # Calculate rates
         match_rate = matched_count / max(total_transactions, 1)
@@ -651,8 +1127,11 @@ class ReconciliationService:
     ) -> List[Dict[str, Any]]:
         """Get reconciliation exceptions and differences"""
         
-        # Find reconciliations with significant differences
-        exceptions = self.db.query(Reconciliation).filter(
+        # Find reconciliations with significant differences; both sides are joined into the same query
+        exceptions = self.db.query(Reconciliation).options(
+            joinedload(Reconciliation.transaction_clean),
+            joinedload(Reconciliation.ledger_entry)
+        ).filter(
             or_(
                 Reconciliation.amount_difference > 1.0,  # Amount difference > $1
                 Reconciliation.date_difference_days > 5,  # Date difference > 5 days
@@ -661,19 +1140,22 @@ class ReconciliationService:
                     Reconciliation.match_score < 0.9
                 )
             )
+        ).order_by(
+            # Most severe first, using the same bands as _calculate_exception_severity
+            case(
+                (or_(func.abs(Reconciliation.amount_difference) > 100,
+                     Reconciliation.date_difference_days > 10), 0),
+                (or_(func.abs(Reconciliation.amount_difference) > 10,
+                     Reconciliation.date_difference_days > 7), 1),
+                else_=2
+            ),
+            Reconciliation.id
         ).offset(skip).limit(limit).all()
         
         result = []
         for recon in exceptions:
-            transaction = self.db.query(TransactionClean).filter(
-                TransactionClean.id == recon.transaction_clean_id
-            ).first()
-            
-            ledger_entry = None
-            if recon.ledger_entry_id:
-                ledger_entry = self.db.query(LedgerEntry).filter(
-                    LedgerEntry.id == recon.ledger_entry_id
-                ).first()
+            transaction = recon.transaction_clean
+            ledger_entry = recon.ledger_entry
             
             result.append({
                 'reconciliation_id': recon.id,
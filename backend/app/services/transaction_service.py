@@ -13,7 +13,7 @@ from app.services.data_cleaning_service import DataCleaningService
 class TransactionService:
     def __init__(self, db: Session):
         self.db = db
-        self.cleaning_service = DataCleaningService()
+        self.cleaning_service = DataCleaningService(db)
 
     async def process_upload(self, file: UploadFile, source: str) -> Dict[str, Any]:
         """Process uploaded transaction file"""
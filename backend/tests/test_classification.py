@@ -0,0 +1,130 @@
+import pytest
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.accounts import Account, ChartOfAccounts
+from app.models.transactions import TransactionClean
+from app.services.classification_service import ClassificationService, _RuleMatcher, _extract_literals
+
+
+class TestClassificationService:
+    """Test rule bootstrapping and rule-based classification"""
+
+    @pytest.fixture
+    def db(self):
+        """In-memory SQLite session with all tables created"""
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        session = sessionmaker(bind=engine)()
+        yield session
+        session.close()
+
+    @pytest.fixture
+    def classification_service(self, db):
+        return ClassificationService(db)
+
+    def test_ensure_basic_coa_is_idempotent(self, db, classification_service):
+        """Basic COA is created once, with a backing account per new code"""
+        classification_service._ensure_basic_coa()
+        classification_service._ensure_basic_coa()
+
+        coa_rows = db.query(ChartOfAccounts).all()
+        assert len(coa_rows) == 6
+        assert db.query(Account).count() == 6
+        assert all(coa.account_id is not None for coa in coa_rows)
+
+    def test_ensure_basic_coa_skips_existing_codes(self, db, classification_service):
+        """Existing COA codes are left untouched"""
+        db.add(ChartOfAccounts(code="5000", name="Custom Office"))
+        db.commit()
+
+        classification_service._ensure_basic_coa()
+
+        office = db.query(ChartOfAccounts).filter(ChartOfAccounts.code == "5000").one()
+        assert office.name == "Custom Office"
+        assert db.query(ChartOfAccounts).count() == 6
+        assert db.query(Account).count() == 5
+
+    def test_default_rules_are_shared_and_precompiled(self, db):
+        """Default rules are built once at import, not per service instance"""
+        first = ClassificationService(db)
+        second = ClassificationService(db)
+
+        assert first.default_rules is second.default_rules
+        assert all(rule['regex'].pattern == rule['keyword_regex'] for rule in first.default_rules)
+
+    def test_rule_matcher_respects_priority_across_literal_and_regex_rules(self):
+        """Literal rules and regex rules resolve to the first rule in priority order"""
+        matcher = _RuleMatcher((
+            r'(AMAZON.*OFFICE)',
+            r'(SHELL|EXXON|BP)',
+            r'(AMAZON|OFFICE DEPOT)',
+            r'(BP',  # invalid regex is skipped
+        ))
+
+        assert matcher.match("AMAZON MARKETPLACE OFFICE CHAIR") == 0
+        assert matcher.match("AMAZON SHELL STATION") == 1
+        assert matcher.match("OFFICE DEPOT #123") == 2
+        assert matcher.match("LOCAL BAKERY") is None
+
+    def test_extract_literals_only_accepts_pure_alternations(self):
+        assert _extract_literals(r'(STAPLES|Office Depot)') == ('STAPLES', 'OFFICE DEPOT')
+        assert _extract_literals(r'(AMAZON.*OFFICE|SUPPLIES)') is None
+        assert _extract_literals(r'(A)|(B)') is None
+
+    def test_classify_with_rules_uses_default_rules(self, db, classification_service):
+        """Default rules are bootstrapped and matched against description + counterparty"""
+        transaction = TransactionClean(
+            raw_id=1,
+            transaction_date=datetime(2024, 1, 15),
+            amount_base=-45.20,
+            description_normalized="Fuel purchase",
+            counterparty_normalized="Shell Oil 1234"
+        )
+
+        result = classification_service._classify_with_rules(transaction)
+
+        assert result['predicted_coa_name'] == "Vehicle Expenses"
+        assert result['confidence_score'] == 0.9
+        assert result['source'] == 'regex_rule'
+
+    @pytest.mark.asyncio
+    async def test_iter_classify_transactions_yields_and_commits_per_chunk(self, db, classification_service):
+        """Results stream in chunks and each chunk's updates are persisted"""
+        transactions = [
+            TransactionClean(
+                raw_id=i,
+                transaction_date=datetime(2024, 1, i + 1),
+                amount_base=-10.0 * (i + 1),
+                description_normalized=f"Purchase {i}"
+            )
+            for i in range(5)
+        ]
+        db.add_all(transactions)
+        db.commit()
+        transaction_ids = [txn.id for txn in transactions] + [9999]
+
+        async def classify_stub(transaction):
+            return {
+                'predicted_coa_id': 42,
+                'predicted_coa_name': 'Office Expenses',
+                'confidence': 0.9,
+                'classification_method': 'rule',
+                'source': 'rule'
+            }
+
+        classification_service._classify_hybrid = classify_stub
+
+        chunks = [
+            chunk async for chunk in classification_service.iter_classify_transactions(
+                transaction_ids, chunk_size=2
+            )
+        ]
+
+        assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+        assert [r['transaction_id'] for chunk in chunks for r in chunk] == transaction_ids[:5]
+        db.expire_all()
+        assert all(txn.coa_id == 42 and txn.confidence_score == 0.9 for txn in db.query(TransactionClean))
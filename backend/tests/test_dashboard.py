@@ -0,0 +1,206 @@
+import pytest
+import numpy as np
+from datetime import date, datetime
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.accounts import ChartOfAccounts
+from app.models.transactions import TransactionClean
+from app.models.reconciliation import Reconciliation
+from app.services.dashboard_service import (
+    DashboardService, SEVERITY_HIGH, _score_anomalies, _score_anomalies_numpy
+)
+
+
+class TestDashboardService:
+    """Test dashboard aggregates against an in-memory database"""
+
+    @pytest.fixture
+    def db(self):
+        """In-memory SQLite session seeded with a small ledger"""
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        session = sessionmaker(bind=engine)()
+
+        office = ChartOfAccounts(code="5000", name="Office Expenses")
+        travel = ChartOfAccounts(code="5400", name="Travel Expenses")
+        session.add_all([office, travel])
+        session.flush()
+
+        rows = [
+            # (date, amount, counterparty, coa)
+            (datetime(2023, 6, 1), -30.00, "Staples", office),
+            (datetime(2024, 1, 2), 1500.00, "Globex", None),
+            (datetime(2024, 1, 5), -120.00, "Staples", office),
+            (datetime(2024, 1, 6), -80.00, "Staples", office),  # Saturday
+            (datetime(2024, 1, 10), -950.00, "Delta", travel),
+            (datetime(2024, 1, 20), -40.00, "Uber", travel),
+            (datetime(2024, 2, 3), 2500.00, "Globex", None),
+            (datetime(2024, 2, 8), -60.00, "Staples", office),
+        ]
+        for i, (txn_date, amount, counterparty, coa) in enumerate(rows):
+            session.add(TransactionClean(
+                raw_id=i + 1,
+                transaction_date=txn_date,
+                amount_base=amount,
+                description_normalized=f"{counterparty} payment",
+                counterparty_normalized=counterparty,
+                coa_id=coa.id if coa else None
+            ))
+        session.flush()
+
+        receipt = session.query(TransactionClean).filter(TransactionClean.amount_base == 1500.00).one()
+        session.add(Reconciliation(
+            transaction_clean_id=receipt.id, match_type="exact", match_score=1.0, status="approved"
+        ))
+        session.commit()
+
+        yield session
+        session.close()
+
+    @pytest.fixture
+    def dashboard_service(self, db):
+        return DashboardService(db)
+
+    def test_dashboard_summary_aggregates(self, dashboard_service):
+        """Summary totals, percentages and largest transaction for January"""
+        summary = dashboard_service.get_dashboard_summary(date(2024, 1, 1), date(2024, 1, 31))
+
+        assert summary['transaction_count'] == 5
+        assert summary['total_income'] == pytest.approx(1500.00)
+        assert summary['total_expenses'] == pytest.approx(1190.00)
+        assert summary['net_income'] == pytest.approx(310.00)
+        assert summary['classified_percentage'] == pytest.approx(80.0)
+        assert summary['reconciled_percentage'] == pytest.approx(20.0)
+        assert summary['top_expense_category'] == "Travel Expenses"
+        assert summary['largest_transaction']['amount'] == pytest.approx(1500.00)
+
+    def test_dashboard_summary_counts_recent_activity(self, db, dashboard_service):
+        """Recent activity covers the last 7 days regardless of the requested period"""
+        db.add(TransactionClean(
+            raw_id=99,
+            transaction_date=datetime.combine(date.today(), datetime.min.time()),
+            amount_base=-15.00,
+            description_normalized="Coffee",
+            counterparty_normalized="Cafe"
+        ))
+        db.commit()
+
+        summary = dashboard_service.get_dashboard_summary(date(2024, 1, 1), date(2024, 1, 31))
+
+        assert summary['recent_activity_count'] == 1
+        assert summary['reconciled_percentage'] == pytest.approx(20.0)
+
+    def test_dashboard_summary_empty_period(self, dashboard_service):
+        summary = dashboard_service.get_dashboard_summary(date(2023, 1, 1), date(2023, 1, 31))
+
+        assert summary['transaction_count'] == 0
+        assert summary['largest_transaction'] is None
+
+    def test_top_vendors_include_most_common_category(self, dashboard_service):
+        vendors = dashboard_service.get_top_vendors(date(2024, 1, 1), date(2024, 2, 28))
+
+        assert [v['vendor_name'] for v in vendors] == ["Delta", "Staples", "Uber"]
+        staples = vendors[1]
+        assert staples['total_spent'] == pytest.approx(260.00)
+        assert staples['transaction_count'] == 3
+        assert staples['last_transaction_date'] == date(2024, 2, 8)
+        assert staples['category'] == "Office Expenses"
+
+    def test_revenue_analysis_groups_by_month_with_growth(self, dashboard_service):
+        analysis = dashboard_service.get_revenue_analysis(date(2024, 1, 1), date(2024, 2, 28), "month")
+
+        assert [row['period'] for row in analysis] == ["2024-01", "2024-02"]
+        assert analysis[0]['growth_rate'] is None
+        assert analysis[1]['growth_rate'] == pytest.approx(2500 / 1500 * 100 - 100)
+
+    def test_cash_flow_analysis_groups_by_week(self, dashboard_service):
+        cash_flow = dashboard_service.get_cash_flow_analysis(date(2024, 1, 1), date(2024, 1, 14), "week")
+
+        assert cash_flow == [
+            {'period': "Week of 2024-01-01", 'cash_in': 1500.0, 'cash_out': 200.0, 'net_cash_flow': 1300.0},
+            {'period': "Week of 2024-01-08", 'cash_in': 0, 'cash_out': 950.0, 'net_cash_flow': -950.0},
+        ]
+
+    def test_anomalies_flag_weekend_transactions(self, dashboard_service):
+        anomalies = dashboard_service.get_anomalies(date(2024, 1, 1), date(2024, 1, 31), "amount,frequency")
+
+        # Amounts are within the IQR fence, only the Saturday purchases are flagged
+        assert [(a['anomaly_type'], a['date'], a['severity']) for a in anomalies] == [
+            ('frequency', date(2024, 1, 6), 'low'),
+            ('frequency', date(2024, 1, 20), 'low')
+        ]
+        assert [a['description'] for a in anomalies] == ["Staples payment", "Uber payment"]
+
+    def test_new_vendor_anomalies_skip_vendors_with_history(self, dashboard_service):
+        anomalies = dashboard_service.get_anomalies(date(2024, 1, 1), date(2024, 1, 31), "new_vendor")
+
+        flagged = sorted({a['reason'].split(': ')[1] for a in anomalies})
+        assert flagged == ["Delta", "Globex", "Uber"]
+
+    def test_spending_trends_compare_last_two_months_per_category(self, dashboard_service):
+        trends = dashboard_service.get_spending_trends(date(2024, 1, 1), date(2024, 2, 28))
+
+        assert len(trends) == 1
+        office = trends[0]
+        assert office['category'] == "Office Expenses"
+        assert office['period'] == "2024-02"
+        assert office['amount'] == pytest.approx(60.00)
+        assert office['trend_direction'] == 'decreasing'
+        assert office['trend_strength'] == pytest.approx(70.0)
+
+    def test_kpis_reuse_period_totals_within_a_request(self, dashboard_service):
+        dashboard_service.get_dashboard_summary(date(2024, 2, 1), date(2024, 2, 29))
+        kpis = {k['kpi_name']: k for k in dashboard_service.get_kpis(date(2024, 2, 1), date(2024, 2, 29))}
+
+        assert set(dashboard_service._period_totals) == {
+            (date(2024, 2, 1), date(2024, 2, 29)),
+            (date(2024, 1, 3), date(2024, 1, 31)),
+        }
+        assert kpis['Total Revenue']['current_value'] == pytest.approx(2500.00)
+        assert kpis['Total Expenses']['previous_value'] == pytest.approx(1190.00)
+        assert kpis['Transaction Volume']['previous_value'] == 4
+        assert kpis['Transaction Volume']['trend'] == 'down'
+
+    def test_kpis_fetch_both_periods_in_one_query(self, db, dashboard_service):
+        statements = []
+        event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        kpis = {k['kpi_name']: k for k in dashboard_service.get_kpis(date(2024, 2, 1), date(2024, 2, 29))}
+
+        assert len(statements) == 1
+        assert kpis['Total Revenue']['previous_value'] == pytest.approx(0)
+        assert kpis['Net Income']['current_value'] == pytest.approx(2440.00)
+
+    def test_expense_categories_with_trend(self, dashboard_service):
+        categories = dashboard_service.get_expense_categories(date(2024, 1, 1), date(2024, 2, 28))
+
+        assert [(c['category_name'], c['trend']) for c in categories] == [
+            ("Travel Expenses", 'down'),
+            ("Office Expenses", 'down'),
+        ]
+        assert categories[0]['percentage_of_total'] == pytest.approx(990 / 1250 * 100)
+
+    def test_anomaly_kernel_matches_numpy_reference(self):
+        rng = np.random.default_rng(0)
+        abs_amounts = rng.uniform(0, 1000, size=500)
+        day_numbers = rng.integers(19000, 20000, size=500)
+
+        severity, weekend = _score_anomalies(abs_amounts, day_numbers, 400.0)
+        expected_severity, expected_weekend = _score_anomalies_numpy(abs_amounts, day_numbers, 400.0)
+
+        np.testing.assert_array_equal(severity, expected_severity)
+        np.testing.assert_array_equal(weekend, expected_weekend)
+        assert severity.max() == SEVERITY_HIGH
+
+    def test_spending_trends_single_category_month_over_month(self, dashboard_service):
+        trends = dashboard_service.get_spending_trends(date(2023, 1, 1), date(2024, 2, 28), "Office")
+
+        assert [(t['period'], t['trend_direction']) for t in trends] == [
+            ("2024-01", 'increasing'),
+            ("2024-02", 'decreasing'),
+        ]
+        assert trends[0]['amount'] == pytest.approx(200.00)
+        assert trends[0]['trend_strength'] == pytest.approx(200 / 30 * 100 - 100)
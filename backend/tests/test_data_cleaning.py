@@ -0,0 +1,185 @@
+import pytest
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.transactions import TransactionRaw, TransactionClean
+from app.services.data_cleaning_service import (
+    DataCleaningService, _FX_RATES, _convert_amounts, _convert_amounts_numpy
+)
+
+
+class TestDataCleaningService:
+    """Test cleaning raw transactions into normalized records"""
+
+    @pytest.fixture
+    def db(self):
+        """In-memory SQLite session with all tables created"""
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        session = sessionmaker(bind=engine)()
+        yield session
+        session.close()
+
+    @pytest.fixture
+    def cleaning_service(self, db):
+        return DataCleaningService(db)
+
+    @pytest.fixture
+    def raw_transactions(self, db):
+        """Three raw bank transactions"""
+        rows = [
+            TransactionRaw(
+                source="bank",
+                transaction_date=datetime(2024, 1, 5),
+                amount=-45.20,
+                currency="USD",
+                description="CARD PURCHASE  SHELL OIL #1234",
+                counterparty="Shell Oil 1234",
+                transaction_hash="hash-1"
+            ),
+            TransactionRaw(
+                source="bank",
+                transaction_date=datetime(2024, 1, 6),
+                amount=-100.00,
+                currency="EUR",
+                description="ACH The Acme Consulting LLC",
+                counterparty="The Acme Consulting LLC",
+                transaction_hash="hash-2"
+            ),
+            TransactionRaw(
+                source="bank",
+                transaction_date=datetime(2024, 1, 7),
+                amount=2500.00,
+                currency="USD",
+                description="Client payment 01/07/2024",
+                counterparty=None,
+                transaction_hash="hash-3"
+            ),
+        ]
+        db.add_all(rows)
+        db.commit()
+        return rows
+
+    @pytest.mark.asyncio
+    async def test_clean_transactions_normalizes_rows(self, db, cleaning_service, raw_transactions):
+        """Every raw row gets one normalized clean record"""
+        cleaned_count = await cleaning_service.clean_transactions(raw_transactions)
+
+        assert cleaned_count == 3
+        clean = {txn.raw_id: txn for txn in db.query(TransactionClean)}
+        assert clean[raw_transactions[0].id].counterparty_normalized == "SHELL"
+        assert clean[raw_transactions[1].id].counterparty_normalized == "ACME CONSULTING"
+        assert clean[raw_transactions[1].id].amount_base == pytest.approx(-110.00)
+        assert clean[raw_transactions[2].id].counterparty_normalized is None
+        assert clean[raw_transactions[2].id].description_normalized == "CLIENT PAYMENT"
+
+    @pytest.mark.asyncio
+    async def test_clean_transactions_skips_already_cleaned(self, db, cleaning_service, raw_transactions):
+        """Rows that already have a clean record are not cleaned again"""
+        await cleaning_service.clean_transactions(raw_transactions[:1])
+
+        cleaned_count = await cleaning_service.clean_transactions(raw_transactions)
+
+        assert cleaned_count == 2
+        assert db.query(TransactionClean).count() == 3
+
+    def test_clean_batch_matches_row_by_row_cleaning(self, cleaning_service, raw_transactions):
+        """The column-wise batch path produces the same records as the per-row helpers"""
+        raw_transactions[2].description = ""
+        raw_transactions[1].counterparty = ""
+
+        batch = cleaning_service._clean_batch(raw_transactions)
+
+        assert batch == [
+            dict(cleaning_service._clean_transaction_data(raw_txn), raw_id=raw_txn.id)
+            for raw_txn in raw_transactions
+        ]
+        assert batch[1]['counterparty_normalized'] is None
+        assert batch[2]['description_normalized'] == ""
+
+    def test_normalize_dates_parses_formats_in_order(self, cleaning_service):
+        """String dates follow the same format precedence as _normalize_date"""
+        dates = cleaning_service._normalize_dates(pd.Series(
+            [datetime(2024, 1, 5), "2024-01-06", "01/02/2024", "13/01/2024", "2024-01-07 10:11:12"],
+            dtype=object
+        ))
+
+        assert dates.tolist() == [
+            datetime(2024, 1, 5),
+            datetime(2024, 1, 6),
+            datetime(2024, 1, 2),
+            datetime(2024, 1, 13),
+            datetime(2024, 1, 7, 10, 11, 12),
+        ]
+
+    def test_normalize_dates_rejects_unknown_formats(self, cleaning_service):
+        with pytest.raises(ValueError, match="Unable to parse date"):
+            cleaning_service._normalize_dates(pd.Series(["2024-01-05", "Jan 5th"], dtype=object))
+
+    def test_detect_duplicates_groups_matching_rows(self, cleaning_service, raw_transactions):
+        """Rows with the same date, amount and description prefix are reported together"""
+        raw_transactions[1].transaction_date = raw_transactions[0].transaction_date
+        raw_transactions[1].amount = raw_transactions[0].amount
+        raw_transactions[1].description = raw_transactions[0].description + " (retry)"
+
+        duplicates = cleaning_service.detect_duplicates(raw_transactions)
+
+        assert len(duplicates) == 1
+        assert duplicates[0]['transaction_ids'] == [raw_transactions[0].id, raw_transactions[1].id]
+        assert duplicates[0]['count'] == 2
+
+    def test_data_quality_report_counts_missing_fields(self, cleaning_service, raw_transactions):
+        report = cleaning_service.get_data_quality_report(raw_transactions)
+
+        assert report['total_transactions'] == 3
+        assert report['completeness']['missing_counterparties'] == 1
+        assert report['completeness']['missing_amounts'] == 0
+        assert report['data_quality']['potential_outliers'] == 0
+        assert report['date_range']['span_days'] == 2
+
+    def test_currency_kernel_matches_numpy_reference(self):
+        rng = np.random.default_rng(0)
+        amounts = rng.uniform(-1000, 1000, size=500)
+        currency_codes = rng.integers(0, len(_FX_RATES), size=500).astype(np.int8)
+
+        np.testing.assert_array_equal(
+            _convert_amounts(amounts, currency_codes, _FX_RATES),
+            _convert_amounts_numpy(amounts, currency_codes, _FX_RATES)
+        )
+
+    def test_company_suffixes_are_stripped(self, cleaning_service):
+        assert cleaning_service._normalize_description("Acme Widgets Inc.") == "ACME WIDGETS"
+        assert cleaning_service._normalize_description("PayrollInc") == "PAYROLLINC"
+        assert cleaning_service._normalize_counterparty("The Acme Co. ") == "ACME"
+
+    @pytest.mark.asyncio
+    async def test_clean_transactions_query_streams_uncleaned_rows_in_batches(
+        self, db, cleaning_service, raw_transactions
+    ):
+        """Already-cleaned rows are skipped in SQL and the rest are inserted batch by batch"""
+        await cleaning_service.clean_transactions(raw_transactions[:1])
+        batch_sizes = []
+        insert_clean_batch = cleaning_service._insert_clean_batch
+        cleaning_service._insert_clean_batch = lambda batch: batch_sizes.append(len(batch)) or insert_clean_batch(batch)
+
+        cleaned_count = await cleaning_service.clean_transactions_query(batch_size=1)
+
+        assert cleaned_count == 2
+        assert batch_sizes == [1, 1, 0]
+        assert sorted(txn.raw_id for txn in db.query(TransactionClean)) == [txn.id for txn in raw_transactions]
+
+    @pytest.mark.asyncio
+    async def test_clean_transactions_query_accepts_a_filtered_query(self, db, cleaning_service, raw_transactions):
+        query = db.query(TransactionRaw).filter(TransactionRaw.currency == "EUR")
+
+        assert await cleaning_service.clean_transactions_query(query) == 1
+        assert db.query(TransactionClean).one().raw_id == raw_transactions[1].id
+
+    @pytest.mark.asyncio
+    async def test_clean_transactions_empty_batch(self, db, cleaning_service):
+        assert await cleaning_service.clean_transactions([]) == 0
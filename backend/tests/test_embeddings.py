@@ -0,0 +1,133 @@
+import pytest
+import numpy as np
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.accounts import ChartOfAccounts
+from app.models.transactions import TransactionClean
+from app.services.embeddings import EmbeddingService
+
+
+class TestEmbeddingService:
+    """Test the placeholder embedding service"""
+
+    @pytest.fixture
+    def db(self):
+        """In-memory SQLite session with all tables created"""
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        session = sessionmaker(bind=engine)()
+        yield session
+        session.close()
+
+    @pytest.fixture
+    def embedding_service(self, db):
+        return EmbeddingService(db)
+
+    def test_dummy_embedding_is_deterministic_unit_vector(self, embedding_service):
+        """Same text gives the same cached, read-only unit vector"""
+        first = embedding_service.get_embedding("STAPLES OFFICE SUPPLIES")
+        second = embedding_service.get_embedding("STAPLES OFFICE SUPPLIES")
+
+        assert first is second
+        assert first.shape == (384,)
+        assert np.linalg.norm(first) == pytest.approx(1.0)
+        assert not first.flags.writeable
+
+    def test_dummy_embedding_leaves_global_random_state_alone(self, embedding_service):
+        state = np.random.get_state()[1].copy()
+
+        embedding_service.get_embedding("UBER TRIP")
+
+        np.testing.assert_array_equal(np.random.get_state()[1], state)
+
+    def test_compute_similarity_maps_cosine_to_unit_range(self, embedding_service):
+        embedding = embedding_service.get_embedding("SHELL OIL")
+
+        assert embedding_service.compute_similarity(embedding, embedding) == pytest.approx(1.0, abs=1e-6)
+        assert embedding_service.compute_similarity(embedding, -embedding) == pytest.approx(0.0, abs=1e-6)
+
+    def test_embeddings_cache_stores_rows_in_one_float32_matrix(self, embedding_service):
+        """Cached embeddings round-trip through the shared matrix"""
+        first = embedding_service.get_embedding("PAYROLL")
+        second = embedding_service.get_embedding("RENT")
+
+        embedding_service.update_embeddings_cache(1, first)
+        embedding_service.update_embeddings_cache(2, second)
+
+        assert embedding_service._emb_matrix.dtype == np.float32
+        np.testing.assert_array_equal(embedding_service.get_cached_embedding(1), first)
+        np.testing.assert_array_equal(embedding_service.get_cached_embedding(2), second)
+        assert embedding_service.get_cached_embedding(3) is None
+
+    def test_expired_cache_rows_are_reused(self, embedding_service):
+        embedding_service.update_embeddings_cache(1, embedding_service.get_embedding("PAYROLL"))
+        expired_row, _ = embedding_service._id_to_row[1]
+        embedding_service._id_to_row[1] = (expired_row, time.monotonic() - 7200)
+
+        embedding_service.update_embeddings_cache(2, embedding_service.get_embedding("RENT"))
+        embedding_service.update_embeddings_cache(3, embedding_service.get_embedding("UTILITIES"))
+
+        assert embedding_service.get_cached_embedding(1) is None
+        assert expired_row in {embedding_service._id_to_row[2][0], embedding_service._id_to_row[3][0]}
+        assert embedding_service._rows_used == 2
+
+    def test_batch_cos_matches_pairwise_similarity(self, embedding_service):
+        texts = ["PAYROLL", "RENT", "UTILITIES", "OFFICE DEPOT"]
+        for transaction_id, text in enumerate(texts, start=1):
+            embedding_service.update_embeddings_cache(transaction_id, embedding_service.get_embedding(text))
+        query = embedding_service.get_embedding("STAPLES")
+
+        similarities = embedding_service.batch_cos(query * 3)
+
+        expected = [embedding_service.compute_similarity(query, embedding_service.get_embedding(t)) for t in texts]
+        np.testing.assert_allclose((similarities + 1) / 2, expected, atol=1e-6)
+
+    def test_find_similar_transactions_searches_cached_embeddings(self, db, embedding_service):
+        """With cached embeddings, matches come from classified transactions best-first"""
+        office = ChartOfAccounts(code="5000", name="Office Expenses")
+        db.add(office)
+        db.flush()
+        descriptions = ["STAPLES OFFICE SUPPLIES", "UBER TRIP", "DELTA AIRLINES"]
+        for i, description in enumerate(descriptions):
+            txn = TransactionClean(
+                raw_id=i + 1,
+                transaction_date=datetime(2024, 1, i + 1),
+                amount_base=-10.0,
+                description_normalized=description,
+                coa_id=office.id if i != 1 else None
+            )
+            db.add(txn)
+            db.flush()
+            embedding_service.update_embeddings_cache(txn.id, embedding_service.get_embedding(description))
+        db.commit()
+
+        matches = embedding_service.find_similar_transactions("DELTA AIRLINES", top_k=3)
+
+        assert matches[0]['description'] == "DELTA AIRLINES"
+        assert matches[0]['coa_name'] == "Office Expenses"
+        assert matches[0]['similarity_score'] == pytest.approx(1.0, abs=1e-6)
+        assert "UBER TRIP" not in [m['description'] for m in matches]
+        assert len(matches) == 2
+
+    def test_find_similar_transactions_without_cache_uses_placeholder(self, embedding_service):
+        matches = embedding_service.find_similar_transactions("ANYTHING", top_k=1)
+
+        assert [m['transaction_id'] for m in matches] == [1]
+
+    def test_refreshed_cache_entry_moves_behind_older_entries(self, embedding_service):
+        """Re-caching an id restarts its TTL and evicts expired entries now at the head"""
+        embedding_service.update_embeddings_cache(1, embedding_service.get_embedding("PAYROLL"))
+        embedding_service.update_embeddings_cache(2, embedding_service.get_embedding("RENT"))
+        row, _ = embedding_service._id_to_row[2]
+        embedding_service._id_to_row[2] = (row, time.monotonic() - 7200)
+
+        embedding_service.update_embeddings_cache(3, embedding_service.get_embedding("UTILITIES"))
+        assert list(embedding_service._id_to_row) == [1, 2, 3]  # Eviction stops at the live head
+
+        embedding_service.update_embeddings_cache(1, embedding_service.get_embedding("PAYROLL"))
+        assert list(embedding_service._id_to_row) == [3, 1]
@@ -0,0 +1,277 @@
+import pytest
+import csv
+import gzip
+import os
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.config import settings
+from app.core.database import Base
+from app.models.accounts import ChartOfAccounts
+from app.models.exports import ExportRecord
+from app.models.transactions import TransactionClean
+from app.services.export_service import (
+    ExportService, run_queued_export, _format_csv_value, _format_us_date
+)
+
+
+class TestExportService:
+    """Test exporting clean transactions to accounting formats"""
+
+    @pytest.fixture
+    def engine(self):
+        # CSV writing runs on a worker thread, so share one connection across threads
+        return create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+
+    @pytest.fixture
+    def db(self, engine):
+        """In-memory SQLite session with all tables created"""
+        Base.metadata.create_all(bind=engine)
+        session = sessionmaker(bind=engine)()
+        yield session
+        session.close()
+
+    @pytest.fixture
+    def export_service(self, db, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        return ExportService(db)
+
+    @pytest.fixture
+    def transactions(self, db):
+        """Two categorized expenses, one uncategorized expense and one deposit"""
+        office = ChartOfAccounts(code="5000", name="Office Expenses")
+        travel = ChartOfAccounts(code="6100", name="Travel")
+        db.add_all([office, travel])
+        db.flush()
+        rows = [
+            TransactionClean(
+                raw_id=1,
+                transaction_date=datetime(2024, 1, 5),
+                amount_base=-45.20,
+                description_normalized="STAPLES OFFICE SUPPLIES",
+                counterparty_normalized="STAPLES",
+                coa_id=office.id,
+                is_reviewed="true"
+            ),
+            TransactionClean(
+                raw_id=2,
+                transaction_date=datetime(2024, 1, 6),
+                amount_base=-300.00,
+                description_normalized="DELTA AIRLINES",
+                counterparty_normalized="DELTA",
+                coa_id=travel.id
+            ),
+            TransactionClean(
+                raw_id=3,
+                transaction_date=datetime(2024, 1, 7),
+                amount_base=-12.50,
+                description_normalized="COFFEE SHOP",
+                counterparty_normalized=None
+            ),
+            TransactionClean(
+                raw_id=4,
+                transaction_date=datetime(2024, 1, 8),
+                amount_base=2500.00,
+                description_normalized="CLIENT PAYMENT",
+                counterparty_normalized="ACME",
+                coa_id=office.id
+            ),
+        ]
+        db.add_all(rows)
+        db.commit()
+        return rows
+
+    @staticmethod
+    def read_export(result):
+        with gzip.open(f"exports/{result['filename']}", 'rt', newline='', encoding='utf-8') as csvfile:
+            return list(csv.DictReader(csvfile))
+
+    @pytest.mark.asyncio
+    async def test_quickbooks_journal_entries_load_accounts_once(
+        self, engine, export_service, transactions
+    ):
+        """Account names come from one chart of accounts query, not a lookup per transaction"""
+        statements = []
+        event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        result = await export_service.export_to_quickbooks(export_type="journal_entry")
+
+        # Existence check, chart of accounts, transaction stream (export_records is bookkeeping)
+        assert len([sql for sql in statements if sql.startswith("SELECT") and "export_records" not in sql]) == 3
+        rows = self.read_export(result)
+        assert result['filename'].endswith(".csv.gz")
+        assert result['record_count'] == 8  # Debit and credit line per transaction
+        assert [row['Account'] for row in rows[::2]] == [
+            "Office Expenses", "Travel", "Uncategorized Expense", "Office Expenses"
+        ]
+        assert rows[0]['Debits'] == "45.2"
+        assert rows[1]['Credits'] == "45.2"
+
+    @pytest.mark.asyncio
+    async def test_xero_bank_transactions_use_account_codes(self, export_service, transactions):
+        result = await export_service.export_to_xero(export_type="bank_transaction")
+
+        rows = self.read_export(result)
+        assert [row['Account'] for row in rows] == ["5000", "6100", "6000", "5000"]
+        assert rows[0]['Date'] == "05/01/2024"
+
+    @pytest.mark.asyncio
+    async def test_general_ledger_includes_account_code_and_name(self, export_service, transactions):
+        result = await export_service.export_to_csv(export_type="general_ledger")
+
+        rows = self.read_export(result)
+        assert (rows[1]['Account Code'], rows[1]['Account Name']) == ("6100", "Travel")
+        assert (rows[2]['Account Code'], rows[2]['Account Name']) == ("", "Uncategorized")
+
+    def test_save_csv_file_streams_rows_in_chunks(self, export_service, tmp_path):
+        """Chunks after the first append without a header and keep integer columns intact"""
+        rows = ({'id': i, 'coa_id': i if i != 1 else None, 'amount': i * 1.5} for i in range(5))
+
+        record_count = export_service._save_csv_file(rows, str(tmp_path / "out.csv"), chunk_size=2)
+
+        assert record_count == 5
+        assert (tmp_path / "out.csv").read_text().splitlines() == [
+            "id,coa_id,amount", "0,0,0.0", "1,,1.5", "2,2,3.0", "3,3,4.5", "4,4,6.0"
+        ]
+
+    def test_save_csv_file_gzips_gz_paths(self, export_service, tmp_path):
+        rows = ({'id': i, 'amount': i * 1.5} for i in range(3))
+
+        assert export_service._save_csv_file(rows, str(tmp_path / "out.csv.gz")) == 3
+
+        with gzip.open(tmp_path / "out.csv.gz", 'rt', newline='') as csvfile:
+            assert csvfile.read() == "id,amount\r\n0,0.0\r\n1,1.5\r\n2,3.0\r\n"
+
+    def test_save_csv_file_rejects_empty_data(self, export_service, tmp_path):
+        with pytest.raises(ValueError, match="No data to export"):
+            export_service._save_csv_file(iter([]), str(tmp_path / "out.csv"))
+
+        assert not (tmp_path / "out.csv").exists()
+
+    @pytest.mark.asyncio
+    async def test_trial_balance_splits_net_balances_into_debit_and_credit(self, export_service, transactions):
+        result = await export_service.export_to_csv(export_type="trial_balance")
+
+        rows = {row['Account Code']: row for row in self.read_export(result)}
+        assert (rows["5000"]['Debit'], rows["5000"]['Credit'], rows["5000"]['Balance']) == ("0", "2454.8", "2454.8")
+        assert (rows["6100"]['Debit'], rows["6100"]['Credit'], rows["6100"]['Balance']) == ("300.0", "0", "-300.0")
+
+    @pytest.mark.asyncio
+    async def test_export_without_transactions_raises(self, export_service):
+        with pytest.raises(ValueError, match="No transactions found for export"):
+            await export_service.export_to_xero(export_type="journal_entry")
+
+    @pytest.mark.asyncio
+    async def test_export_records_are_visible_to_other_service_instances(self, db, export_service, transactions):
+        """Download lookups and history work from a different request's service"""
+        first = await export_service.export_to_xero(export_type="bank_transaction")
+        second = await export_service.export_to_csv(export_type="trial_balance")
+
+        other_service = ExportService(db)
+        info = other_service.get_export_file_info(first['file_id'])
+        history = other_service.get_export_history()
+
+        assert (info['filename'], info['record_count']) == (first['filename'], 4)
+        assert [entry['id'] for entry in history] == [second['file_id'], first['file_id']]
+        assert [entry['id'] for entry in other_service.get_export_history(skip=1, limit=1)] == [first['file_id']]
+        assert other_service.get_export_file_info("missing") is None
+
+    @pytest.mark.asyncio
+    async def test_cleanup_old_exports_removes_expired_files_and_records(self, db, export_service, transactions):
+        old = await export_service.export_to_xero(export_type="bank_transaction")
+        recent = await export_service.export_to_xero(export_type="journal_entry")
+        db.get(ExportRecord, old['file_id']).created_at = datetime.now() - timedelta(days=31)
+        db.commit()
+
+        assert export_service.cleanup_old_exports(days_old=30) == 1
+
+        assert not os.path.exists(f"exports/{old['filename']}")
+        assert export_service.get_export_file_info(old['file_id']) is None
+        assert export_service.get_export_file_info(recent['file_id']) is not None
+
+    @pytest.mark.asyncio
+    async def test_quickbooks_expenses_are_formatted_across_chunks(
+        self, export_service, transactions, monkeypatch
+    ):
+        """Each chunk is formatted column-wise and deposits are filtered out by the query"""
+        monkeypatch.setattr(settings, "EXPORT_CHUNK_SIZE", 1)
+
+        result = await export_service.export_to_quickbooks(export_type="expense")
+
+        rows = self.read_export(result)
+        assert result['record_count'] == 3
+        assert [(row['Date'], row['Payee'], row['Account'], row['Amount']) for row in rows] == [
+            ("01/05/2024", "STAPLES", "Office Expenses", "45.2"),
+            ("01/06/2024", "DELTA", "Travel", "300.0"),
+            ("01/07/2024", "Unknown", "Uncategorized Expense", "12.5"),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_quickbooks_bills_group_expenses_by_vendor(self, export_service, transactions):
+        """One bill per vendor, due 30 days after the vendor's latest expense"""
+        result = await export_service.export_to_quickbooks(export_type="bill")
+
+        rows = self.read_export(result)
+        assert [(row['Vendor'], row['Amount'], row['Memo'], row['Date'], row['Due Date']) for row in rows] == [
+            ("DELTA", "300.0", "Combined bill for 1 transactions", "01/06/2024", "02/05/2024"),
+            ("STAPLES", "45.2", "Combined bill for 1 transactions", "01/05/2024", "02/04/2024"),
+            ("Unknown Vendor", "12.5", "Combined bill for 1 transactions", "01/07/2024", "02/06/2024"),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_transactions_csv_filters_on_exported_columns(self, export_service, transactions):
+        """Column filters run in SQL, timestamps match their formatted text, other keys are ignored"""
+        result = await export_service.export_to_csv(
+            export_type="transactions",
+            columns=['id', 'transaction_date', 'category_predicted', 'coa_id'],
+            filters={'transaction_date': "2024-01-06 00:00:00", 'category_predicted': None, 'is_reviewed': "true"}
+        )
+
+        rows = self.read_export(result)
+        assert rows == [{'id': str(transactions[1].id), 'transaction_date': "2024-01-06 00:00:00",
+                         'category_predicted': "", 'coa_id': str(transactions[1].coa_id)}]
+
+    @pytest.mark.asyncio
+    async def test_transactions_csv_filter_on_unknown_column_matches_blank(self, export_service, transactions):
+        with pytest.raises(ValueError, match="No data to export"):
+            await export_service.export_to_csv(
+                export_type="transactions", columns=['id', 'bogus'], filters={'bogus': "x"}
+            )
+
+    def test_date_formatting_matches_strftime_layouts(self):
+        timestamp = datetime(2024, 3, 5, 7, 8, 9, 123456)
+
+        assert _format_csv_value(timestamp) == timestamp.strftime('%Y-%m-%d %H:%M:%S')
+        assert _format_csv_value(timestamp.replace(tzinfo=timezone.utc)) == "2024-03-05 07:08:09"
+        assert _format_csv_value(date(2024, 3, 5)) == "2024-03-05"
+        assert _format_csv_value(12.5) == 12.5
+        assert _format_us_date(timestamp) == timestamp.strftime('%m/%d/%Y')
+
+    @pytest.mark.asyncio
+    async def test_queued_export_completes_in_background_session(self, engine, db, export_service, transactions):
+        """A queued export runs later in its own session and fills in its record"""
+        queued = export_service.queue_export()
+        assert export_service.get_export_file_info(queued['file_id'])['status'] == 'queued'
+
+        await run_queued_export(
+            queued['file_id'], 'xero', {'export_type': "bank_transaction"}, sessionmaker(bind=engine)
+        )
+
+        db.expire_all()
+        info = export_service.get_export_file_info(queued['file_id'])
+        assert (info['status'], info['record_count']) == ('completed', 4)
+        assert os.path.exists(info['file_path'])
+
+    @pytest.mark.asyncio
+    async def test_queued_export_records_failures(self, engine, db, export_service):
+        queued = export_service.queue_export()
+
+        await run_queued_export(queued['file_id'], 'csv', {'export_type': "general_ledger"}, sessionmaker(bind=engine))
+
+        db.expire_all()
+        info = export_service.get_export_file_info(queued['file_id'])
+        assert (info['status'], info['error']) == ('failed', "No data to export")
+        assert export_service.cleanup_old_exports(days_old=-1) == 1
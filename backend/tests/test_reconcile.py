@@ -1,12 +1,25 @@
 import pytest
 import asyncio
+import itertools
 from datetime import date, datetime, timedelta
 from unittest.mock import Mock, MagicMock
 from decimal import Decimal
 
-from app.services.reconciliation_service import ReconciliationService
+import numpy as np
+from rapidfuzz import fuzz, process
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.config import settings
+from app.core.database import Base
+from app.services.reconciliation_service import (
+    ReconciliationService, _clean_description, _fuzzy_scores, _fuzzy_scores_numpy
+)
+from app.models.accounts import ChartOfAccounts
 from app.models.transactions import TransactionClean
-from app.models.reconciliation import LedgerEntry
+from app.models.reconciliation import LedgerEntry, Reconciliation
 
 
 class TestReconciliationEngine:
@@ -45,7 +58,7 @@ class TestReconciliationEngine:
         exact_entry.amount_base = Decimal('100.00')
         exact_entry.entry_date = datetime(2024, 1, 15)
         exact_entry.memo = "Coffee expense"
-        exact_entry.is_reconciled = "false"
+        exact_entry.is_reconciled = False
         entries.append(exact_entry)
         
         # Windowed match candidate
@@ -54,7 +67,7 @@ class TestReconciliationEngine:
         windowed_entry.amount_base = Decimal('100.00')
         windowed_entry.entry_date = datetime(2024, 1, 18)  # 3 days later
         windowed_entry.memo = "Office supplies"
-        windowed_entry.is_reconciled = "false"
+        windowed_entry.is_reconciled = False
         entries.append(windowed_entry)
         
         # Fuzzy match candidate
@@ -63,7 +76,7 @@ class TestReconciliationEngine:
         fuzzy_entry.amount_base = Decimal('95.50')
         fuzzy_entry.entry_date = datetime(2024, 1, 16)
         fuzzy_entry.memo = "Coffee shop downtown purchase"
-        fuzzy_entry.is_reconciled = "false"
+        fuzzy_entry.is_reconciled = False
         entries.append(fuzzy_entry)
         
         # Partial match candidates (sum to 100)
@@ -72,7 +85,7 @@ class TestReconciliationEngine:
         partial1.amount_base = Decimal('60.00')
         partial1.entry_date = datetime(2024, 1, 15)
         partial1.memo = "Partial payment 1"
-        partial1.is_reconciled = "false"
+        partial1.is_reconciled = False
         entries.append(partial1)
         
         partial2 = Mock(spec=LedgerEntry)
@@ -80,7 +93,7 @@ class TestReconciliationEngine:
         partial2.amount_base = Decimal('40.00')
         partial2.entry_date = datetime(2024, 1, 15)
         partial2.memo = "Partial payment 2"
-        partial2.is_reconciled = "false"
+        partial2.is_reconciled = False
         entries.append(partial2)
         
         return entries
@@ -148,6 +161,26 @@ class TestReconciliationEngine:
         assert set(best_partial['ledger_ids']) == {104, 105}
         assert 'Partial match' in best_partial['explain']
     
+    def test_partial_matching_skips_unreachable_combination_sizes(self, reconcile_service, monkeypatch):
+        """Sizes whose sums can't reach the target are never enumerated"""
+        ledgers = []
+        for i in range(40):
+            ledger = Mock(spec=LedgerEntry)
+            ledger.id = 200 + i
+            ledger.amount_base = -10.0
+            ledgers.append(ledger)
+        txn = Mock(spec=TransactionClean)
+        txn.amount_base = 10.0
+        sizes = []
+        combinations = itertools.combinations
+        monkeypatch.setattr(itertools, "combinations", lambda items, r: sizes.append(r) or combinations(items, r))
+
+        matches = reconcile_service._match_partial(txn, ledgers, amount_tolerance=0.01, max_txns=3)
+
+        assert sizes == [1]
+        assert [m['ledger_ids'] for m in matches] == [[ledger.id] for ledger in ledgers]
+        assert all(m['partial_score'] == 1.0 for m in matches)
+
     def test_unified_scoring(self, reconcile_service):
         """Test unified scoring mechanism"""
         candidate = {
@@ -174,15 +207,30 @@ class TestReconciliationEngine:
         expected = 0.2 * 0.8 + 0.2 * 0.6 + 0.1 * 0.5
         assert abs(score_mixed - expected) < 0.001
     
+    def test_amount_block_returns_nearby_ledgers_in_ledger_order(self, reconcile_service):
+        """Blocking keeps every entry an amount-bound strategy could match, in original order"""
+        amounts = np.array([100.0, 5.0, 95.5, 100.005, 250.0, 60.0, 111.0])
+        by_amount = np.argsort(amounts, kind='stable')
+
+        block = reconcile_service._amount_block(100.0, 0.01, by_amount, amounts[by_amount])
+
+        # 10% of the larger amount reaches 90 below and 111.11 above, for partial matches
+        assert block.tolist() == [0, 2, 3, 6]
+
     def test_description_cleaning(self, reconcile_service):
         """Test description cleaning for fuzzy matching"""
         dirty_desc = "Coffee Shop Purchase 2024-01-15 TXN#123456 $100.00"
-        clean_desc = reconcile_service._clean_description(dirty_desc)
+        clean_desc = _clean_description(dirty_desc)
         
         assert "coffee shop purchase" in clean_desc.lower()
         assert "2024-01-15" not in clean_desc
         assert "123456" not in clean_desc
         assert "$" not in clean_desc
+
+    def test_description_cleaning_drops_stopwords_and_merchant_suffixes(self, reconcile_service):
+        assert _clean_description("The Home Depot, Inc.") == "home depot"
+        assert _clean_description("Acme Holdings LLC for Services") == "acme holdings services"
+        assert _clean_description("阿里巴巴有限公司 的 付款") == "阿里巴巴 付款"
     
     @pytest.mark.asyncio
     async def test_run_reconcile_integration(self, reconcile_service, mock_db):
@@ -230,7 +278,7 @@ class TestReconciliationEngine:
         ledger_close.amount_base = Decimal('100.05')  # 5 cents difference
         ledger_close.entry_date = datetime(2024, 1, 15)
         ledger_close.memo = "Test"
-        ledger_close.is_reconciled = "false"
+        ledger_close.is_reconciled = False
         
         # Should match with 0.1 tolerance
         match_loose = reconcile_service._match_exact(sample_transaction, ledger_close, 0.1)
@@ -248,7 +296,7 @@ class TestReconciliationEngine:
         empty_ledger.amount_base = Decimal('100.00')
         empty_ledger.entry_date = datetime(2024, 1, 15)
         empty_ledger.memo = None
-        empty_ledger.is_reconciled = "false"
+        empty_ledger.is_reconciled = False
         
         fuzzy_result = reconcile_service._match_fuzzy(sample_transaction, empty_ledger, 0.85)
         assert fuzzy_result is None
@@ -270,5 +318,271 @@ class TestReconciliationEngine:
         assert exact_zero is not None
 
 
+class TestReconciliationService:
+    """Test reconciliation queries against an in-memory database"""
+
+    @pytest.fixture
+    def engine(self):
+        # auto_reconcile runs on a worker thread, so share one connection across threads
+        return create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+
+    @pytest.fixture
+    def db(self, engine):
+        """In-memory SQLite session with all tables created"""
+        Base.metadata.create_all(bind=engine)
+        session = sessionmaker(bind=engine)()
+        yield session
+        session.close()
+
+    @pytest.fixture
+    def ledger_entries(self, db):
+        """Ledger entries for an exact, a windowed and a fuzzy match, plus one too far off"""
+        cash = ChartOfAccounts(code="1000", name="Cash")
+        db.add(cash)
+        db.flush()
+        entries = [
+            LedgerEntry(entry_date=datetime(2024, 1, 15), amount_base=100.00, memo="Coffee expense"),
+            LedgerEntry(entry_date=datetime(2024, 1, 18), amount_base=-250.00, memo="Rent"),
+            LedgerEntry(entry_date=datetime(2024, 1, 22), amount_base=95.50, memo="Office Depot supplie."),
+            LedgerEntry(entry_date=datetime(2024, 3, 1), amount_base=100.00, memo="Coffee expense"),
+        ]
+        for entry in entries:
+            entry.debit_account_id = entry.credit_account_id = cash.id
+        db.add_all(entries)
+        db.commit()
+        return entries
+
+    @pytest.fixture
+    def transactions(self, db):
+        rows = [
+            TransactionClean(raw_id=1, transaction_date=datetime(2024, 1, 15, 9), amount_base=-100.00,
+                             description_normalized="COFFEE SHOP"),
+            TransactionClean(raw_id=2, transaction_date=datetime(2024, 1, 15, 9), amount_base=-100.00,
+                             description_normalized="COFFEE SHOP"),
+            TransactionClean(raw_id=3, transaction_date=datetime(2024, 1, 16), amount_base=250.00,
+                             description_normalized="RENT JANUARY"),
+            TransactionClean(raw_id=4, transaction_date=datetime(2024, 1, 20), amount_base=-98.00,
+                             description_normalized="OFFICE DEPOT SUPPLIES"),
+        ]
+        db.add_all(rows)
+        db.commit()
+        return rows
+
+    @pytest.mark.asyncio
+    async def test_auto_reconcile_matches_each_ledger_entry_once(self, db, ledger_entries, transactions):
+        """The second coffee purchase can't reuse the first one's entry and the March entry is out of range.
+
+        Descriptions are compared ignoring case and punctuation.
+        """
+        service = ReconciliationService(db)
+
+        results = await service.auto_reconcile(min_confidence=0.5)
+
+        assert [(r['transaction_clean_id'], r['ledger_entry_id'], r['match_type']) for r in results] == [
+            (transactions[0].id, ledger_entries[0].id, 'exact'),
+            (transactions[2].id, ledger_entries[1].id, 'windowed'),
+            (transactions[3].id, ledger_entries[2].id, 'fuzzy'),
+        ]
+        assert results[1]['match_score'] == pytest.approx(0.7)
+        assert results[2]['amount_difference'] == pytest.approx(2.5)
+        assert results[2]['description_similarity'] >= 0.85
+        assert [r['id'] for r in results] == [rec.id for rec in db.query(Reconciliation).order_by(Reconciliation.id)]
+        assert all(r['created_at'] is not None for r in results)
+
+    @pytest.mark.asyncio
+    async def test_auto_reconcile_skips_low_confidence_matches(self, db, ledger_entries, transactions):
+        service = ReconciliationService(db)
+
+        results = await service.auto_reconcile(min_confidence=0.95)
+
+        assert [r['match_type'] for r in results] == ['exact']
+
+    @pytest.mark.asyncio
+    async def test_auto_reconcile_rerun_frees_rejected_entries(self, db, ledger_entries, transactions):
+        """A rejected pair isn't proposed again, and its entry goes to the next transaction that fits"""
+        service = ReconciliationService(db)
+        first = await service.auto_reconcile(min_confidence=0.5)
+        service.review_reconciliation(first[0]['id'], 'rejected')
+
+        results = await service.auto_reconcile(min_confidence=0.5)
+
+        assert [(r['transaction_clean_id'], r['ledger_entry_id'], r['match_type']) for r in results] == [
+            (transactions[1].id, ledger_entries[0].id, 'exact'),
+        ]
+        assert db.query(Reconciliation).count() == 4
+
+    @pytest.mark.asyncio
+    async def test_auto_reconcile_in_worker_processes_frees_rejected_entries(
+        self, db, ledger_entries, transactions, monkeypatch
+    ):
+        service = ReconciliationService(db)
+        first = await service.auto_reconcile(min_confidence=0.5)
+        service.review_reconciliation(first[0]['id'], 'rejected')
+        monkeypatch.setattr(settings, "RECONCILIATION_WORKERS", 2)
+        monkeypatch.setattr(settings, "RECONCILIATION_PARALLEL_MIN_TRANSACTIONS", 1)
+
+        results = await service.auto_reconcile(min_confidence=0.5)
+
+        assert [(r['transaction_clean_id'], r['ledger_entry_id']) for r in results] == [
+            (transactions[1].id, ledger_entries[0].id),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_run_reconcile_scores_fuzzy_candidates_in_one_pass(self, db, ledger_entries, transactions):
+        """Descriptions are scored against every memo at once; only close ones become candidates"""
+        result = await ReconciliationService(db).run_reconcile(
+            weights={'exact': 0.5, 'windowed': 0.2, 'fuzzy': 1.0, 'partial': 0.0}
+        )
+
+        matches = {m['txn_id']: (m['ledger_id'], m['match_type']) for m in result['matches']}
+        assert matches[transactions[0].id] == ([ledger_entries[0].id], 'exact')
+        assert matches[transactions[3].id] == ([ledger_entries[2].id], 'fuzzy')
+        assert transactions[1].id not in matches  # Its coffee entry is taken; "Rent" isn't similar
+
+    @pytest.mark.asyncio
+    async def test_auto_reconcile_in_worker_processes_matches_in_process(
+        self, db, ledger_entries, transactions, monkeypatch
+    ):
+        """Ranking in workers and claiming entries afterwards gives the sequential result"""
+        monkeypatch.setattr(settings, "RECONCILIATION_WORKERS", 2)
+        monkeypatch.setattr(settings, "RECONCILIATION_PARALLEL_MIN_TRANSACTIONS", 1)
+
+        results = await ReconciliationService(db).auto_reconcile(min_confidence=0.5)
+
+        assert [(r['transaction_clean_id'], r['ledger_entry_id'], r['match_type']) for r in results] == [
+            (transactions[0].id, ledger_entries[0].id, 'exact'),
+            (transactions[2].id, ledger_entries[1].id, 'windowed'),
+            (transactions[3].id, ledger_entries[2].id, 'fuzzy'),
+        ]
+        assert results[2]['ledger_info']['memo'] == "Office Depot supplie."
+
+
+    @pytest.mark.asyncio
+    async def test_run_reconcile_in_worker_processes_matches_in_process(
+        self, db, ledger_entries, transactions, monkeypatch
+    ):
+        weights = {'exact': 0.5, 'windowed': 0.2, 'fuzzy': 1.0, 'partial': 0.1}
+        expected = await ReconciliationService(db).run_reconcile(weights=weights)
+        monkeypatch.setattr(settings, "RECONCILIATION_WORKERS", 2)
+        monkeypatch.setattr(settings, "RECONCILIATION_PARALLEL_MIN_TRANSACTIONS", 1)
+
+        result = await ReconciliationService(db).run_reconcile(weights=weights)
+
+        assert result == expected
+        assert len(result['matches']) == 3
+
+    def test_reconciliation_exceptions_load_both_sides_without_per_row_queries(
+        self, engine, db, ledger_entries, transactions
+    ):
+        db.add_all([
+            Reconciliation(transaction_clean_id=transactions[3].id, ledger_entry_id=ledger_entries[2].id,
+                           match_type='fuzzy', match_score=0.8, amount_difference=2.5, date_difference_days=2),
+            Reconciliation(transaction_clean_id=transactions[1].id, ledger_entry_id=None,
+                           match_type='manual', match_score=0.5, amount_difference=100.0, date_difference_days=0),
+            Reconciliation(transaction_clean_id=transactions[0].id, ledger_entry_id=ledger_entries[0].id,
+                           match_type='exact', match_score=1.0, amount_difference=0.0, date_difference_days=0),
+        ])
+        db.commit()
+        statements = []
+        event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        exceptions = ReconciliationService(db).get_reconciliation_exceptions()
+
+        # Page of reconciliations with both sides joined in
+        assert len(statements) == 1
+        assert [e['exception_type'] for e in exceptions] == ['amount_mismatch', 'amount_mismatch']
+        # Most severe first
+        assert [e['severity'] for e in exceptions] == ['medium', 'low']
+        assert exceptions[0]['transaction_info']['id'] == transactions[1].id
+        assert exceptions[0]['ledger_info'] is None
+        assert exceptions[1]['ledger_info']['memo'] == "Office Depot supplie."
+
+
+    def test_unmatched_transactions_include_rejected_matches(self, db, ledger_entries, transactions):
+        db.add_all([
+            Reconciliation(transaction_clean_id=transactions[0].id, match_type='exact', match_score=1.0),
+            Reconciliation(transaction_clean_id=transactions[1].id, match_type='exact', match_score=1.0,
+                           status='rejected'),
+        ])
+        db.commit()
+
+        unmatched = ReconciliationService(db).get_unmatched_transactions("bank")
+
+        assert [t['id'] for t in unmatched] == [t.id for t in transactions[1:]]
+
+
+    def test_fuzzy_score_kernel_matches_numpy_reference(self):
+        rng = np.random.default_rng(0)
+        similarities = rng.uniform(0, 1, size=200)
+        amounts = np.append(rng.uniform(0, 500, size=199), 0.0)
+        date_diffs = rng.integers(0, 7, size=200).astype(np.int32)
+
+        np.testing.assert_array_equal(
+            _fuzzy_scores(similarities, 120.0, amounts, date_diffs, 6),
+            _fuzzy_scores_numpy(similarities, 120.0, amounts, date_diffs, 6)
+        )
+        assert _fuzzy_scores(np.ones(1), 0.0, np.zeros(1), np.zeros(1, dtype=np.int32), 6)[0] == 1.0
+
+    def test_description_similarities_ignore_repeated_and_reordered_words(self, db):
+        """Token sets score reordered or repeated merchant names as the same description"""
+        memos = ["depot office", "office depot office depot", "office supplies", "", "office depot supplies"]
+
+        scores = ReconciliationService(db)._description_similarities("office depot", memos)
+
+        assert scores[[0, 1, 4]].tolist() == [1.0, 1.0, 1.0]
+        assert scores[2] == 0.0  # Below the fuzzy threshold
+        assert np.isnan(scores[3])
+
+    def test_description_similarities_score_repeated_pairs_once(self, db, monkeypatch):
+        service = ReconciliationService(db)
+        calls = []
+        cdist = process.cdist
+        monkeypatch.setattr(process, "cdist", lambda queries, choices, **kwargs: (
+            calls.append(list(choices)) or cdist(queries, choices, **kwargs)
+        ))
+
+        first = service._description_similarities("office depot", ["office depot", "office depo", "office depot"])
+        second = service._description_similarities("office depot", ["office depo", "office depot inc"])
+
+        assert calls == [["office depot", "office depo"], ["office depot inc"]]
+        np.testing.assert_array_equal(first, [1.0, fuzz.token_set_ratio("office depot", "office depo") / 100.0, 1.0])
+        assert second[0] == first[1]
+
+
+    @pytest.mark.asyncio
+    async def test_auto_reconcile_without_transactions_skips_ledger_load(self, engine, db, ledger_entries):
+        statements = []
+        event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        assert await ReconciliationService(db).auto_reconcile() == []
+        assert len(statements) == 1  # Just the transaction span aggregate
+
+
+    def test_reconciliation_stats_count_in_two_queries(self, engine, db, ledger_entries, transactions):
+        db.add_all([
+            Reconciliation(transaction_clean_id=transactions[0].id, match_type='exact', match_score=1.0,
+                           status='approved'),
+            Reconciliation(transaction_clean_id=transactions[2].id, match_type='windowed', match_score=0.7,
+                           status='approved'),
+            Reconciliation(transaction_clean_id=transactions[3].id, match_type='fuzzy', match_score=0.9,
+                           status='approved'),
+            Reconciliation(transaction_clean_id=transactions[1].id, match_type='exact', match_score=1.0),
+        ])
+        db.commit()
+        service = ReconciliationService(db)
+        statements = []
+        event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        stats = service.get_reconciliation_stats()
+
+        assert len(statements) == 2
+        assert (stats['total_transactions'], stats['total_ledger_entries']) == (4, 4)
+        assert (stats['matched_count'], stats['manual_review_needed']) == (3, 1)
+        assert stats['match_type_breakdown'] == {'exact': 1, 'windowed': 1, 'fuzzy': 1}
+        assert stats['auto_match_rate'] == pytest.approx(2 / 3)
+        # The breakdown follows the same date range as the counts
+        assert service.get_reconciliation_stats(start_date=date(2999, 1, 1))['match_type_breakdown'] == {}
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
\ No newline at end of file